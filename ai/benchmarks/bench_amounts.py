@@ -0,0 +1,71 @@
+"""Worst-case inputs for amount parsing, the legacy extraction against `worker.amounts`.
+
+Run from `ai/`: `python -m benchmarks.bench_amounts [scale]`. Each case is timed at
+`scale` and `4 * scale` repetitions; a linear parser shows a ratio close to 4, and
+the run exits non-zero when the parser's ratio exceeds `MAX_RATIO`.
+"""
+
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from worker.amounts import find_amounts
+
+_LEGACY_AMOUNT_RX = re.compile(
+  r"\b(?:(?:QAR|ر\.ق|ريال\sقطري)\s*)?(\d{1,3}(?:[,\.\s]\d{3})*(?:[\.,]\d{1,2})?)\b", re.IGNORECASE
+)
+MAX_RATIO = 6.0
+
+WORST_CASES: Dict[str, Callable[[int], str]] = {
+  "separator chain": lambda n: "1" + ",234" * n + ",5x",
+  "ledger columns": lambda n: "123 456 789 " * n,
+  "dotted run": lambda n: "1.2" * n,
+  "mixed separators": lambda n: "1,234.5 ١٬٢٣٤٫٥ " * n,
+  "digit run": lambda n: "9" * (4 * n),
+  "marked amounts": lambda n: "QAR 12,345.67 ر.ق " * n,
+}
+
+
+def _legacy_amounts(text: str) -> List[Dict[str, Any]]:
+  # The extraction loop entities.py ran before `worker.amounts`, kept as the baseline.
+  amounts: List[Dict[str, Any]] = []
+  for match in _LEGACY_AMOUNT_RX.finditer(text):
+    raw = match.group(0)
+    numeric = match.group(1).replace(",", "").replace(" ", "")
+    try:
+      value = float(numeric)
+    except ValueError:
+      continue
+    currency = "QAR" if ("QAR" in raw.upper() or "ر" in raw) else None
+    amounts.append({"value": value, "currency": currency})
+  return amounts
+
+
+def _time(func: Callable[[], object]) -> float:
+  started = time.perf_counter()
+  func()
+  return time.perf_counter() - started
+
+
+def main() -> int:
+  scale = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+  regressed = []
+  print(f"{'case':<18} {'legacy ms':>10} {'ratio':>6} {'parser ms':>10} {'ratio':>6}")
+  for name, build in WORST_CASES.items():
+    small, large = build(scale), build(4 * scale)
+    legacy = [_time(lambda text=text: _legacy_amounts(text)) for text in (small, large)]
+    parser = [_time(lambda text=text: find_amounts(text)) for text in (small, large)]
+    print(
+      f"{name:<18} {legacy[1] * 1000:10.1f} {legacy[1] / max(legacy[0], 1e-9):6.1f}"
+      f" {parser[1] * 1000:10.1f} {parser[1] / max(parser[0], 1e-9):6.1f}"
+    )
+    if parser[1] / max(parser[0], 1e-9) > MAX_RATIO:
+      regressed.append(name)
+  if regressed:
+    print(f"superlinear: {', '.join(regressed)}")
+  return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,42 @@
+"""Time the amount analytics over a synthetic engagement.
+
+Run from `ai/`: `python -m benchmarks.bench_analytics [amounts] [files]`. Defaults to
+300,000 amounts spread over 20,000 files, with ~1% planted duplicate payments.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from worker.analytics import analyze, finding_rows
+
+
+def main() -> None:
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+  files = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+  rng = np.random.default_rng(3)
+  evidence = rng.integers(0, files, count)
+  values = np.round(10 ** rng.uniform(2, 6.5, count), 2)
+  days = rng.integers(19_000, 19_365, count).astype(np.int64)
+  planted = rng.choice(count, count // 100, replace=False)
+  values[planted[1:]] = values[planted[:-1]]
+  days[planted[1:]] = days[planted[:-1]]
+  evidence_ids = np.array([f"ev-{index}" for index in range(files)], dtype=object)
+
+  started = time.perf_counter()
+  result = analyze(evidence, values, days, evidence)
+  analysed = time.perf_counter() - started
+  started = time.perf_counter()
+  rows = finding_rows(evidence_ids, evidence, values, days, result)
+  built = time.perf_counter() - started
+
+  print(f"{count} amounts over {files} files")
+  print(
+    f"analyze {analysed:.2f}s  findings {built:.2f}s  rows {len(rows)}  exact {int((result['exact'] >= 0).sum())}  "
+    f"fuzzy pairs {len(result['fuzzy'])}  benford mad {result['benford']['mad']}"
+  )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,49 @@
+"""Build and scoring time for BM25 retrieval over a synthetic regulation.
+
+Run from `ai/`: `python -m benchmarks.bench_bm25 [chunks] [pages]`. Defaults to a
+5,000-chunk regulation scored against a 300-page document.
+"""
+
+import random
+import sys
+import time
+
+from worker.retrieval import RegulationIndex
+
+_WORDS = (
+  "اعتماد أمر شراء مورد عقد مناقصة فاتورة صرف دفعة ميزانية مراجعة تدقيق لجنة مدير مالي سجل محاسبي ضمان "
+  "تأمين غرامة تأخير توريد استلام مخزن أصل ثابت إهلاك رواتب بدل سلفة عهدة مصروف إيراد ضريبة رسوم ترخيص"
+).split()
+
+
+def make_text(rng: random.Random, words: int) -> str:
+  return " ".join(rng.choice(_WORDS) + str(rng.randrange(400)) for _ in range(words))
+
+
+def main() -> None:
+  chunk_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+  page_count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+  rng = random.Random(7)
+  chunks = [{"id": str(i), "section_ref": f"{i // 50}.{i % 50}", "text": make_text(rng, 120), "seq": i + 1} for i in range(chunk_count)]
+  pages = [make_text(rng, 400) for _ in range(page_count)]
+
+  started = time.perf_counter()
+  index = RegulationIndex.empty()
+  index.add_chunks(chunks)
+  index.weights()
+  built = time.perf_counter() - started
+
+  started = time.perf_counter()
+  restored = RegulationIndex.from_bytes(index.to_bytes())
+  reloaded = time.perf_counter() - started
+
+  started = time.perf_counter()
+  top = restored.top_chunks(pages, top_k=10)
+  scored = time.perf_counter() - started
+
+  print(f"{chunk_count} chunks x {page_count} pages, vocabulary {len(index.vocabulary)}")
+  print(f"build {built:.2f}s  reload {reloaded:.2f}s  score {scored:.2f}s  best {top[0]['score'] if top else 0}")
+
+
+if __name__ == "__main__":
+  main()
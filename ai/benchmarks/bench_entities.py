@@ -0,0 +1,82 @@
+"""Compare the single-pass entity scanner with the previous three-pass implementation.
+
+Run from `ai/`: `python -m benchmarks.bench_entities [megabytes] [gazetteer_size]`.
+"""
+
+import random
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from worker.entities import _DEPARTMENTS, scan_entities
+
+_LEGACY_DATE_RX = re.compile(r"\b(20\d{2}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/20\d{2})\b")
+_LEGACY_AMOUNT_RX = re.compile(
+  r"\b(?:(?:QAR|ر\.ق|ريال\sقطري)\s*)?(\d{1,3}(?:[,\.\s]\d{3})*(?:[\.,]\d{1,2})?)\b", re.IGNORECASE
+)
+
+
+def legacy_scan(text: str, gazetteer: List[str]) -> Dict[str, Any]:
+  dates = list({match.group(1) for match in _LEGACY_DATE_RX.finditer(text)})
+  amounts: List[Dict[str, Any]] = []
+  for match in _LEGACY_AMOUNT_RX.finditer(text):
+    raw = match.group(0)
+    try:
+      value = float(match.group(1).replace(",", "").replace(" ", ""))
+    except ValueError:
+      continue
+    amounts.append({"value": value, "currency": "QAR" if ("QAR" in raw.upper() or "ر" in raw) else None})
+  departments = [name for name in gazetteer if name in text]
+  return {"dates": dates, "amounts": amounts, "departments": departments}
+
+
+def make_gazetteer(size: int) -> List[str]:
+  rng = random.Random(7)
+  letters = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+  names = list(_DEPARTMENTS)
+  while len(names) < size:
+    names.append("إدارة " + "".join(rng.choice(letters) for _ in range(rng.randint(4, 9))))
+  return names
+
+
+def make_text(megabytes: float, gazetteer: List[str]) -> str:
+  rng = random.Random(11)
+  words = ["فاتورة", "رقم", "بتاريخ", "بقيمة", "إجمالي", "المورد", "الموافقة", "السداد", "العقد", "البند"]
+  lines: List[str] = []
+  size = 0
+  while size < megabytes * 1024 * 1024:
+    line = " ".join(rng.choice(words) for _ in range(12))
+    line += f" {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025 QAR {rng.randint(1, 999)},{rng.randint(0, 999):03d}"
+    if rng.random() < 0.05:
+      line += " " + rng.choice(gazetteer)
+    lines.append(line)
+    size += len(line.encode("utf-8")) + 1
+  return "\n".join(lines)
+
+
+def timed(label: str, func: Callable[[], Dict[str, Any]], repeat: int = 3) -> Dict[str, Any]:
+  best = float("inf")
+  result: Dict[str, Any] = {}
+  for _ in range(repeat):
+    started = time.perf_counter()
+    result = func()
+    best = min(best, time.perf_counter() - started)
+  print(f"{label:<28} {best * 1000:9.1f} ms  dates={len(result['dates'])} amounts={len(result['amounts'])} names={len(result['departments'])}")
+  return result
+
+
+def main() -> None:
+  megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+  gazetteer_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+  gazetteer = make_gazetteer(gazetteer_size)
+  text = make_text(megabytes, gazetteer)
+  print(f"text: {len(text.encode('utf-8')) / 1024 / 1024:.1f} MB, gazetteer: {len(gazetteer)} names")
+  legacy = timed("legacy (3 passes + loop)", lambda: legacy_scan(text, gazetteer))
+  single = timed("single-pass scanner", lambda: scan_entities(text, gazetteer))
+  assert set(legacy["departments"]) == set(single["departments"])
+  assert set(legacy["dates"]) == set(single["dates"])
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,85 @@
+"""Rows/sec for writing findings one INSERT at a time versus `upsert_findings`.
+
+Needs a database with the `findings` table (`DATABASE_URL`, as for the worker).
+Rows go to a temporary copy of the table, so nothing is persisted.
+
+Run from `ai/`: `python -m benchmarks.bench_findings_insert [rows ...]`.
+"""
+
+import json
+import sys
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import text as sql_text
+
+from worker import compare
+from worker.config import Config
+from worker.db import SessionLocal
+
+_TABLE = "bench_findings"
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+  evidence_id, scenario_id = str(uuid.uuid4()), str(uuid.uuid4())
+  match = {"match": "أمر شراء", "section": 0, "page": 1, "start": 120, "end": 128, "context": "نص " * 55}
+  details = json.dumps({"matched_any": ["أمر شراء"], "missing_all": ["سياسة"], "matches": [match] * 3, "match_count": 3})
+  return [
+    {
+      "evidence_id": evidence_id,
+      "scenario_id": scenario_id,
+      "check_id": f"CHK-{index}",
+      "title": f"CHK-{index}: Keywords found in document",
+      "severity": "medium",
+      "details": details,
+    }
+    for index in range(count)
+  ]
+
+
+def per_row(session, rows: List[Dict[str, Any]]) -> None:
+  statement = sql_text(
+    f"""
+      INSERT INTO {_TABLE}(evidence_id, scenario_id, check_id, title, severity, status, details)
+      VALUES (:evidence_id, :scenario_id, :check_id, :title, :severity, 'open', CAST(:details AS jsonb))
+    """
+  )
+  for row in rows:
+    session.execute(statement, row)
+
+
+def multi_row(session, rows: List[Dict[str, Any]]) -> None:
+  compare._insert_values(session, rows, _TABLE)
+
+
+def copy(session, rows: List[Dict[str, Any]]) -> None:
+  if not compare._copy_findings(session, rows, _TABLE):
+    raise RuntimeError("COPY needs the psycopg 3 driver")
+
+
+def rows_per_second(write: Callable[[Any, List[Dict[str, Any]]], None], rows: List[Dict[str, Any]]) -> float:
+  with SessionLocal() as session:
+    session.execute(sql_text(f"CREATE TEMP TABLE {_TABLE} (LIKE findings INCLUDING DEFAULTS INCLUDING INDEXES) ON COMMIT DROP"))
+    started = time.perf_counter()
+    write(session, rows)
+    session.execute(sql_text(f"SELECT count(*) FROM {_TABLE}")).scalar()
+    elapsed = time.perf_counter() - started
+    session.rollback()
+  return len(rows) / elapsed
+
+
+def main() -> None:
+  sizes = [int(arg) for arg in sys.argv[1:]] or [150, 2000, 20000]
+  print(f"database: {Config.DATABASE_URL.rsplit('@', 1)[-1]}")
+  for size in sizes:
+    rows = make_rows(size)
+    results = {name: rows_per_second(write, rows) for name, write in (("per-row", per_row), ("multi-row", multi_row), ("copy", copy))}
+    print(
+      f"{size:>6} rows  per-row {results['per-row']:>9.0f}/s  multi-row {results['multi-row']:>9.0f}/s  "
+      f"copy {results['copy']:>9.0f}/s"
+    )
+
+
+if __name__ == "__main__":
+  main()
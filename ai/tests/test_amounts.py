@@ -0,0 +1,60 @@
+import time
+
+from benchmarks.bench_amounts import WORST_CASES
+from worker.amounts import find_amounts, parse_number
+
+
+def test_parse_number_formats() -> None:
+  assert parse_number("5,000") == (5000.0, True)
+  assert parse_number("1,234.56") == (1234.56, True)
+  assert parse_number("١٬٢٣٤٫٥٠") == (1234.5, True)
+  assert parse_number("٧٥٠") == (750.0, False)
+  assert parse_number("12,34,567") is None
+
+
+def test_find_amounts_needs_marker_or_money_format() -> None:
+  text = "فاتورة رقم 123 بتاريخ 2025-01-15 بقيمة 5,000 ريال قطري (QAR 5000). المبلغ ٧٥٠ ر.ق والكمية 3"
+  amounts = find_amounts(text)
+
+  assert [(amount["value"], amount["currency"]) for amount in amounts] == [
+    (5000.0, "QAR"),
+    (5000.0, "QAR"),
+    (750.0, "QAR"),
+  ]
+  assert text[amounts[2]["start"]:amounts[2]["end"]] == "٧٥٠"
+
+
+def test_find_amounts_accepts_markers_flush_against_digits() -> None:
+  assert [(amount["value"], amount["currency"]) for amount in find_amounts("QAR5,000 ر.ق5,000 QAR5,000.50")] == [
+    (5000.0, "QAR"),
+    (5000.0, "QAR"),
+    (5000.5, "QAR"),
+  ]
+  assert find_amounts("INV2024 ref2,500") == []
+
+
+def test_find_amounts_needs_a_whole_word_prefix_marker() -> None:
+  assert find_amounts("SQAR 500") == []
+  assert [amount["currency"] for amount in find_amounts("SQAR 5,000 and qar 12")] == [None, "QAR"]
+
+
+def test_find_amounts_skips_runs_longer_than_any_amount() -> None:
+  assert find_amounts("9" * 40 + " QAR") == []
+  assert find_amounts("Items 101,102,103,104,105,106,107,108,109") == []
+
+
+def _best_of(runs: int, text: str) -> float:
+  timings = []
+  for _ in range(runs):
+    started = time.perf_counter()
+    find_amounts(text)
+    timings.append(time.perf_counter() - started)
+  return min(timings)
+
+
+def test_find_amounts_grows_linearly_on_worst_case_inputs() -> None:
+  # Quadrupling the input must not do much worse than quadruple the work; the
+  # backtracking parsers this replaced grew quadratically (16x) on these.
+  for name, build in WORST_CASES.items():
+    small, large = _best_of(5, build(5000)), _best_of(5, build(20000))
+    assert large < small * 4 * 2, name
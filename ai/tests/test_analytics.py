@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+
+from worker import analytics
+
+
+def _arrays(rows):
+  evidence_ids, evidence = np.unique(np.array([row[0] for row in rows], dtype=object), return_inverse=True)
+  values = np.array([row[1] for row in rows], dtype=np.float64)
+  days = np.array([row[2] for row in rows], dtype=np.int64)
+  _, roots = np.unique(np.array([row[3] for row in rows], dtype=object), return_inverse=True)
+  return evidence_ids, evidence, values, days, roots
+
+
+def test_duplicates_exact_and_fuzzy() -> None:
+  rows = [
+    ("ev-a", 52000.00, 100, "ev-a"),
+    ("ev-b", 52000.00, 100, "ev-b"),
+    ("ev-c", 52000.00, 100, "ev-a"),  # re-uploaded scan of ev-a counts as the same file
+    ("ev-d", 52020.00, 103, "ev-d"),
+    ("ev-e", 52000.00, 140, "ev-e"),
+    ("ev-f", 800.00, 100, "ev-f"),
+  ]
+  evidence_ids, evidence, values, days, roots = _arrays(rows)
+  cents = np.round(values * 100).astype(np.int64)
+
+  exact = analytics.exact_duplicates(cents, days, roots)
+  fuzzy = analytics.fuzzy_duplicates(values, cents, days, roots)
+
+  assert list(exact >= 0) == [True, True, True, False, False, False]
+  assert sorted(tuple(sorted(evidence_ids[evidence[pair]])) for pair in fuzzy) == [
+    ("ev-a", "ev-d"),
+    ("ev-b", "ev-d"),
+    ("ev-c", "ev-d"),
+  ]
+
+
+def test_benford_flags_fabricated_digits(monkeypatch) -> None:
+  rng = np.random.default_rng(1)
+  natural = 10 ** rng.uniform(2, 6, 5000)
+  assert analytics.benford(natural)["conforms"] is True
+
+  fabricated = np.concatenate([natural, rng.uniform(7000, 7999, 800)])
+  summary = analytics.benford(fabricated)
+  assert summary["conforms"] is False
+  assert summary["excess_digits"] == [7]
+
+
+def test_outlier_scores_flag_large_amounts() -> None:
+  values = np.array([1200.0, 950.0, 1100.0, 1020.0, 880.0, 1300.0, 2_500_000.0])
+  scores = analytics.outlier_scores(values)
+  assert list(np.flatnonzero(scores > analytics.Config.ANALYTICS_OUTLIER_Z)) == [6]
+
+
+def test_finding_rows_cap_matches_per_file(monkeypatch) -> None:
+  monkeypatch.setattr(analytics.Config, "FINDING_MAX_MATCHES", 2)
+  rows = [("ev-a", 1000.0 + index, 10, "ev-a") for index in range(4)] + [
+    ("ev-b", 1000.0 + index, 10, "ev-b") for index in range(4)
+  ]
+  evidence_ids, evidence, values, days, roots = _arrays(rows)
+
+  findings = analytics.finding_rows(evidence_ids, evidence, values, days, analytics.analyze(evidence, values, days, roots))
+
+  exact = [row for row in findings if row["check_id"] == "AMT-DUP-EXACT"]
+  assert sorted(row["evidence_id"] for row in exact) == ["ev-a", "ev-b"]
+  details = json.loads(exact[0]["details"])
+  assert details["match_count"] == 4
+  assert [match["value"] for match in details["matches"]] == [1003.0, 1002.0]
+  assert details["matches"][0]["date"] == "1970-01-11"
+  assert all(row["scenario_id"] == analytics.Config.ANALYTICS_SCENARIO_ID for row in findings)
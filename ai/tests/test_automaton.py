@@ -0,0 +1,17 @@
+from worker.automaton import KeywordAutomaton
+
+
+def test_automaton_reports_overlapping_and_prefix_hits() -> None:
+  automaton = KeywordAutomaton(["أمر", "أمر شراء", "شراء مباشر", "PO"])
+  text = "تم إصدار أمر شراء مباشر PO-17"
+
+  hits = list(automaton.finditer(text))
+
+  assert automaton.found(text) == {"أمر", "أمر شراء", "شراء مباشر", "PO"}
+  assert (text.index("أمر"), "أمر") in hits
+  assert (text.index("شراء"), "شراء مباشر") in hits
+
+
+def test_automaton_without_keywords_matches_nothing() -> None:
+  assert KeywordAutomaton([]).found("أي نص") == set()
+  assert KeywordAutomaton(["a.b"]).found("axb") == set()
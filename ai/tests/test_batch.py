@@ -0,0 +1,122 @@
+from contextlib import nullcontext
+
+from worker import batch
+
+
+class FakeObject:
+  def __init__(self, name: str, content: str | None = None) -> None:
+    self.name = name
+    self.content = content or name
+    self.closed = False
+
+  def sha256(self) -> str:
+    return f"sha-{self.content}"
+
+  def __enter__(self) -> "FakeObject":
+    return self
+
+  def __exit__(self, *exc_info) -> None:
+    self.closed = True
+
+
+class FakeSession:
+  def __init__(self) -> None:
+    self.commits = 0
+    self.statements: list[tuple[str, dict]] = []
+
+  def execute(self, statement, params=None) -> None:
+    self.statements.append((str(statement), params))
+
+  def commit(self) -> None:
+    self.commits += 1
+
+  def rollback(self) -> None:
+    pass
+
+
+def test_extract_batch_pipelines_and_batches_inserts(monkeypatch) -> None:
+  records = [{"id": f"ev-{index}"} for index in range(5)]
+  inserted: list[list[str]] = []
+
+  def fake_open(s3, record):
+    if record["id"] == "ev-3":
+      raise OSError("no such key")
+    return FakeObject(record["id"])
+
+  def fake_extract(session, record, evidence_object, content_hash):
+    return {
+      "evidence_id": record["id"],
+      "content_sha256": content_hash,
+      "payload": {},
+      "search_text": "",
+      "confidence": 0.9,
+      "chars": 10,
+      "cached": record["id"] == "ev-0",
+    }
+
+  session = FakeSession()
+
+  monkeypatch.setattr(batch.Config, "BATCH_INSERT_SIZE", 2)
+  monkeypatch.setattr(batch, "_load_records", lambda ids, engagement: records)
+  monkeypatch.setattr(batch, "s3_client", lambda: object())
+  monkeypatch.setattr(batch, "SessionLocal", lambda: nullcontext(session))
+  monkeypatch.setattr(batch, "open_evidence", fake_open)
+  monkeypatch.setattr(batch, "extract_object", fake_extract)
+  monkeypatch.setattr(batch, "insert_extractions", lambda session, rows: inserted.append([row["evidence_id"] for row in rows]))
+  monkeypatch.setattr(batch, "index_entities", lambda session, extractions: len(extractions))
+  monkeypatch.setattr(
+    batch, "record_signature", lambda session, evidence_id, text: {"duplicate_of": "ev-0"} if evidence_id == "ev-4" else None
+  )
+
+  result = batch.extract_batch(engagement_id="eng-1")
+
+  assert result["total"] == 5
+  assert result["extracted"] == 4
+  assert result["cached"] == 1
+  assert result["items"]["ev-3"]["error"] == "download_failed"
+  assert result["items"]["ev-4"]["duplicate_of"] == "ev-0"
+  assert sorted(evidence_id for rows in inserted for evidence_id in rows) == ["ev-0", "ev-1", "ev-2", "ev-4"]
+  assert all(len(rows) <= 2 for rows in inserted)
+  # One commit per flush plus one for flagging the failed download.
+  assert session.commits == len(inserted) + 1
+  failed = [params for statement, params in session.statements if "status = 'failed'" in statement]
+  assert failed == [{"ids": ["ev-3"]}]
+
+
+def test_extract_batch_extracts_identical_content_once(monkeypatch) -> None:
+  records = [{"id": f"ev-{index}"} for index in range(4)]
+  extracted: list[str] = []
+  inserted: list[dict] = []
+
+  def fake_extract(session, record, evidence_object, content_hash):
+    extracted.append(record["id"])
+    payload = {"evidence_id": record["id"], "sections": []}
+    return {
+      "evidence_id": record["id"],
+      "content_sha256": content_hash,
+      "payload": payload,
+      "search_text": "",
+      "confidence": 0.9,
+      "chars": 0,
+      "cached": False,
+    }
+
+  session = FakeSession()
+  monkeypatch.setattr(batch.Config, "BATCH_INSERT_SIZE", 10)
+  monkeypatch.setattr(batch.Config, "BATCH_EXTRACT_WORKERS", 2)
+  monkeypatch.setattr(batch, "_load_records", lambda ids, engagement: records)
+  monkeypatch.setattr(batch, "s3_client", lambda: object())
+  monkeypatch.setattr(batch, "SessionLocal", lambda: nullcontext(session))
+  monkeypatch.setattr(batch, "open_evidence", lambda s3, record: FakeObject(record["id"], "same"))
+  monkeypatch.setattr(batch, "extract_object", fake_extract)
+  monkeypatch.setattr(batch, "insert_extractions", lambda session, rows: inserted.extend(rows))
+  monkeypatch.setattr(batch, "index_entities", lambda session, extractions: 0)
+  monkeypatch.setattr(batch, "record_signature", lambda session, evidence_id, text: None)
+
+  result = batch.extract_batch(engagement_id="eng-1")
+
+  assert len(extracted) == 1
+  assert result["extracted"] == 4
+  assert result["cached"] == 3
+  assert sorted(row["evidence_id"] for row in inserted) == [f"ev-{index}" for index in range(4)]
+  assert all(row["payload"]["evidence_id"] == row["evidence_id"] for row in inserted)
@@ -1,3 +1,6 @@
+import json
+from types import SimpleNamespace
+
 from worker.compare import _contains_any, _missing_all
 
 
@@ -7,7 +10,336 @@ def test_compare_helpers() -> None:
   assert _missing_all(text, ["Policy", "سياسة"])
 
 
+def test_compare_helpers_match_arabic_spelling_variants() -> None:
+  text = "تمت المُوافَقة على الفاتورة من إدارة المشتريات"
+  assert _contains_any(text, ["موافقه", "ادارة المشتريات"]) == ["موافقه", "ادارة المشتريات"]
+  assert _missing_all(text, ["أمر شراء", "الفاتوره"]) == ["أمر شراء"]
+
+
 def test_compare_helpers_no_hits() -> None:
   text = "نص لا يحتوي على الكلمات المطلوبة."
   assert _contains_any(text, ["approve", "موافقة"]) == []
   assert set(_missing_all(text, ["PO", "أمر شراء"])) == {"PO", "أمر شراء"}
+
+
+def test_compiled_scenario_decides_checks_from_one_scan() -> None:
+  from worker.compare import CompiledScenario
+  from worker.normalize import normalize_search_text
+
+  scenario = CompiledScenario(
+    [
+      {"id": "C1", "any": ["Approval", "موافقة"], "severity": "high"},
+      {"id": "C2", "all": ["PO", "سياسة"]},
+      {"id": "C3", "any": ["approve"]},
+    ]
+  )
+  index = scenario.index(normalize_search_text("يتطلب أمر شراء PO الموافقة من المدير. APPROVAL attached."))
+
+  outcomes = [check.evaluate(index) for check in scenario.checks]
+  assert [(outcome["matched_any"], outcome["missing_all"], outcome["triggered"]) for outcome in outcomes] == [
+    (["Approval", "موافقة"], [], True),
+    ([], ["سياسة"], True),
+    ([], [], False),
+  ]
+  assert scenario.checks[0].severity == "high"
+
+
+class FakeResult:
+  def __init__(self, row) -> None:
+    self.row = row
+
+  def mappings(self) -> "FakeResult":
+    return self
+
+  def first(self):
+    return self.row
+
+  def __iter__(self):
+    return iter(self.row)
+
+
+class ScenarioSession:
+  def __init__(self) -> None:
+    self.rules = {"checks": [{"id": "C1", "any": ["PO"]}]}
+    self.rules_hash = "v1"
+    self.rule_loads = 0
+
+  def execute(self, statement, params):
+    if "md5" in str(statement):
+      return FakeResult({"name": "Procurement", "rules_hash": self.rules_hash})
+    self.rule_loads += 1
+    return FakeResult({"rules": self.rules})
+
+
+def test_load_scenario_compiles_once_per_rules_version(monkeypatch) -> None:
+  from worker import compare
+
+  monkeypatch.setattr(compare, "_scenario_cache", compare.ScenarioCache(4))
+  monkeypatch.setattr(compare, "incr", lambda name, amount=1: None)
+  session = ScenarioSession()
+
+  name, first = compare.load_scenario(session, "sc-1")
+  _, second = compare.load_scenario(session, "sc-1")
+  assert name == "Procurement"
+  assert first is second
+  assert session.rule_loads == 1
+
+  session.rules = {"checks": [{"id": "C1", "any": ["invoice"]}]}
+  session.rules_hash = "v2"
+  _, updated = compare.load_scenario(session, "sc-1")
+  assert session.rule_loads == 2
+  assert updated.automaton.keywords == ["invoice"]
+
+
+class ScenarioListSession:
+  def __init__(self, rules: dict) -> None:
+    self.rules = rules
+    self.rule_loads = 0
+
+  def execute(self, statement, params):
+    if "md5" in str(statement):
+      assert params["limit"] == 4
+      return FakeResult([{"id": scenario_id, "rules_hash": "v1"} for scenario_id in self.rules])
+    self.rule_loads += 1
+    return FakeResult([{"id": scenario_id, "rules": self.rules[scenario_id]} for scenario_id in params["ids"]])
+
+
+def test_warm_scenarios_skips_invalid_rules_and_cached_ones(monkeypatch) -> None:
+  from worker import compare
+
+  monkeypatch.setattr(compare, "_scenario_cache", compare.ScenarioCache(4))
+  monkeypatch.setattr(compare.Config, "SCENARIO_CACHE_SIZE", 4)
+  session = ScenarioListSession(
+    {"sc-1": {"checks": [{"id": "C1", "any": ["PO"]}]}, "sc-bad": {"checks": [{"id": "C1", "regex": ["("]}]}}
+  )
+
+  assert compare.warm_scenarios(session) == 1
+  assert compare._scenario_cache.get("sc-1", "v1") is not None
+  assert compare._scenario_cache.get("sc-bad", "v1") is None
+
+  # A refresh only fetches rules for what is not cached yet.
+  session.rules = {"sc-1": session.rules["sc-1"]}
+  assert compare.warm_scenarios(session) == 0
+  assert session.rule_loads == 1
+
+
+def test_warmed_scenarios_hit_the_cache_in_forked_jobs(monkeypatch) -> None:
+  import multiprocessing
+
+  from worker import compare
+
+  monkeypatch.setattr(compare, "_scenario_cache", compare.ScenarioCache(4))
+  monkeypatch.setattr(compare.Config, "SCENARIO_CACHE_SIZE", 4)
+  monkeypatch.setattr(compare, "incr", lambda name, amount=1: None)
+  assert compare.warm_scenarios(ScenarioListSession({"sc-1": {"checks": [{"id": "C1", "any": ["PO"]}]}})) == 1
+
+  def job(results) -> None:
+    session = ScenarioSession()
+    compare.load_scenario(session, "sc-1")
+    results.put(session.rule_loads)
+
+  # Like RQ's default worker: each job runs in a fresh fork of the warmed parent.
+  context = multiprocessing.get_context("fork")
+  results = context.Queue()
+  for _ in range(2):
+    process = context.Process(target=job, args=(results,))
+    process.start()
+    process.join()
+  assert [results.get(timeout=5), results.get(timeout=5)] == [0, 0]
+
+
+class MatrixSession:
+  def __init__(self, payloads, duplicates=None) -> None:
+    self.payloads = payloads
+    self.duplicates = duplicates or {}
+    self.inserted: list = []
+    self.recorded: list = []
+    self.completed: list = []
+    self.commits = 0
+
+  def execute(self, statement, params):
+    sql = str(statement)
+    if "DISTINCT ON" in sql:
+      return FakeResult(
+        [
+          {
+            "evidence_id": evidence_id,
+            "json_payload": self.payloads[evidence_id],
+            "extraction_key": f"{evidence_id}-v1",
+            "duplicate_of": self.duplicates.get(evidence_id),
+          }
+          for evidence_id in params["ids"]
+          if evidence_id in self.payloads
+        ]
+      )
+    if "FROM compare_runs" in sql:
+      return FakeResult(self.completed)
+    if "INSERT INTO compare_runs" in sql:
+      self.recorded.append(params)
+    return FakeResult(None)
+
+  def commit(self) -> None:
+    self.commits += 1
+
+  def rollback(self) -> None:
+    pass
+
+
+def test_compare_matrix_scans_each_extraction_once(monkeypatch) -> None:
+  from worker import compare
+
+  scenarios = {
+    "sc-po": compare.CompiledScenario([{"id": "PO", "any": ["أمر شراء"]}]),
+    "sc-policy": compare.CompiledScenario([{"id": "POL", "all": ["سياسة"]}, {"id": "APP", "any": ["approval"]}]),
+  }
+  monkeypatch.setattr(compare, "load_scenario", lambda session, scenario_id: (scenario_id, scenarios[scenario_id]))
+  monkeypatch.setattr(compare, "upsert_findings", lambda session, rows: session.inserted.append(list(rows)))
+  session = MatrixSession(
+    {
+      "ev-1": {"sections": [{"text": "أمر شراء مع Approval"}]},
+      "ev-2": {"sections": [{"text": "سياسة الشراء"}]},
+    }
+  )
+
+  result = compare.compare_matrix(session, ["ev-1", "ev-2", "ev-3"], ["sc-po", "sc-policy"])
+
+  assert result["created"] == 3
+  assert session.commits == 1
+  assert len(session.inserted) == 1
+  assert sorted((row["evidence_id"], row["check_id"]) for row in session.inserted[0]) == [
+    ("ev-1", "APP"),
+    ("ev-1", "PO"),
+    ("ev-1", "POL"),
+  ]
+  assert result["results"]["ev-2:sc-po"] == {"ok": True, "created": 0, "skipped": False, "scenario": "sc-po"}
+  assert result["results"]["ev-3:sc-policy"]["error"] == "no_extraction"
+  assert len(session.recorded[0]["evidence_ids"]) == 4
+
+  assert session.recorded[0]["rules_hashes"][0] == f"@engine-{compare.COMPARE_ENGINE_VERSION}"
+
+  # A second run at the same extraction, rules and engine version only re-evaluates what changed.
+  current = f"@engine-{compare.COMPARE_ENGINE_VERSION}"
+  session.completed = [
+    {"evidence_id": "ev-1", "scenario_id": "sc-po", "extraction_key": "ev-1-v1", "rules_hash": current},
+    {"evidence_id": "ev-1", "scenario_id": "sc-policy", "extraction_key": "ev-1-v0", "rules_hash": current},
+  ]
+  session.inserted.clear()
+  rerun = compare.compare_matrix(session, ["ev-1"], ["sc-po", "sc-policy"])
+
+  assert rerun["results"]["ev-1:sc-po"]["skipped"] is True
+  assert sorted(row["check_id"] for row in session.inserted[0]) == ["APP", "POL"]
+
+  # Runs recorded by an older compare engine are redone even when nothing else changed.
+  session.completed = [{"evidence_id": "ev-1", "scenario_id": "sc-po", "extraction_key": "ev-1-v1", "rules_hash": ""}]
+  session.inserted.clear()
+  rerun = compare.compare_matrix(session, ["ev-1"], ["sc-po"])
+
+  assert rerun["results"]["ev-1:sc-po"]["skipped"] is False
+
+
+def test_compare_matrix_skips_near_duplicates_only_when_enabled(monkeypatch) -> None:
+  from worker import compare
+
+  scenario = compare.CompiledScenario([{"id": "PO", "any": ["أمر شراء"]}])
+  monkeypatch.setattr(compare, "load_scenario", lambda session, scenario_id: ("PO", scenario))
+  monkeypatch.setattr(compare, "upsert_findings", lambda session, rows: session.inserted.append(list(rows)))
+  payloads = {"ev-1": {"sections": [{"text": "أمر شراء"}]}, "ev-2": {"sections": [{"text": "أمر شراء"}]}}
+
+  # By default near-duplicates are only linked and still compared.
+  session = MatrixSession(payloads, duplicates={"ev-2": "ev-1"})
+  result = compare.compare_matrix(session, ["ev-1", "ev-2"], ["sc-po"])
+  assert "duplicate_of" not in result["results"]["ev-2:sc-po"]
+  assert sorted(row["evidence_id"] for row in session.inserted[0]) == ["ev-1", "ev-2"]
+
+  monkeypatch.setattr(compare.Config, "SKIP_NEAR_DUPLICATE_COMPARES", True)
+  session = MatrixSession(payloads, duplicates={"ev-2": "ev-1"})
+  result = compare.compare_matrix(session, ["ev-1", "ev-2"], ["sc-po"])
+
+  assert result["results"]["ev-2:sc-po"]["duplicate_of"] == "ev-1"
+  assert [row["evidence_id"] for row in session.inserted[0]] == ["ev-1"]
+
+
+class FakeCopy:
+  def __init__(self, rows: list) -> None:
+    self.rows = rows
+
+  def __enter__(self) -> "FakeCopy":
+    return self
+
+  def __exit__(self, *exc_info) -> None:
+    pass
+
+  def write_row(self, row) -> None:
+    self.rows.append(row)
+
+
+class FakeCursor:
+  def __init__(self, copied: list) -> None:
+    self.copied = copied
+
+  def __enter__(self) -> "FakeCursor":
+    return self
+
+  def __exit__(self, *exc_info) -> None:
+    pass
+
+  def copy(self, statement: str) -> FakeCopy:
+    assert statement.startswith("COPY findings_stage(")
+    return FakeCopy(self.copied)
+
+
+class BulkSession:
+  def __init__(self) -> None:
+    self.statements: list = []
+    self.copied: list = []
+
+  def execute(self, statement, params=None):
+    self.statements.append((str(statement), params))
+
+  def connection(self) -> SimpleNamespace:
+    driver_connection = SimpleNamespace(cursor=lambda: FakeCursor(self.copied))
+    return SimpleNamespace(connection=SimpleNamespace(driver_connection=driver_connection))
+
+
+def test_upsert_findings_uses_one_statement_or_copy(monkeypatch) -> None:
+  from worker import compare
+
+  rows = [
+    {"evidence_id": "ev-1", "scenario_id": "sc-1", "check_id": f"C{index}", "title": "t", "severity": "low", "details": "{}"}
+    for index in range(5)
+  ]
+  monkeypatch.setattr(compare.Config, "FINDINGS_COPY_MIN_ROWS", 10)
+  session = BulkSession()
+  compare.upsert_findings(session, rows)
+  assert len(session.statements) == 1
+  statement, params = session.statements[0]
+  assert statement.count("CAST(:details_") == 5
+  assert "ON CONFLICT (evidence_id, scenario_id, check_id) DO UPDATE" in statement
+  assert params["check_id_4"] == "C4"
+
+  monkeypatch.setattr(compare.Config, "FINDINGS_COPY_MIN_ROWS", 5)
+  session = BulkSession()
+  compare.upsert_findings(session, rows)
+  assert [statement.split()[0] for statement, _ in session.statements] == ["CREATE", "INSERT", "TRUNCATE"]
+  assert "FROM findings_stage ON CONFLICT" in session.statements[1][0]
+  assert [row[2] for row in session.copied] == ["C0", "C1", "C2", "C3", "C4"]
+
+
+def test_finding_rows_point_at_the_triggering_page() -> None:
+  from worker.compare import CompiledScenario, finding_rows
+  from worker.normalize import search_text, to_paged_json
+
+  page_three = "تمت المُوافَقة من المدير " + "ـ" * 200 + " ثم الموافقة النهائية"
+  payload = to_paged_json("ev-1", ["مقدمة التقرير", "تفاصيل الدفع", page_three], "pdf")
+  scenario = CompiledScenario([{"id": "APP", "any": ["موافقة"]}, {"id": "POL", "all": ["سياسة"]}])
+
+  rows = finding_rows("ev-1", "sc-1", scenario, payload, scenario.index(search_text(payload), payload))
+  approval, policy = (json.loads(row["details"]) for row in rows)
+
+  assert approval["sections"] == [{"section": 2, "title": "Page 3", "page": 3}]
+  assert approval["match_count"] == 2
+  first, second = approval["matches"]
+  assert (first["page"], page_three[first["start"]:first["end"]]) == (3, "مُوافَقة")
+  assert page_three[second["start"]:second["end"]] == "موافقة"
+  assert len(second["context"]) < 200 and "النهائية" in second["context"]
+  assert policy["sections"] == [] and policy["matches"] == []
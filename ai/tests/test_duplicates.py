@@ -0,0 +1,80 @@
+from worker import duplicates
+from worker.normalize import normalize_search_text
+
+_INVOICE = normalize_search_text(
+  "فاتورة ضريبية رقم 4471 المورد شركة الخليج للتوريدات التاريخ 2025-03-14 "
+  "البند الأول أجهزة حاسب آلي عدد 12 بسعر 3,250 ر.ق الإجمالي 39,000 ر.ق "
+  "البند الثاني طابعات ليزر عدد 4 بسعر 1,100 ر.ق الإجمالي 4,400 ر.ق "
+  "المجموع قبل الضريبة 43,400 ر.ق شروط الدفع خلال ثلاثين يوما من تاريخ الاستلام"
+)
+_RESCAN = _INVOICE.replace("4471", "447l").replace("ثلاثين", "ثلاتين")
+_OTHER = normalize_search_text(
+  "محضر اجتماع لجنة المشتريات لمناقشة عروض الصيانة السنوية للمباني والمرافق "
+  "وقررت اللجنة ترسية العقد على العرض الأقل سعرا بعد استيفاء الشروط الفنية المطلوبة كافة"
+)
+
+
+def test_minhash_estimates_similarity() -> None:
+  invoice, rescan, other = duplicates.minhash(_INVOICE), duplicates.minhash(_RESCAN), duplicates.minhash(_OTHER)
+
+  assert duplicates.similarity(invoice, rescan[None, :])[0] > 0.85
+  assert duplicates.similarity(invoice, other[None, :])[0] < 0.2
+  assert duplicates.minhash("قصير") is None
+
+
+class FakeResult:
+  def __init__(self, rows) -> None:
+    self.rows = rows
+
+  def mappings(self) -> "FakeResult":
+    return self
+
+  def scalar(self):
+    return self.rows
+
+  def __iter__(self):
+    return iter(self.rows)
+
+
+class SignatureSession:
+  def __init__(self, stored) -> None:
+    self.stored = stored
+    self.buckets: list = []
+    self.linked: list = []
+
+  def execute(self, statement, params=None):
+    sql = str(statement)
+    if "SELECT engagement_id" in sql:
+      return FakeResult("eng-1")
+    if "FROM unnest" in sql:
+      return FakeResult(self.stored)
+    if "INSERT INTO evidence_lsh_buckets" in sql:
+      self.buckets.extend(params)
+    if "INSERT INTO evidence_duplicates" in sql:
+      self.linked.append(params)
+    return FakeResult(None)
+
+
+def test_record_signature_links_closest_original(monkeypatch) -> None:
+  monkeypatch.setattr(duplicates, "incr", lambda name, amount=1: None)
+  session = SignatureSession(
+    [
+      {"evidence_id": "ev-other", "signature": duplicates.minhash(_OTHER).tobytes(), "original_id": "ev-other"},
+      {"evidence_id": "ev-copy", "signature": duplicates.minhash(_INVOICE).tobytes(), "original_id": "ev-first"},
+    ]
+  )
+
+  result = duplicates.record_signature(session, "ev-new", _RESCAN)
+
+  assert result is not None and result["duplicate_of"] == "ev-first"
+  assert session.linked[0]["original_id"] == "ev-first"
+  assert len(session.buckets) == duplicates.Config.LSH_BANDS
+
+
+def test_near_copies_share_a_band() -> None:
+  invoice = duplicates.band_buckets(duplicates.minhash(_INVOICE))
+  rescan = duplicates.band_buckets(duplicates.minhash(_RESCAN))
+  other = duplicates.band_buckets(duplicates.minhash(_OTHER))
+
+  assert any(a == b for a, b in zip(invoice, rescan))
+  assert not any(a == b for a, b in zip(invoice, other))
@@ -1,3 +1,4 @@
+from worker import entities
 from worker.entities import extract_entities
 
 
@@ -14,3 +15,58 @@ def test_entities_arabic_text() -> None:
     amount.get("value") and float(amount["value"]) >= 5000 for amount in entities["amounts"]
   )
   assert "المشتريات" in entities["departments"]
+
+
+def test_spacy_model_loads_lazily_once(monkeypatch) -> None:
+  loads: list[str] = []
+
+  class FakeNlp:
+    pipe_names = ["ner"]
+
+    def pipe(self, texts, **kwargs):
+      return [type("Doc", (), {"ents": []})() for _ in texts]
+
+  class FakeSpacy:
+    @staticmethod
+    def load(name: str):
+      loads.append(name)
+      return FakeNlp()
+
+  monkeypatch.setattr(entities, "_nlp", None)
+  monkeypatch.setattr(entities, "_nlp_loaded", False)
+  monkeypatch.setattr(entities.importlib, "import_module", lambda name: FakeSpacy)
+
+  assert loads == []
+  entities.extract_entities("إدارة الخزينة")
+  entities.extract_entities("إدارة المخازن")
+  assert loads == [entities.Config.SPACY_MODEL]
+
+
+def test_ner_covers_text_past_200k_in_batches(monkeypatch) -> None:
+  seen: list[str] = []
+  calls: list[dict] = []
+
+  class FakeEnt:
+    label_ = "ORG"
+
+    def __init__(self, text: str) -> None:
+      self.text = text
+
+  class FakeNlp:
+    pipe_names = ["tok2vec", "tagger", "parser", "ner", "lemmatizer"]
+
+    def pipe(self, texts, **kwargs):
+      calls.append(kwargs)
+      for chunk in texts:
+        seen.append(chunk)
+        ents = [FakeEnt("هيئة الرقابة")] if "هيئة الرقابة" in chunk else []
+        yield type("Doc", (), {"ents": ents})()
+
+  monkeypatch.setattr(entities, "get_nlp", lambda: FakeNlp())
+  monkeypatch.setattr(entities.Config, "NER_CHUNK_CHARS", 1000)
+  text = ("سطر عادي من المستند\n" * 15000) + "خطاب من هيئة الرقابة\n"
+
+  assert "هيئة الرقابة" in entities.extract_entities(text)["departments"]
+  assert "".join(seen) == text
+  assert max(len(chunk) for chunk in seen) <= 1000
+  assert calls[0]["disable"] == ["tagger", "parser", "lemmatizer"]
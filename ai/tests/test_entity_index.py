@@ -0,0 +1,99 @@
+from contextlib import nullcontext
+
+from worker import entity_index
+from worker.amounts import find_amounts
+from worker.entity_index import entity_rows, index_entities, iso_date
+
+
+def test_iso_date_reads_both_formats() -> None:
+  assert iso_date("2025-03-14") == "2025-03-14"
+  assert iso_date("4/3/2025") == "2025-03-04"
+  assert iso_date("31/2/2025") is None
+
+
+def test_entity_rows_drop_amounts_the_column_cannot_hold() -> None:
+  # A comma-separated list of item numbers parses as one huge grouped amount.
+  huge = find_amounts("Items 101,102,103,104,105,106")[0]["value"]
+  payload = {"entities": {"amounts": [{"value": huge}, {"value": float("inf")}, {"value": 9999999999999999.99}]}}
+
+  assert [row["value"] for row in entity_rows("ev-1", payload)["amounts"]] == []
+  payload["entities"]["amounts"].append({"value": 999999999999999.0})
+  assert [row["value"] for row in entity_rows("ev-1", payload)["amounts"]] == [999999999999999.0]
+
+
+def test_entity_rows_normalize_values() -> None:
+  payload = {
+    "sections": [{"page": 1, "text": ""}, {"page": 2, "text": ""}],
+    "entities": {
+      "dates": ["14/3/2025", "2025-03-14", "99/99/2025"],
+      "amounts": [{"value": 520000.456, "currency": "QAR", "start": 10, "end": 20, "section": 1}],
+      "departments": ["المشتريات", " "],
+    },
+  }
+
+  rows = entity_rows("ev-1", payload)
+
+  assert rows["amounts"] == [
+    {"evidence_id": "ev-1", "value": 520000.46, "currency": "QAR", "section": 1, "page": 2, "start_offset": 10}
+  ]
+  assert rows["dates"] == [{"evidence_id": "ev-1", "value": "2025-03-14"}]
+  assert rows["departments"] == [{"evidence_id": "ev-1", "name": "المشتريات"}]
+
+
+class RecordingSession:
+  def __init__(self) -> None:
+    self.statements: list = []
+
+  def execute(self, statement, params=None):
+    self.statements.append((str(statement), params))
+
+
+def test_index_entities_replaces_rows_in_bulk() -> None:
+  session = RecordingSession()
+  payload = {"entities": {"dates": ["2025-03-01"], "amounts": [{"value": 1.0}, {"value": 2.0}], "departments": []}}
+
+  written = index_entities(session, [("ev-1", payload), ("ev-2", payload)])
+
+  deletes = [params["ids"] for sql, params in session.statements if sql.startswith("DELETE")]
+  inserts = {sql.split("(")[0].split()[-1]: len(params) for sql, params in session.statements if "INSERT" in sql}
+  assert deletes == [["ev-1", "ev-2"]] * 3
+  assert inserts == {"evidence_amounts": 4, "evidence_dates": 2}
+  assert written == 6
+
+
+class PagingSession:
+  def __init__(self, evidence_ids: list) -> None:
+    self.evidence_ids = evidence_ids
+    self.pages: list = []
+    self.commits = 0
+
+  def execute(self, statement, params=None):
+    sql = str(statement)
+    if sql.startswith("SELECT id FROM evidence"):
+      page = [evidence_id for evidence_id in self.evidence_ids if evidence_id > params["after"]][: params["limit"]]
+      return FakeRows([{"id": evidence_id} for evidence_id in page])
+    self.pages.append(params["ids"])
+    return FakeRows([{"evidence_id": evidence_id, "json_payload": {"entities": {}}} for evidence_id in params["ids"]])
+
+  def commit(self) -> None:
+    self.commits += 1
+
+
+class FakeRows(list):
+  def mappings(self) -> "FakeRows":
+    return self
+
+
+def test_reindex_entities_pages_through_evidence(monkeypatch) -> None:
+  session = PagingSession([f"{index:08d}-0000-0000-0000-000000000000" for index in range(1, 6)])
+  indexed: list = []
+  monkeypatch.setattr(entity_index.Config, "BATCH_INSERT_SIZE", 2)
+  monkeypatch.setattr(entity_index, "SessionLocal", lambda: nullcontext(session))
+  monkeypatch.setattr(entity_index, "index_entities", lambda session, batch: indexed.append(len(batch)) or len(batch))
+
+  result = entity_index.reindex_entities()
+
+  assert [len(page) for page in session.pages] == [2, 2, 1]
+  assert indexed == [2, 2, 1]
+  assert session.commits == 3
+  assert result == {"ok": True, "evidence": 5, "rows": 5}
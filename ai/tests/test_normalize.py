@@ -0,0 +1,25 @@
+from worker.normalize import SECTION_BREAK, normalize_search_text, search_text
+
+
+def test_normalize_search_text_folds_variants() -> None:
+  assert normalize_search_text("إِدارةُ") == normalize_search_text("ادارة") == "اداره"
+  assert normalize_search_text("آمِن أمن") == "امن امن"
+  assert normalize_search_text("مستشفى") == "مستشفي"
+  assert normalize_search_text("QAR ١٬٢٣٤٫٥٠") == "qar 1,234.50"
+  assert normalize_search_text("Straße PO") == "strasse po"
+
+
+def test_search_text_joins_sections() -> None:
+  payload = {"sections": [{"text": "أولاً\fثانياً"}, {"text": "APPROVAL"}]}
+  assert search_text(payload).split(SECTION_BREAK) == ["اولا\nثانيا", "approval"]
+
+
+def test_entities_cover_every_section(monkeypatch) -> None:
+  from worker import entities
+  from worker.normalize import enrich_with_entities, to_paged_json
+
+  monkeypatch.setattr(entities, "get_nlp", lambda: None)
+  payload = enrich_with_entities(to_paged_json("ev-1", ["صفحة أولى", "المبلغ 5,000 ر.ق بتاريخ 2025-01-15"], "pdf"))
+
+  assert payload["entities"]["dates"] == ["2025-01-15"]
+  assert [(amount["value"], amount["section"]) for amount in payload["entities"]["amounts"]] == [(5000.0, 1)]
@@ -0,0 +1,115 @@
+import fitz
+
+from worker import ocr
+from worker.ocr import extract_pdf_text, extract_pdf_text_parallel, pdf_page_count
+
+
+def _make_pdf(path: str, pages: int) -> None:
+  doc = fitz.open()
+  for number in range(pages):
+    page = doc.new_page()
+    page.insert_text((72, 72), f"Invoice page {number} total QAR {number * 100}")
+  doc.save(path)
+  doc.close()
+
+
+def test_parallel_extraction_matches_serial(tmp_path) -> None:
+  pdf_path = str(tmp_path / "statement.pdf")
+  _make_pdf(pdf_path, 7)
+
+  assert pdf_page_count(pdf_path) == 7
+  serial = extract_pdf_text(pdf_path)
+  parallel = extract_pdf_text_parallel(pdf_path, workers=3, pages_per_chunk=2)
+  assert parallel == serial
+  assert parallel.index("page 0") < parallel.index("page 6")
+
+
+def test_parallel_extraction_spools_buffers(tmp_path, monkeypatch) -> None:
+  pdf_path = tmp_path / "ledger.pdf"
+  _make_pdf(str(pdf_path), 7)
+  monkeypatch.setattr(ocr.Config, "TMP_DIR", str(tmp_path / "spool"))
+  opened: list[str] = []
+  monkeypatch.setattr(ocr, "_extract_pages_parallel", lambda path, *args: opened.append(path) or ["page"] * 7)
+
+  assert extract_pdf_text_parallel(pdf_path.read_bytes(), workers=3, pages_per_chunk=2) == "\n".join(["page"] * 7)
+  assert opened[0].startswith(str(tmp_path / "spool"))
+
+
+def test_analyze_pdf_ocrs_only_image_pages(tmp_path, monkeypatch) -> None:
+  pdf_path = str(tmp_path / "pack.pdf")
+  doc = fitz.open()
+  doc.new_page().insert_text((72, 72), "Cover letter")
+  doc.new_page()
+  doc.new_page().insert_text((72, 72), "Closing note")
+  doc.save(pdf_path)
+  doc.close()
+
+  requested: list[list[int]] = []
+
+  def fake_ocr(path: str, page_numbers: list[int]) -> dict[int, tuple[str, float]]:
+    requested.append(page_numbers)
+    return {number: (f"scanned invoice {number}", 0.90) for number in page_numbers}
+
+  monkeypatch.setattr(ocr, "ocr_pdf_pages", fake_ocr)
+  text, confidence = ocr.analyze_pdf(pdf_path)
+
+  assert requested == [[1]]
+  assert text.index("Cover letter") < text.index("scanned invoice 1") < text.index("Closing note")
+  assert 0.75 < confidence < 0.90
+
+
+def test_page_spec_collapses_ranges() -> None:
+  assert ocr._page_spec([0, 1, 2, 6, 8, 9]) == "1-3,7,9-10"
+
+
+def test_raster_ocr_rebuilds_lines_and_confidence(tmp_path, monkeypatch) -> None:
+  pdf_path = str(tmp_path / "scan.pdf")
+  doc = fitz.open()
+  doc.new_page()
+  doc.save(pdf_path)
+  doc.close()
+
+  def fake_image_to_data(img, lang, output_type):
+    assert img.mode == "L"
+    return {
+      "text": ["", "فاتورة", "رقم", "QAR", "5000"],
+      "conf": [-1, 90, 80, 70, 60],
+      "block_num": [1, 1, 1, 1, 1],
+      "par_num": [1, 1, 1, 1, 1],
+      "line_num": [0, 1, 1, 2, 2],
+    }
+
+  monkeypatch.setattr(ocr, "engine_pool", lambda: None)
+  monkeypatch.setattr(ocr.pytesseract, "image_to_data", fake_image_to_data)
+  monkeypatch.setattr(ocr.Config, "OCR_ENGINE", "raster")
+  results = ocr.ocr_pdf_pages(pdf_path, [0], dpi=72)
+
+  assert results == {0: ("فاتورة رقم\nQAR 5000", 0.75)}
+
+
+def test_raster_ocr_survives_tesseract_errors(tmp_path, monkeypatch) -> None:
+  pdf_path = str(tmp_path / "scan.pdf")
+  doc = fitz.open()
+  doc.new_page()
+  doc.new_page()
+  doc.save(pdf_path)
+  doc.close()
+
+  def failing_image_to_data(img, lang, output_type):
+    raise ocr.pytesseract.TesseractError(1, "Error during processing.")
+
+  monkeypatch.setattr(ocr, "engine_pool", lambda: None)
+  monkeypatch.setattr(ocr.pytesseract, "image_to_data", failing_image_to_data)
+  monkeypatch.setattr(ocr.Config, "OCR_ENGINE", "raster")
+
+  assert ocr.ocr_pdf_pages(pdf_path, [0, 1], dpi=72) == {0: ("", 0.0), 1: ("", 0.0)}
+
+
+def test_extraction_accepts_buffers(tmp_path) -> None:
+  pdf_path = tmp_path / "receipt.pdf"
+  _make_pdf(str(pdf_path), 2)
+  blob = pdf_path.read_bytes()
+
+  assert pdf_page_count(blob) == 2
+  assert extract_pdf_text(blob) == extract_pdf_text(str(pdf_path))
+  assert ocr.analyze_pdf(blob)[0] == ocr.analyze_pdf(str(pdf_path))[0]
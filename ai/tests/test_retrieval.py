@@ -0,0 +1,43 @@
+from worker.retrieval import RegulationIndex, tokenize
+
+_CHUNKS = [
+  {"id": "c1", "section_ref": "1.1", "text": "يجب اعتماد أمر الشراء من المدير المالي قبل الصرف", "seq": 1},
+  {"id": "c2", "section_ref": "1.2", "text": "تحفظ السجلات المحاسبية لمدة عشر سنوات", "seq": 2},
+  {"id": "c3", "section_ref": "2.1", "text": "المناقصات العامة تطرح عند تجاوز القيمة الحد المعتمد", "seq": 3},
+]
+
+
+def test_tokenize_strips_articles_and_stopwords() -> None:
+  assert tokenize("في الإدارة والمشتريات of the Budget") == ["اداره", "مشتريات", "budget"]
+
+
+def test_top_chunks_ranks_best_section() -> None:
+  index = RegulationIndex.empty()
+  index.add_chunks(list(_CHUNKS))
+
+  matches = index.top_chunks(["صفحة غلاف", "تم اعتماد أمر شراء وصرف المبلغ", "السجلات"], top_k=2)
+
+  assert [(match["chunk_id"], match["section"]) for match in matches] == [("c1", 1), ("c2", 2)]
+  assert matches[0]["score"] > matches[1]["score"] > 0
+
+
+def test_incremental_add_matches_full_build() -> None:
+  full = RegulationIndex.empty()
+  full.add_chunks(list(_CHUNKS))
+  incremental = RegulationIndex.empty()
+  incremental.add_chunks(_CHUNKS[:1])
+  incremental.add_chunks(_CHUNKS[1:])
+
+  pages = ["المناقصات العامة والحد المعتمد", "أمر الشراء"]
+  assert incremental.max_seq == 3
+  assert incremental.top_chunks(pages, top_k=3) == full.top_chunks(pages, top_k=3)
+
+
+def test_index_round_trips_through_bytes() -> None:
+  index = RegulationIndex.empty()
+  index.add_chunks(list(_CHUNKS))
+
+  restored = RegulationIndex.from_bytes(index.to_bytes())
+
+  assert (restored.chunk_ids, restored.section_refs, restored.max_seq) == (["c1", "c2", "c3"], ["1.1", "1.2", "2.1"], 3)
+  assert restored.top_chunks(["السجلات المحاسبية"], top_k=1) == index.top_chunks(["السجلات المحاسبية"], top_k=1)
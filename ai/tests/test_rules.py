@@ -0,0 +1,78 @@
+import pytest
+
+from worker.normalize import SECTION_BREAK, normalize_search_text
+from worker.rules import CompiledScenario
+
+
+def _evaluate(check: dict, sections: list, amounts: list | None = None) -> dict:
+  scenario = CompiledScenario([check])
+  payload = {
+    "sections": [{"title": title, "text": text} for title, text in sections],
+    "entities": {"amounts": amounts or []},
+  }
+  search_text = SECTION_BREAK.join(normalize_search_text(text) for _, text in sections)
+  return scenario.checks[0].evaluate(scenario.index(search_text, payload))
+
+
+def test_regex_and_proximity_conditions() -> None:
+  sections = [("Full Text", "تمت موافقة المدير العام على أمر الشراء PO-123456")]
+
+  outcome = _evaluate({"id": "R", "regex": [r"PO-\d{6}"]}, sections)
+  assert outcome["matched_regex"] == [r"PO-\d{6}"] and outcome["triggered"]
+
+  assert _evaluate({"id": "N", "near": [{"terms": ["موافقه", "المدير"], "within": 1}]}, sections)["triggered"]
+  assert not _evaluate({"id": "N", "near": [{"terms": ["موافقة", "الشراء"], "within": 2}]}, sections)["triggered"]
+
+
+def test_section_scope_and_amount_threshold() -> None:
+  sections = [("Summary", "approval pending"), ("Payment Terms", "no sign-off")]
+  amounts = [
+    {"value": 75000.0, "currency": "QAR", "section": 1},
+    {"value": 90000.0, "currency": "QAR", "section": 0},
+    {"value": 900.0, "currency": "QAR", "section": 1},
+  ]
+
+  assert _evaluate({"id": "S", "any": ["approval"]}, sections)["triggered"]
+  assert not _evaluate({"id": "S", "any": ["approval"], "section": "Payment Terms"}, sections)["triggered"]
+
+  check = {"id": "A", "amount": {"min": 50000, "currency": "QAR"}, "all": ["approval"], "section": "payment terms"}
+  outcome = _evaluate({**check, "match": "all"}, sections, amounts)
+  assert outcome["amounts"] == [75000.0]
+  assert outcome["missing_all"] == ["approval"]
+  assert outcome["triggered"]
+  assert outcome["sections"] == [1]
+  assert not _evaluate({**check, "match": "all", "amount": {"min": 100000}}, sections, amounts)["triggered"]
+
+
+def test_scope_matches_whole_titles_and_pages() -> None:
+  scenario = CompiledScenario(
+    [{"id": "P", "all": ["signature"], "section": "Page 1"}, {"id": "Q", "any": ["invoice"], "page": [10]}]
+  )
+  payload = {"sections": [{"title": f"Page {number}", "page": number, "text": "invoice"} for number in (1, 10)]}
+  index = scenario.index(SECTION_BREAK.join(["invoice", "invoice"]), payload)
+  page_one, page_ten = (check.evaluate(index) for check in scenario.checks)
+  assert page_one["missing_all"] == ["signature"] and page_one["sections"] == []
+  assert page_ten["triggered"] and page_ten["sections"] == [1]
+
+
+def test_checks_scoped_to_absent_sections_raise_nothing() -> None:
+  sections = [("Full Text", "no signature here")]
+  assert not _evaluate({"id": "S", "all": ["approval"], "section": "Page 1"}, sections)["triggered"]
+  assert not _evaluate({"id": "S", "all": ["approval"], "page": 3}, sections)["triggered"]
+  with pytest.raises(ValueError, match="page"):
+    CompiledScenario([{"id": "S", "any": ["x"], "page": "one"}])
+
+
+def test_invalid_regex_is_rejected() -> None:
+  with pytest.raises(ValueError):
+    CompiledScenario([{"id": "BAD", "regex": ["(unclosed"]}])
+
+
+def test_check_ids_are_unique_within_a_scenario() -> None:
+  scenario = CompiledScenario([{"any": ["PO"]}, {"id": "C2", "any": ["invoice"]}, {"any": ["approval"]}])
+  assert [check.check_id for check in scenario.checks] == ["RULE-1", "C2", "RULE-3"]
+
+  scenario = CompiledScenario(
+    [{"id": "C1", "any": ["PO"]}, {"id": "C1", "any": ["invoice"]}, {"id": "C1#2"}, {"id": "C1", "any": ["x"]}]
+  )
+  assert [check.check_id for check in scenario.checks] == ["C1", "C1#2", "C1#2#2", "C1#3"]
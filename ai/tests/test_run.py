@@ -0,0 +1,42 @@
+from contextlib import nullcontext
+
+from sqlalchemy.exc import OperationalError
+
+from worker import run
+
+
+class FakeEngine:
+  def __init__(self) -> None:
+    self.disposed = 0
+
+  def dispose(self) -> None:
+    self.disposed += 1
+
+
+def test_preload_scenarios_drops_the_parent_connection(monkeypatch) -> None:
+  engine = FakeEngine()
+  monkeypatch.setattr(run, "engine", engine)
+  monkeypatch.setattr(run, "SessionLocal", lambda: nullcontext(None))
+  monkeypatch.setattr(run, "warm_scenarios", lambda session: 1)
+  run.preload_scenarios()
+
+  def database_down(session):
+    raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+  monkeypatch.setattr(run, "warm_scenarios", database_down)
+  run.preload_scenarios()
+
+  assert engine.disposed == 2
+
+
+def test_worker_refreshes_scenarios_at_most_once_per_interval(monkeypatch) -> None:
+  refreshes: list = []
+  monkeypatch.setattr(run, "preload_scenarios", lambda: refreshes.append(1))
+  monkeypatch.setattr(run.Worker, "execute_job", lambda self, job, queue: None)
+  monkeypatch.setattr(run.Config, "SCENARIO_REFRESH_SECONDS", 60)
+  worker = object.__new__(run.ScenarioWarmWorker)
+
+  for _ in range(3):
+    worker.execute_job(None, None)
+
+  assert len(refreshes) == 1
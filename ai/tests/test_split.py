@@ -0,0 +1,127 @@
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+from rq.job import JobStatus
+
+from worker import split
+
+
+class FakeJob:
+  def __init__(self, job_id: str, result) -> None:
+    self.id = job_id
+    self.result = result
+
+  def get_status(self) -> str:
+    return JobStatus.FINISHED
+
+  def return_value(self):
+    return self.result
+
+
+class FakeRedis:
+  def __init__(self) -> None:
+    self.hashes: dict[str, dict] = {}
+
+  def hset(self, key: str, field: str, value) -> None:
+    self.hashes.setdefault(key, {})[field] = value
+
+
+def test_merge_parts_assembles_pages_in_order(monkeypatch) -> None:
+  jobs = [
+    FakeJob("b", {"ok": True, "start": 2, "pages": ["page 2"], "confidences": [0.5]}),
+    FakeJob("a", {"ok": True, "start": 0, "pages": ["page 0", "page 1"], "confidences": [0.75, 0.75]}),
+  ]
+  stored: list[dict] = []
+  fake_redis = FakeRedis()
+
+  monkeypatch.setattr(split, "_connection", lambda: fake_redis)
+  monkeypatch.setattr(split.Job, "fetch_many", staticmethod(lambda ids, connection: jobs))
+  monkeypatch.setattr(split, "SessionLocal", lambda: nullcontext(None))
+  monkeypatch.setattr(split, "_load_record", lambda session, evidence_id: {"id": evidence_id})
+  monkeypatch.setattr(split, "store_row", lambda session, row: stored.append(row))
+
+  result = split.merge_parts("ev-1", ["b", "a"], "abc", "v1")
+
+  assert result["ok"] and result["parts"] == 2
+  sections = stored[0]["payload"]["sections"]
+  assert [(section["page"], section["text"]) for section in sections] == [(1, "page 0"), (2, "page 1"), (3, "page 2")]
+  assert stored[0]["confidence"] == round((0.75 + 0.75 + 0.5) / 3, 2)
+  assert fake_redis.hashes[split.progress_key("ev-1")]["status"] == "ready"
+
+
+class FakeSession:
+  def __init__(self) -> None:
+    self.statements: list[tuple[str, dict]] = []
+    self.commits = 0
+
+  def execute(self, statement, params=None) -> None:
+    self.statements.append((str(statement), params))
+
+  def commit(self) -> None:
+    self.commits += 1
+
+
+def test_merge_parts_reports_failed_part(monkeypatch) -> None:
+  fake_redis = FakeRedis()
+  session = FakeSession()
+  monkeypatch.setattr(split, "_connection", lambda: fake_redis)
+  monkeypatch.setattr(split, "SessionLocal", lambda: nullcontext(session))
+  monkeypatch.setattr(split.Job, "fetch_many", staticmethod(lambda ids, connection: [FakeJob("a", None)]))
+
+  result = split.merge_parts("ev-2", ["a"], "abc", "v1")
+
+  assert result == {"ok": False, "error": "part_failed", "job_id": "a"}
+  assert fake_redis.hashes[split.progress_key("ev-2")]["status"] == "failed"
+  assert session.statements == [("UPDATE evidence SET status = 'failed' WHERE id = :id", {"id": "ev-2"})]
+  assert session.commits == 1
+
+
+def test_merge_failure_callback_flags_evidence(monkeypatch) -> None:
+  fake_redis = FakeRedis()
+  session = FakeSession()
+  monkeypatch.setattr(split, "_connection", lambda: fake_redis)
+  monkeypatch.setattr(split, "SessionLocal", lambda: nullcontext(session))
+
+  split._merge_failed(SimpleNamespace(args=("ev-3", ["a"], "abc", "v1")), fake_redis, TimeoutError, TimeoutError(), None)
+
+  assert fake_redis.hashes[split.progress_key("ev-3")]["status"] == "failed"
+  assert session.statements[0][1] == {"id": "ev-3"}
+
+
+def test_merge_parts_reports_expired_part(monkeypatch) -> None:
+  fake_redis = FakeRedis()
+  session = FakeSession()
+  monkeypatch.setattr(split, "_connection", lambda: fake_redis)
+  monkeypatch.setattr(split, "SessionLocal", lambda: nullcontext(session))
+  jobs = [FakeJob("a", {"ok": True, "start": 0, "pages": ["page 0"], "confidences": [0.75]}), None]
+  monkeypatch.setattr(split.Job, "fetch_many", staticmethod(lambda ids, connection: jobs))
+
+  result = split.merge_parts("ev-4", ["a", "b"], "abc", "v1")
+
+  assert result == {"ok": False, "error": "part_expired", "job_id": "b"}
+  assert fake_redis.hashes[split.progress_key("ev-4")]["status"] == "failed"
+
+
+class FakeQueue:
+  def __init__(self) -> None:
+    self.enqueued: list = []
+
+  def enqueue(self, func, *args, **kwargs):
+    self.enqueued.append((func, kwargs))
+    return SimpleNamespace(id=f"job-{len(self.enqueued)}")
+
+
+def test_enqueue_parts_keeps_part_results_until_the_merge(monkeypatch) -> None:
+  queue = FakeQueue()
+  connection = SimpleNamespace(delete=lambda key: None, expire=lambda key, ttl: None, hset=lambda key, mapping: None)
+  monkeypatch.setattr(split, "_connection", lambda: connection)
+  monkeypatch.setattr(split, "Queue", lambda name, connection: queue)
+  monkeypatch.setattr(split, "Dependency", lambda jobs, allow_failure: jobs)
+  monkeypatch.setattr(split.Config, "SPLIT_PAGES_PER_PART", 50)
+
+  result = split.enqueue_parts("ev-5", 1000, "abc", "v1")
+
+  parts = [kwargs for func, kwargs in queue.enqueued if func == "worker.split.extract_part"]
+  assert result["parts"] == len(parts) == 20
+  # Far beyond RQ's 500 s default, so early parts outlive a long queue of later ones.
+  assert all(kwargs["result_ttl"] == kwargs["failure_ttl"] == split.PROGRESS_TTL_SECONDS for kwargs in parts)
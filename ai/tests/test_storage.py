@@ -0,0 +1,44 @@
+import io
+import mmap
+
+from worker import storage
+
+
+class FakeS3:
+  def __init__(self, blob: bytes) -> None:
+    self.blob = blob
+    self.calls: list[str] = []
+
+  def head_object(self, Bucket: str, Key: str) -> dict:
+    self.calls.append("head")
+    return {"ContentLength": len(self.blob)}
+
+  def get_object(self, Bucket: str, Key: str) -> dict:
+    self.calls.append("get")
+    return {"Body": io.BytesIO(self.blob)}
+
+  def download_fileobj(self, bucket: str, key: str, fileobj) -> None:
+    self.calls.append("download")
+    fileobj.write(self.blob)
+
+
+def test_small_objects_stay_in_memory() -> None:
+  s3 = FakeS3(b"%PDF-small")
+  with storage.read_object(s3, "b", "k", size=10, spoolable=True) as obj:
+    assert obj.path is None
+    assert obj.source == b"%PDF-small"
+  assert s3.calls == ["get"]
+
+
+def test_large_pdfs_are_spooled_and_mapped(tmp_path, monkeypatch) -> None:
+  monkeypatch.setattr(storage.Config, "TMP_DIR", str(tmp_path))
+  monkeypatch.setattr(storage.Config, "INMEMORY_MAX_BYTES", 4)
+  s3 = FakeS3(b"%PDF-large-body")
+  with storage.read_object(s3, "b", "k", spoolable=True) as obj:
+    assert isinstance(obj.buffer, mmap.mmap)
+    assert obj.source == obj.path
+    assert obj.buffer[:] == b"%PDF-large-body"
+    assert obj.sha256() == storage.EvidenceObject(b"%PDF-large-body").sha256()
+    spool_path = obj.path
+  assert s3.calls == ["head", "download"]
+  assert not (tmp_path / spool_path).exists()
@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from worker.tesseract_pool import TesseractPool
+
+
+class FakeApi:
+  def __init__(self, lang: str = "ara+eng") -> None:
+    self.lang = lang
+    self.ended = False
+
+  def GetInitLanguagesAsString(self) -> str:
+    return self.lang
+
+  def End(self) -> None:
+    self.ended = True
+
+
+def test_pool_reuses_engines_and_recycles_after_max_uses() -> None:
+  made: list[FakeApi] = []
+
+  def factory() -> FakeApi:
+    made.append(FakeApi())
+    return made[-1]
+
+  pool = TesseractPool(factory, size=1, max_uses=2, lang="ara+eng")
+  pool.warm()
+  for _ in range(2):
+    with pool.acquire() as api:
+      assert api is made[0]
+  with pool.acquire() as api:
+    assert api is made[1]
+  assert made[0].ended
+  assert pool.created == 1
+
+
+def test_pool_discards_engine_on_error_and_failed_health_check() -> None:
+  made: list[FakeApi] = []
+
+  def factory() -> FakeApi:
+    made.append(FakeApi())
+    return made[-1]
+
+  pool = TesseractPool(factory, size=2, max_uses=100, lang="ara+eng")
+  with pytest.raises(RuntimeError):
+    with pool.acquire():
+      raise RuntimeError("tesseract crashed")
+  assert made[0].ended
+
+  with pool.acquire() as api:
+    api.lang = "eng"
+  with pool.acquire() as api:
+    assert api is made[2]
+  assert made[1].ended
+
+
+def test_pool_is_bounded() -> None:
+  pool = TesseractPool(FakeApi, size=1, max_uses=100, lang="ara+eng")
+  acquired_second = threading.Event()
+
+  def second() -> None:
+    with pool.acquire():
+      acquired_second.set()
+
+  with pool.acquire():
+    worker = threading.Thread(target=second)
+    worker.start()
+    assert not acquired_second.wait(0.1)
+  worker.join(1)
+  assert acquired_second.is_set()
+  assert pool.created == 1
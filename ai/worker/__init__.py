@@ -1,5 +1,5 @@
 """AI worker package exposing RQ tasks."""
 
-from . import compare_task, tasks
+from . import batch, compare_task, split, tasks
 
-__all__ = ["tasks", "compare_task"]
+__all__ = ["tasks", "batch", "split", "compare_task"]
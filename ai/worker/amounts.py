@@ -0,0 +1,165 @@
+"""Linear-time amount parsing.
+
+Candidate numbers are found by two regex scans: digit/separator tokens that
+carry a separator or are followed by a currency marker, and tokens written after
+a QAR / ر.ق / ريال marker. Token quantifiers are possessive, so a token that
+fails is never re-split into shorter ones, and each position is tried once.
+Each candidate is then validated in Python: thousands groups, a decimal part,
+Arabic-Indic digits and the word boundary in front of it. A token only counts as
+an amount when it carries a currency marker or is formatted like money (grouped
+thousands or a two-digit fraction); bare integers such as invoice numbers never
+leave the regex engine.
+"""
+
+import re
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+_DIGITS = "0-9\u0660-\u0669\u06f0-\u06f9"
+_GROUP_SEPARATORS = ",\u066c\u00a0\u202f"
+_DECIMAL_SEPARATORS = ".\u066b"
+_SEPARATORS = _GROUP_SEPARATORS + _DECIMAL_SEPARATORS
+_TO_ASCII = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹\u066c\u066b", "01234567890123456789,.")
+
+_MARKER_PATTERN = r"(?:[Qq][Aa]?[Rr]|ر\.ق\.?|ريال)(?:\s*قطري)?"
+_SUFFIX_PATTERN = r"\s*(?:(?i:QAR|QR)\b|ر\.ق|ريال)"
+_TOKEN_PATTERN = rf"[{_DIGITS}]++(?:[{_SEPARATORS}][{_DIGITS}]++)*+"
+# The single-class lookbehind keeps a failed token from being retried at each of its digits.
+_NUMBER_PATTERN = rf"(?<![{_DIGITS}])[{_DIGITS}]++(?:(?:[{_SEPARATORS}][{_DIGITS}]++)++|(?={_SUFFIX_PATTERN}))"
+_MARKED_PATTERN = rf"{_MARKER_PATTERN}\s*{_TOKEN_PATTERN}"
+
+# For scanners that fold amounts into a larger alternation; a match may begin
+# with its prefix marker, which `amount_at` skips.
+AMOUNT_TOKEN_PATTERN = f"{_NUMBER_PATTERN}|{_MARKED_PATTERN}"
+
+# The scans capture a following suffix marker in a lookahead, so `match.lastindex`
+# tells whether the token is marked without a second regex call per candidate.
+_NUMBER_RX = re.compile(
+  rf"(?<![{_DIGITS}])[{_DIGITS}]++"
+  rf"(?:(?:[{_SEPARATORS}][{_DIGITS}]++)++(?=({_SUFFIX_PATTERN})?)|(?=({_SUFFIX_PATTERN})))"
+)
+_MARKED_RX = re.compile(rf"{_MARKER_PATTERN}\s*({_TOKEN_PATTERN})")
+_SUFFIX_RX = re.compile(_SUFFIX_PATTERN)
+_SPLIT_RX = re.compile(f"([{_SEPARATORS}])")
+_PLAIN_RX = re.compile(r"(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d{1,2}))?")
+_PREFIX_WINDOW = 16
+_PREFIX_RX = re.compile(rf"(?<!\w){_MARKER_PATTERN}\s*\Z")
+# Last characters of the prefix markers, to rule most tokens out without a regex search.
+_PREFIX_ENDINGS = frozenset("Rrقلي.")
+# First characters of the prefix markers; text without any skips the marker scan.
+_MARKER_STARTS = ("Q", "q", "ر")
+# Characters that glue a token onto the word or number before it; the space-like
+# group separators do not.
+_JOINING = frozenset("_,.\u066b\u066c")
+# Longer than any real amount (`1,234,567,890,123,456.78`); longer runs are ledger
+# columns or lists of numbers, and parsing them would only yield huge values.
+_MAX_TOKEN_CHARS = 32
+
+
+def parse_number(token: str) -> Optional[Tuple[float, bool]]:
+  """Parse a digit/separator token into `(value, money_formatted)`, or None when malformed."""
+  token = token if token.isascii() else token.translate(_TO_ASCII)
+  plain = _PLAIN_RX.fullmatch(token)
+  if plain is not None:
+    # Fast path for the common `1,234,567.89` shape.
+    integer, fraction = plain.groups()
+    value = float(integer.replace(",", "") + ("." + fraction if fraction else ""))
+    return value, "," in integer or (fraction is not None and len(fraction) == 2)
+
+  pieces = _SPLIT_RX.split(token)
+  parts, separators = pieces[0::2], pieces[1::2]
+  if not separators:
+    return (float(parts[0]), False) if parts[0].isdecimal() else None
+
+  fraction = ""
+  last = separators[-1]
+  if last in _DECIMAL_SEPARATORS or (last == "," and len(parts[-1]) <= 2):
+    fraction = parts.pop()
+    separators.pop()
+    if len(fraction) > 2 and separators:
+      return None
+
+  if separators:
+    group = separators[0]
+    if group == last and fraction:
+      return None
+    if any(separator != group for separator in separators):
+      return None
+    if len(parts[0]) > 3 or any(len(part) != 3 for part in parts[1:]):
+      return None
+
+  digits = "".join(parts)
+  if not digits.isdecimal() or (fraction and not fraction.isdecimal()):
+    return None
+  return float(digits + ("." + fraction if fraction else "")), bool(separators) or len(fraction) == 2
+
+
+def _has_prefix_marker(text: str, start: int) -> bool:
+  before = start - 1
+  while before >= 0 and text[before].isspace():
+    before -= 1
+  if before < 0 or text[before] not in _PREFIX_ENDINGS:
+    return False
+  # The lookbehind still sees the text before `pos`, so a marker cut off by the window is not mistaken for one.
+  return _PREFIX_RX.search(text, max(0, start - _PREFIX_WINDOW), start) is not None
+
+
+def _continues_word(text: str, start: int) -> bool:
+  return start > 0 and (text[start - 1].isalnum() or text[start - 1] in _JOINING)
+
+
+def _classify(text: str, start: int, end: int, prefixed: bool, suffixed: bool) -> Optional[Dict[str, Any]]:
+  if end - start > _MAX_TOKEN_CHARS:
+    return None
+  # A token that continues a word or number (`INV2024`, `x.5`) only counts when
+  # the word is a marker written flush against the digits, as in `QAR5,000`.
+  if not prefixed and _continues_word(text, start):
+    return None
+  token = text[start:end]
+  marked = prefixed or suffixed
+  if not marked and token.isdigit():
+    return None
+  parsed = parse_number(token)
+  if parsed is None:
+    return None
+  value, money_formatted = parsed
+  if not marked and not money_formatted:
+    return None
+  return {"value": value, "currency": "QAR" if marked else None, "start": start, "end": end}
+
+
+def amount_at(text: str, start: int, end: int) -> Optional[Dict[str, Any]]:
+  """Classify the number token `text[start:end]` as an amount, or None when it is not one.
+
+  The span may begin with its prefix marker, as `AMOUNT_TOKEN_PATTERN` matches
+  do; the returned offsets are those of the number.
+  """
+  number_start = start
+  while number_start < end and not text[number_start].isdigit():
+    number_start += 1
+  if number_start > start:
+    prefixed = not _continues_word(text, start)
+  else:
+    prefixed = _has_prefix_marker(text, start)
+  return _classify(text, number_start, end, prefixed, _SUFFIX_RX.match(text, end) is not None)
+
+
+def find_amounts(text: str) -> List[Dict[str, Any]]:
+  """Return every amount in `text` with its character offsets."""
+  marked: Dict[int, Optional[Dict[str, Any]]] = {}
+  if any(marker in text for marker in _MARKER_STARTS):
+    for match in _MARKED_RX.finditer(text):
+      # `SQAR 500` is no marker; its number, if money-like, is found by the number scan.
+      if not _continues_word(text, match.start()):
+        marked[match.start(1)] = _classify(text, match.start(1), match.end(1), True, True)
+  amounts: List[Dict[str, Any]] = []
+  for match in _NUMBER_RX.finditer(text):
+    start = match.start()
+    if start not in marked:
+      amount = _classify(text, start, match.end(), False, match.lastindex is not None)
+      if amount is not None:
+        amounts.append(amount)
+  if marked:
+    amounts.extend(amount for amount in marked.values() if amount is not None)
+    amounts.sort(key=itemgetter("start"))
+  return amounts
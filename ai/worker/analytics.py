@@ -0,0 +1,303 @@
+"""Engagement-wide amount analytics: duplicate payments, Benford first digits and outliers.
+
+Amounts come from the typed `evidence_amounts` table, dated by the earliest
+date of their evidence file, and are analysed as NumPy arrays:
+
+- exact duplicates: the same amount on the same date in two or more files;
+- fuzzy duplicates: amounts within `ANALYTICS_FUZZY_AMOUNT_PCT` of each other
+  and dated within `ANALYTICS_FUZZY_DAYS`, found by sorting on value and
+  sliding a bounded window (`ANALYTICS_FUZZY_WINDOW` neighbours) over it;
+- Benford: first-digit mean absolute deviation (Nigrini) for the engagement;
+  when it does not conform, files whose amounts concentrate on the
+  over-represented digits are flagged;
+- outliers: robust z-scores of log10(amount) around the median.
+
+Files recorded as near-duplicates of each other count as one file, so a
+re-uploaded scan does not look like a second payment. Results are upserted as
+findings under the built-in analytics scenario; findings that no longer
+trigger are pruned.
+"""
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text as sql_text
+from sqlalchemy.orm import Session
+
+from .compare import _prune_findings, upsert_findings
+from .config import Config
+
+_NO_DATE = np.iinfo(np.int64).min
+_BENFORD = np.log10(1 + 1 / np.arange(1, 10))
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+_CHECKS = {
+  "AMT-DUP-EXACT": ("Same amount and date in another file", "high"),
+  "AMT-DUP-FUZZY": ("Near-identical amount and date in another file", "medium"),
+  "AMT-BENFORD": ("Amounts concentrated on over-represented first digits", "low"),
+  "AMT-OUTLIER": ("Amount far above the engagement's typical range", "medium"),
+}
+
+
+def _dates(days: np.ndarray) -> List[Optional[str]]:
+  missing = days == _NO_DATE
+  dates = (_EPOCH + np.where(missing, 0, days).astype("timedelta64[D]")).astype(str).astype(object)
+  dates[missing] = None
+  return dates.tolist()
+
+
+def exact_duplicates(cents: np.ndarray, days: np.ndarray, roots: np.ndarray) -> np.ndarray:
+  """Group id per amount for (amount, date) groups spanning two or more files, -1 elsewhere."""
+  groups = np.full(len(cents), -1, dtype=np.int64)
+  dated = np.flatnonzero(days != _NO_DATE)
+  if len(dated) < 2:
+    return groups
+  order = dated[np.lexsort((roots[dated], days[dated], cents[dated]))]
+  new_key = np.empty(len(order), dtype=bool)
+  new_key[0] = True
+  new_key[1:] = (cents[order][1:] != cents[order][:-1]) | (days[order][1:] != days[order][:-1])
+  key = np.cumsum(new_key) - 1
+  new_root = new_key.copy()
+  new_root[1:] |= roots[order][1:] != roots[order][:-1]
+  files_per_key = np.bincount(key, weights=new_root)
+  shared = files_per_key[key] >= 2
+  groups[order[shared]] = key[shared]
+  return groups
+
+
+def fuzzy_duplicates(values: np.ndarray, cents: np.ndarray, days: np.ndarray, roots: np.ndarray) -> np.ndarray:
+  """(i, j) index pairs of near-identical amounts dated close together in different files.
+
+  Exact (amount, date) repeats are left to `exact_duplicates`. Each amount is
+  compared with at most `ANALYTICS_FUZZY_WINDOW` larger neighbours, which
+  bounds the work when a common value repeats thousands of times.
+  """
+  dated = np.flatnonzero(days != _NO_DATE)
+  order = dated[np.argsort(values[dated], kind="stable")]
+  sorted_values = values[order]
+  upper = np.searchsorted(sorted_values, sorted_values * (1 + Config.ANALYTICS_FUZZY_AMOUNT_PCT), side="right")
+  pairs: List[np.ndarray] = []
+  for offset in range(1, Config.ANALYTICS_FUZZY_WINDOW + 1):
+    left = np.arange(len(order) - offset)
+    right = left + offset
+    in_range = right < upper[left]
+    left, right = left[in_range], right[in_range]
+    if not len(left):
+      break
+    i, j = order[left], order[right]
+    keep = (
+      (roots[i] != roots[j])
+      & (np.abs(days[i] - days[j]) <= Config.ANALYTICS_FUZZY_DAYS)
+      & ~((cents[i] == cents[j]) & (days[i] == days[j]))
+    )
+    pairs.append(np.stack([i[keep], j[keep]], axis=1))
+  return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+
+
+def first_digits(values: np.ndarray) -> np.ndarray:
+  return np.clip((values / 10.0 ** np.floor(np.log10(values))).astype(np.int64), 1, 9)
+
+
+def benford(values: np.ndarray) -> Dict[str, Any]:
+  """First-digit conformity of `values` (those of at least 10) and the digits that are over-represented."""
+  digits = first_digits(values[values >= 10])
+  count = len(digits)
+  if count < Config.BENFORD_MIN_AMOUNTS:
+    return {"count": count, "mad": None, "conforms": True, "excess_digits": []}
+  observed = np.bincount(digits, minlength=10)[1:] / count
+  mad = float(np.abs(observed - _BENFORD).mean())
+  z = (np.abs(observed - _BENFORD) - 1 / (2 * count)) / np.sqrt(_BENFORD * (1 - _BENFORD) / count)
+  excess = np.flatnonzero((z > 1.96) & (observed > _BENFORD)) + 1
+  return {
+    "count": count,
+    "mad": round(mad, 5),
+    "conforms": mad <= Config.BENFORD_MAD_THRESHOLD,
+    "observed": [round(float(share), 4) for share in observed],
+    "excess_digits": [int(digit) for digit in excess],
+  }
+
+
+def outlier_scores(values: np.ndarray) -> np.ndarray:
+  """Robust z-score of log10(value) around the median; zeros when the spread is degenerate."""
+  logs = np.log10(values)
+  median = np.median(logs)
+  spread = np.median(np.abs(logs - median))
+  if spread == 0:
+    return np.zeros(len(values))
+  return 0.6745 * (logs - median) / spread
+
+
+def analyze(evidence: np.ndarray, values: np.ndarray, days: np.ndarray, roots: np.ndarray) -> Dict[str, Any]:
+  """Run every check over parallel arrays of evidence codes, amounts, day numbers and root-file codes."""
+  cents = np.round(values * 100).astype(np.int64)
+  digits_summary = benford(values)
+  concentrated = np.zeros(len(values), dtype=bool)
+  if not digits_summary["conforms"] and digits_summary["excess_digits"]:
+    in_excess = (values >= 10) & np.isin(first_digits(np.maximum(values, 1)), digits_summary["excess_digits"])
+    per_file = np.bincount(evidence, weights=in_excess, minlength=evidence.max() + 1)
+    totals = np.bincount(evidence, minlength=evidence.max() + 1)
+    share = per_file / np.maximum(totals, 1)
+    flagged_files = (per_file >= Config.BENFORD_MIN_FILE_AMOUNTS) & (share >= 0.5)
+    concentrated = in_excess & flagged_files[evidence]
+  return {
+    "exact": exact_duplicates(cents, days, roots),
+    "fuzzy": fuzzy_duplicates(values, cents, days, roots),
+    "benford": digits_summary,
+    "concentrated": concentrated,
+    "scores": outlier_scores(values),
+  }
+
+
+def _load_amounts(session: Session, engagement_id: str) -> List[Any]:
+  return list(
+    session.execute(
+      sql_text(
+        """
+          SELECT a.evidence_id::text AS evidence_id,
+                 a.value,
+                 (d.first_date - DATE '1970-01-01') AS days,
+                 COALESCE(x.original_id, a.evidence_id)::text AS root_id
+          FROM evidence_amounts a
+          LEFT JOIN LATERAL (
+            SELECT min(value) AS first_date FROM evidence_dates d WHERE d.evidence_id = a.evidence_id
+          ) d ON true
+          LEFT JOIN evidence_duplicates x ON x.evidence_id = a.evidence_id
+          WHERE a.engagement_id = :engagement_id AND a.value >= :min_amount
+        """
+      ),
+      {"engagement_id": engagement_id, "min_amount": Config.ANALYTICS_MIN_AMOUNT},
+    )
+  )
+
+
+def _finding(evidence_id: str, check_id: str, details: Dict[str, Any]) -> Dict[str, Any]:
+  title, severity = _CHECKS[check_id]
+  return {
+    "evidence_id": evidence_id,
+    "scenario_id": Config.ANALYTICS_SCENARIO_ID,
+    "check_id": check_id,
+    "title": f"{check_id}: {title}",
+    "severity": severity,
+    "details": json.dumps(details),
+  }
+
+
+def _top_per_file(files: np.ndarray, values: np.ndarray, file_count: int) -> tuple:
+  """Positions of at most `FINDING_MAX_MATCHES` entries per file, largest values first, and entries per file."""
+  order = np.lexsort((-values, files))
+  ordered = files[order]
+  rank = np.arange(len(order)) - np.searchsorted(ordered, ordered, side="left")
+  return order[rank < Config.FINDING_MAX_MATCHES], np.bincount(files, minlength=file_count)
+
+
+def finding_rows(
+  evidence_ids: np.ndarray, evidence: np.ndarray, values: np.ndarray, days: np.ndarray, result: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+  """One findings row per evidence file and triggered check.
+
+  Entries are ranked per file and their fields gathered with array operations,
+  so only the matches that end up in `details` become Python objects.
+  """
+  file_count = len(evidence_ids)
+  per_file: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+  def collect(check_id: str, entries: np.ndarray, fields: Callable[[np.ndarray], Dict[str, List[Any]]]) -> None:
+    if not len(entries):
+      return
+    kept, counts = _top_per_file(evidence[entries], values[entries], file_count)
+    files = evidence[entries[kept]]
+    columns = fields(kept)
+    names = list(columns)
+    for file_id, count, *row in zip(evidence_ids[files].tolist(), counts[files].tolist(), *columns.values()):
+      details = per_file.setdefault(file_id, {}).setdefault(check_id, {"matches": [], "match_count": count})
+      details["matches"].append(dict(zip(names, row)))
+
+  exact = result["exact"]
+  flagged = np.flatnonzero(exact >= 0)
+  members = flagged[np.argsort(exact[flagged], kind="stable")]
+  keys = exact[members]
+  group_files: Dict[int, List[str]] = {}
+
+  def other_files(index: int) -> List[str]:
+    group = int(exact[index])
+    if group not in group_files:
+      span = members[np.searchsorted(keys, group, "left"):np.searchsorted(keys, group, "right")]
+      group_files[group] = evidence_ids[np.unique(evidence[span])].tolist()
+    own = evidence_ids[evidence[index]]
+    return [file_id for file_id in group_files[group] if file_id != own][: Config.FINDING_MAX_MATCHES]
+
+  collect(
+    "AMT-DUP-EXACT",
+    flagged,
+    lambda kept: {
+      "value": values[flagged[kept]].tolist(),
+      "date": _dates(days[flagged[kept]]),
+      "evidence_ids": [other_files(index) for index in flagged[kept].tolist()],
+    },
+  )
+
+  pairs = np.concatenate([result["fuzzy"], result["fuzzy"][:, ::-1]])
+  collect(
+    "AMT-DUP-FUZZY",
+    pairs[:, 0],
+    lambda kept: {
+      "value": values[pairs[kept, 0]].tolist(),
+      "date": _dates(days[pairs[kept, 0]]),
+      "other_value": values[pairs[kept, 1]].tolist(),
+      "other_date": _dates(days[pairs[kept, 1]]),
+      "evidence_id": evidence_ids[evidence[pairs[kept, 1]]].tolist(),
+    },
+  )
+
+  concentrated = np.flatnonzero(result["concentrated"])
+  collect(
+    "AMT-BENFORD",
+    concentrated,
+    lambda kept: {
+      "value": values[concentrated[kept]].tolist(),
+      "digit": first_digits(values[concentrated[kept]]).tolist(),
+    },
+  )
+
+  scores = result["scores"]
+  outliers = np.flatnonzero(scores > Config.ANALYTICS_OUTLIER_Z)
+  collect(
+    "AMT-OUTLIER",
+    outliers,
+    lambda kept: {"value": values[outliers[kept]].tolist(), "score": np.round(scores[outliers[kept]], 2).tolist()},
+  )
+
+  digits = result["benford"]
+  rows: List[Dict[str, Any]] = []
+  for evidence_id, checks in per_file.items():
+    for check_id, details in checks.items():
+      if check_id == "AMT-BENFORD":
+        details.update({"mad": digits["mad"], "excess_digits": digits["excess_digits"]})
+      rows.append(_finding(evidence_id, check_id, details))
+  return rows
+
+
+def analyze_engagement(session: Session, engagement_id: str) -> Dict[str, Any]:
+  """Analyse every extracted amount of `engagement_id` and write the results as findings."""
+  records = _load_amounts(session, engagement_id)
+  evidence_ids, evidence = np.unique(np.array([row[0] for row in records], dtype=object), return_inverse=True)
+  rows: List[Dict[str, Any]] = []
+  result: Dict[str, Any] = {"benford": benford(np.empty(0))}
+  if records:
+    values = np.array([row[1] for row in records], dtype=np.float64)
+    days = np.array([_NO_DATE if row[2] is None else row[2] for row in records], dtype=np.int64)
+    _, roots = np.unique(np.array([row[3] for row in records], dtype=object), return_inverse=True)
+    result = analyze(evidence, values, days, roots)
+    rows = finding_rows(evidence_ids, evidence, values, days, result)
+
+  engagement_files = session.execute(
+    sql_text("SELECT id::text FROM evidence WHERE engagement_id = :engagement_id"), {"engagement_id": engagement_id}
+  ).scalars().all()
+  upsert_findings(session, rows)
+  _prune_findings(session, [(evidence_id, Config.ANALYTICS_SCENARIO_ID) for evidence_id in engagement_files], rows)
+  session.commit()
+  counts: Dict[str, int] = {}
+  for row in rows:
+    counts[row["check_id"]] = counts.get(row["check_id"], 0) + 1
+  return {"ok": True, "amounts": len(records), "findings": len(rows), "checks": counts, "benford": result["benford"]}
@@ -0,0 +1,77 @@
+"""Multi-keyword matching in a single pass over the text.
+
+Keywords are folded into a trie and rendered as one prefix-factored regular
+expression, so the regex engine walks the trie at each position in C instead of
+Python rescanning the text once per keyword. Adding hundreds of keywords grows
+the trie, not the number of passes.
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+_END = ""
+
+
+def _build_trie(keywords: Iterable[str]) -> Dict[str, dict]:
+  root: Dict[str, dict] = {}
+  for keyword in keywords:
+    node = root
+    for char in keyword:
+      node = node.setdefault(char, {})
+    node[_END] = {}
+  return root
+
+
+def _render(node: Dict[str, dict]) -> str:
+  terminal = _END in node
+  branches = [re.escape(char) + _render(child) for char, child in sorted(node.items()) if char != _END]
+  if not branches:
+    return ""
+  body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+  if terminal:
+    # Optional continuation keeps matches greedy, so the longest keyword wins.
+    return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+  return body
+
+
+def trie_pattern(keywords: Iterable[str]) -> str:
+  """Return a regex source matching any of `keywords`, longest match first."""
+  words = sorted({keyword for keyword in keywords if keyword})
+  if not words:
+    return "(?!)"
+  return "(?:" + _render(_build_trie(words)) + ")"
+
+
+class KeywordAutomaton:
+  """Find every occurrence of every keyword, including overlapping ones, in one scan."""
+
+  def __init__(self, keywords: Iterable[str]) -> None:
+    self.keywords: List[str] = sorted({keyword for keyword in keywords if keyword})
+    self.pattern = trie_pattern(self.keywords)
+    self.regex = re.compile(self.pattern)
+    keyword_set = set(self.keywords)
+    # The regex reports only the longest keyword starting at a position; shorter
+    # keywords that are prefixes of it are added from this table.
+    self.prefixes: Dict[str, List[str]] = {
+      keyword: [keyword[:size] for size in range(1, len(keyword)) if keyword[:size] in keyword_set]
+      for keyword in self.keywords
+    }
+
+  def expand(self, longest: str) -> List[str]:
+    return [longest, *self.prefixes.get(longest, [])]
+
+  def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+    """Yield `(offset, keyword)` for every hit in `text`."""
+    if not self.keywords:
+      return
+    search = self.regex.search
+    match = search(text)
+    while match is not None:
+      start = match.start()
+      for keyword in self.expand(match.group(0)):
+        yield start, keyword
+      # Resume one character later so keywords overlapping this hit are still found.
+      match = search(text, start + 1)
+
+  def found(self, text: str) -> Set[str]:
+    return {keyword for _, keyword in self.finditer(text)}
@@ -0,0 +1,186 @@
+"""Engagement-wide extraction as one job with overlapping download, extract and write stages."""
+
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text as sql_text
+
+from .config import Config
+from .db import SessionLocal, insert_extractions
+from .duplicates import record_signature
+from .entity_index import index_entities
+from .storage import s3_client
+from .tasks import EVIDENCE_COLUMNS, copy_row, extract_object, open_evidence
+
+_DONE = object()
+
+
+def _load_records(evidence_ids: Optional[List[str]], engagement_id: Optional[str]) -> List[Dict[str, Any]]:
+  with SessionLocal() as session:
+    if evidence_ids:
+      rows = session.execute(
+        sql_text(f"SELECT {EVIDENCE_COLUMNS} FROM evidence WHERE id = ANY(CAST(:ids AS uuid[])) ORDER BY created_at"),
+        {"ids": evidence_ids},
+      )
+    else:
+      rows = session.execute(
+        sql_text(f"SELECT {EVIDENCE_COLUMNS} FROM evidence WHERE engagement_id = :engagement_id ORDER BY created_at"),
+        {"engagement_id": engagement_id},
+      )
+    return [dict(row) for row in rows.mappings()]
+
+
+def extract_batch(evidence_ids: Optional[List[str]] = None, engagement_id: Optional[str] = None) -> Dict[str, Any]:
+  """Extract many evidence files in one job.
+
+  A download thread feeds a bounded queue of fetched objects, a few extraction
+  threads turn them into extraction rows, and this thread writes the rows in
+  batches of `AI_BATCH_INSERT_SIZE`. One S3 client and one writer session are
+  shared by the whole batch.
+
+  Identical content is extracted once per batch: until the writer commits the
+  first row for a content hash, later files with that hash copy it instead of
+  missing the extraction cache. Files that fail to download, extract or write
+  are flagged `failed`.
+  """
+  if not evidence_ids and not engagement_id:
+    return {"ok": False, "error": "nothing_to_extract"}
+  records = _load_records(evidence_ids, engagement_id)
+  if not records:
+    return {"ok": False, "error": "evidence_not_found"}
+
+  s3 = s3_client()
+  extract_workers = max(1, Config.BATCH_EXTRACT_WORKERS)
+  downloaded: "queue.Queue[Any]" = queue.Queue(maxsize=Config.BATCH_QUEUE_SIZE)
+  extracted: "queue.Queue[Any]" = queue.Queue(maxsize=Config.BATCH_QUEUE_SIZE)
+  items: Dict[str, Dict[str, Any]] = {}
+  items_lock = threading.Lock()
+  # Rows extracted but not yet committed, by content hash, and a lock per hash so
+  # concurrent copies of the same file wait for the first extraction.
+  unwritten: Dict[str, Dict[str, Any]] = {}
+  hash_locks: Dict[str, threading.Lock] = {}
+  hashes_lock = threading.Lock()
+
+  def record_result(evidence_id: str, result: Dict[str, Any]) -> None:
+    with items_lock:
+      items[evidence_id] = result
+
+  def extract_once(lookup_session, record: Dict[str, Any], evidence_object: Any) -> Dict[str, Any]:
+    content_hash = evidence_object.sha256()
+    with hashes_lock:
+      hash_lock = hash_locks.setdefault(content_hash, threading.Lock())
+    with hash_lock:
+      with hashes_lock:
+        first = unwritten.get(content_hash)
+      if first is not None:
+        return copy_row(first, record)
+      row = extract_object(lookup_session, record, evidence_object, content_hash)
+      with hashes_lock:
+        unwritten[content_hash] = row
+      return row
+
+  def download_stage() -> None:
+    try:
+      for record in records:
+        try:
+          evidence_object = open_evidence(s3, record)
+        except Exception as exc:
+          record_result(str(record["id"]), {"ok": False, "error": "download_failed", "detail": str(exc)})
+          continue
+        downloaded.put((record, evidence_object))
+    finally:
+      for _ in range(extract_workers):
+        downloaded.put(_DONE)
+
+  def extract_stage() -> None:
+    try:
+      with SessionLocal() as lookup_session:
+        while True:
+          item = downloaded.get()
+          if item is _DONE:
+            return
+          record, evidence_object = item
+          try:
+            with evidence_object:
+              extracted.put(extract_once(lookup_session, record, evidence_object))
+          except Exception as exc:
+            lookup_session.rollback()
+            record_result(str(record["id"]), {"ok": False, "error": "extract_failed", "detail": str(exc)})
+    finally:
+      extracted.put(_DONE)
+
+  threads = [threading.Thread(target=download_stage, name="extract-download", daemon=True)]
+  threads += [
+    threading.Thread(target=extract_stage, name=f"extract-worker-{index}", daemon=True)
+    for index in range(extract_workers)
+  ]
+  for thread in threads:
+    thread.start()
+
+  pending: List[Dict[str, Any]] = []
+  with SessionLocal() as session:
+
+    def flush() -> None:
+      if not pending:
+        return
+      try:
+        insert_extractions(session, pending)
+        index_entities(session, [(row["evidence_id"], row["payload"]) for row in pending])
+        # One at a time so near-duplicates within the same flush still find each other.
+        duplicates = {row["evidence_id"]: record_signature(session, row["evidence_id"], row["search_text"]) for row in pending}
+        session.commit()
+      except Exception as exc:
+        session.rollback()
+        for row in pending:
+          record_result(row["evidence_id"], {"ok": False, "error": "write_failed", "detail": str(exc)})
+      else:
+        for row in pending:
+          record_result(
+            row["evidence_id"],
+            {
+              "ok": True,
+              "confidence": row["confidence"],
+              "chars": row["chars"],
+              "cached": row["cached"],
+              "duplicate_of": (duplicates[row["evidence_id"]] or {}).get("duplicate_of"),
+            },
+          )
+      with hashes_lock:
+        # Committed rows are now visible to the extraction cache lookup.
+        for row in pending:
+          unwritten.pop(row["content_sha256"], None)
+          hash_locks.pop(row["content_sha256"], None)
+      pending.clear()
+
+    finished = 0
+    while finished < extract_workers:
+      row = extracted.get()
+      if row is _DONE:
+        finished += 1
+        continue
+      pending.append(row)
+      if len(pending) >= Config.BATCH_INSERT_SIZE:
+        flush()
+    flush()
+
+  for thread in threads:
+    thread.join()
+
+  failed = [evidence_id for evidence_id, result in items.items() if not result.get("ok")]
+  if failed:
+    with SessionLocal() as session:
+      session.execute(
+        sql_text("UPDATE evidence SET status = 'failed' WHERE id = ANY(CAST(:ids AS uuid[]))"), {"ids": failed}
+      )
+      session.commit()
+
+  succeeded = [result for result in items.values() if result.get("ok")]
+  return {
+    "ok": True,
+    "total": len(records),
+    "extracted": len(succeeded),
+    "cached": sum(1 for result in succeeded if result.get("cached")),
+    "failed": len(items) - len(succeeded),
+    "items": items,
+  }
@@ -1,40 +1,387 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, cast
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 from sqlalchemy import text as sql_text
 from sqlalchemy.orm import Session
 
+from .automaton import KeywordAutomaton
+from .config import Config
+from .metrics import incr
+from .normalize import normalize_search_text, search_text
+from .rules import CompiledScenario, HitIndex
+
 
 def _contains_any(text: str, keywords: List[str]) -> List[str]:
-  lower_text = text.lower()
-  return [keyword for keyword in keywords if keyword.lower() in lower_text]
+  hits = KeywordAutomaton(normalize_search_text(keyword) for keyword in keywords).found(normalize_search_text(text))
+  return [keyword for keyword in keywords if normalize_search_text(keyword) in hits]
 
 
 def _missing_all(text: str, keywords: List[str]) -> List[str]:
-  lower_text = text.lower()
-  return [keyword for keyword in keywords if keyword.lower() not in lower_text]
+  hits = KeywordAutomaton(normalize_search_text(keyword) for keyword in keywords).found(normalize_search_text(text))
+  return [keyword for keyword in keywords if normalize_search_text(keyword) not in hits]
+
+
+def _scenario_checks(rules_data: Any) -> List[Dict[str, Any]]:
+  checks: List[Dict[str, Any]] = []
+  if isinstance(rules_data, dict):
+    rules_dict = cast(Dict[str, Any], rules_data)
+    raw_checks = rules_dict.get("checks", [])
+    if isinstance(raw_checks, list):
+      raw_checks_list = cast(List[Any], raw_checks)
+      for item in raw_checks_list:
+        if isinstance(item, dict):
+          checks.append(cast(Dict[str, Any], item))
+  return checks
+
+
+class ScenarioCache:
+  """Process-local LRU of compiled scenarios keyed by `(scenario_id, rules_hash)`.
+
+  The hash is computed by Postgres from the stored rules, so editing a scenario
+  changes its key and the stale entry simply ages out; only the hash, not the
+  rules JSON, is fetched on a hit.
+  """
+
+  def __init__(self, size: int) -> None:
+    self._size = max(1, size)
+    self._entries: "OrderedDict[Tuple[str, str], CompiledScenario]" = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, scenario_id: str, rules_hash: str) -> Optional[CompiledScenario]:
+    with self._lock:
+      scenario = self._entries.get((scenario_id, rules_hash))
+      if scenario is not None:
+        self._entries.move_to_end((scenario_id, rules_hash))
+      return scenario
 
+  def put(self, scenario_id: str, rules_hash: str, scenario: CompiledScenario) -> None:
+    with self._lock:
+      for key in [key for key in self._entries if key[0] == scenario_id]:
+        del self._entries[key]
+      self._entries[(scenario_id, rules_hash)] = scenario
+      while len(self._entries) > self._size:
+        self._entries.popitem(last=False)
 
-def _extract_body(payload: Dict[str, Any]) -> str:
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+
+_scenario_cache = ScenarioCache(Config.SCENARIO_CACHE_SIZE)
+
+
+def load_scenario(session: Session, scenario_id: str) -> Optional[Tuple[str, CompiledScenario]]:
+  """Return `(name, compiled scenario)`, compiling the rules only when they changed since last use."""
+  head = session.execute(
+    sql_text("SELECT name, md5(rules::text) AS rules_hash FROM comparison_scenarios WHERE id = :scenario_id"),
+    {"scenario_id": scenario_id},
+  ).mappings().first()
+  if head is None:
+    return None
+  if str(scenario_id) == Config.ANALYTICS_SCENARIO_ID:
+    # Its findings come from worker.analytics; comparing against its empty rules would prune them.
+    raise ValueError("the amount analytics scenario has no rules to compare")
+
+  rules_hash = str(head["rules_hash"])
+  scenario = _scenario_cache.get(str(scenario_id), rules_hash)
+  if scenario is not None:
+    incr("scenario_cache_hits")
+    return head["name"], scenario
+
+  incr("scenario_cache_misses")
+  rules_row = session.execute(
+    sql_text("SELECT rules FROM comparison_scenarios WHERE id = :scenario_id"),
+    {"scenario_id": scenario_id},
+  ).mappings().first()
+  if rules_row is None:
+    return None
+  scenario = CompiledScenario(_scenario_checks(rules_row["rules"]), version=rules_hash)
+  _scenario_cache.put(str(scenario_id), rules_hash, scenario)
+  return head["name"], scenario
+
+
+def warm_scenarios(session: Session) -> int:
+  """Compile the newest `AI_SCENARIO_CACHE_SIZE` scenarios into the cache; returns how many were compiled.
+
+  RQ forks a fresh process per job, so anything a job adds to the cache is gone
+  when it exits. The worker calls this in its parent before forking, and every
+  job then starts with these scenarios compiled. Scenarios already cached at
+  their current rules hash are not fetched again, and a scenario whose rules do
+  not compile is left out; jobs report it as `invalid_rules`.
+  """
+  heads = session.execute(
+    sql_text(
+      """
+        SELECT id, md5(rules::text) AS rules_hash
+        FROM comparison_scenarios
+        WHERE id::text <> :analytics_id
+        ORDER BY created_at DESC
+        LIMIT :limit
+      """
+    ),
+    {"analytics_id": Config.ANALYTICS_SCENARIO_ID, "limit": Config.SCENARIO_CACHE_SIZE},
+  ).mappings()
+  stale = {
+    str(head["id"]): str(head["rules_hash"])
+    for head in heads
+    if _scenario_cache.get(str(head["id"]), str(head["rules_hash"])) is None
+  }
+  if not stale:
+    return 0
+  rows = session.execute(
+    sql_text("SELECT id, rules FROM comparison_scenarios WHERE id = ANY(CAST(:ids AS uuid[]))"),
+    {"ids": list(stale)},
+  ).mappings()
+  warmed = 0
+  for row in rows:
+    scenario_id = str(row["id"])
+    try:
+      scenario = CompiledScenario(_scenario_checks(row["rules"]), version=stale[scenario_id])
+    except ValueError:
+      continue
+    _scenario_cache.put(scenario_id, stale[scenario_id], scenario)
+    warmed += 1
+  return warmed
+
+
+_FINDING_COLUMNS = ("evidence_id", "scenario_id", "check_id", "title", "severity", "details")
+# Postgres caps a statement at 65535 bind parameters.
+_VALUES_PER_STATEMENT = 1000
+_STAGE_TABLE = "findings_stage"
+
+_MATRIX_FETCH_SIZE = 50
+
+# Reviewer-owned columns (status, created_at) are never touched by a re-run.
+_UPSERT_CLAUSE = (
+  "ON CONFLICT (evidence_id, scenario_id, check_id) DO UPDATE "
+  "SET title = EXCLUDED.title, severity = EXCLUDED.severity, details = EXCLUDED.details, updated_at = now() "
+  "WHERE {table}.details::text IS DISTINCT FROM EXCLUDED.details::text "
+  "OR {table}.severity IS DISTINCT FROM EXCLUDED.severity OR {table}.title IS DISTINCT FROM EXCLUDED.title"
+)
+
+# The latest extraction of one evidence file, with the key a compare run is recorded against.
+# Template documents (invoices from one supplier) score as near-duplicates while
+# differing in what matters, so a duplicate only counts for skipping when its
+# indexed amounts and dates also equal the original's.
+_LATEST_EXTRACTION_COLUMNS = (
+  "json_payload, search_text, COALESCE(content_sha256 || ':' || pipeline_version, id::text) AS extraction_key, "
+  "(SELECT d.original_id FROM evidence_duplicates d WHERE d.evidence_id = evidence_extractions.evidence_id"
+  " AND ARRAY(SELECT a.value FROM evidence_amounts a WHERE a.evidence_id = d.evidence_id ORDER BY a.value)"
+  " = ARRAY(SELECT a.value FROM evidence_amounts a WHERE a.evidence_id = d.original_id ORDER BY a.value)"
+  " AND ARRAY(SELECT t.value FROM evidence_dates t WHERE t.evidence_id = d.evidence_id ORDER BY t.value)"
+  " = ARRAY(SELECT t.value FROM evidence_dates t WHERE t.evidence_id = d.original_id ORDER BY t.value)"
+  ") AS duplicate_of"
+)
+
+
+def _payload(payload_raw: Any) -> Optional[Dict[str, Any]]:
+  return cast(Dict[str, Any], payload_raw) if isinstance(payload_raw, dict) else None
+
+
+def _duplicate_of(extraction: Any) -> Optional[str]:
+  """The original this evidence near-duplicates, when `AI_SKIP_NEAR_DUPLICATE_COMPARES` opts in to skipping."""
+  original = extraction.get("duplicate_of") if Config.SKIP_NEAR_DUPLICATE_COMPARES else None
+  return str(original) if original is not None else None
+
+
+def _search_text(extraction: Any, payload: Dict[str, Any]) -> str:
+  """The stored normalized text, or one computed now for extractions made before it was stored."""
+  stored = extraction.get("search_text")
+  return stored if isinstance(stored, str) else search_text(payload)
+
+
+def _locate(payload: Dict[str, Any], section_numbers: List[int]) -> List[Dict[str, Any]]:
   sections = payload.get("sections", [])
-  if isinstance(sections, list) and sections:
-    first = sections[0]
-    if isinstance(first, dict):
-      first_dict = cast(Dict[str, Any], first)
-      raw = first_dict.get("text", "")
-      if isinstance(raw, str):
-        return raw
-      return str(raw)
-  return str(payload)
+  located: List[Dict[str, Any]] = []
+  for number in section_numbers:
+    section = sections[number] if isinstance(sections, list) and number < len(sections) else None
+    if isinstance(section, dict):
+      located.append({"section": number, "title": section.get("title"), "page": section.get("page")})
+  return located
+
+
+def finding_rows(
+  evidence_id: str, scenario_id: str, scenario: CompiledScenario, payload: Dict[str, Any], index: HitIndex
+) -> List[Dict[str, Any]]:
+  """Build one findings row per triggered check of `scenario`.
+
+  Details name the sections (and pages) whose hits fired the check and carry
+  the hits themselves with offsets and small context windows, so reviewers do
+  not need the full extraction payload to see them.
+  """
+  rows: List[Dict[str, Any]] = []
+  for check in scenario.checks:
+    outcome = check.evaluate(index)
+    if not outcome.pop("triggered"):
+      continue
+
+    outcome["sections"] = _locate(payload, outcome["sections"])
+    rows.append(
+      {
+        "evidence_id": evidence_id,
+        "scenario_id": scenario_id,
+        "check_id": check.check_id,
+        "title": f"{check.check_id}: Keywords found in document",
+        "severity": check.severity,
+        "details": json.dumps(outcome),
+      }
+    )
+  return rows
+
+
+def _insert_values(session: Session, rows: List[Dict[str, Any]], table: str) -> None:
+  for offset in range(0, len(rows), _VALUES_PER_STATEMENT):
+    batch = rows[offset:offset + _VALUES_PER_STATEMENT]
+    params: Dict[str, Any] = {}
+    values: List[str] = []
+    for index, row in enumerate(batch):
+      for column in _FINDING_COLUMNS:
+        params[f"{column}_{index}"] = row[column]
+      values.append(
+        f"(:evidence_id_{index}, :scenario_id_{index}, :check_id_{index}, :title_{index}, "
+        f":severity_{index}, 'open', CAST(:details_{index} AS jsonb))"
+      )
+    session.execute(
+      sql_text(
+        f"INSERT INTO {table}(evidence_id, scenario_id, check_id, title, severity, status, details) "
+        f"VALUES {', '.join(values)} " + _UPSERT_CLAUSE.format(table=table)
+      ),
+      params,
+    )
+
+
+def _copy_findings(session: Session, rows: List[Dict[str, Any]], table: str) -> bool:
+  """Upsert rows through COPY into a staging table when the connection is psycopg 3.
+
+  Returns False when COPY is unavailable.
+  """
+  driver_connection = getattr(session.connection().connection, "driver_connection", None)
+  cursor = driver_connection.cursor() if driver_connection is not None else None
+  if cursor is None or not hasattr(cursor, "copy"):
+    return False
+  session.execute(
+    sql_text(
+      f"CREATE TEMP TABLE IF NOT EXISTS {_STAGE_TABLE} "
+      "(evidence_id uuid, scenario_id uuid, check_id text, title text, severity text, details jsonb) "
+      "ON COMMIT DELETE ROWS"
+    )
+  )
+  with cursor:
+    with cursor.copy(
+      f"COPY {_STAGE_TABLE}(evidence_id, scenario_id, check_id, title, severity, details) FROM STDIN"
+    ) as copy:
+      for row in rows:
+        copy.write_row(tuple(row[column] for column in _FINDING_COLUMNS))
+  session.execute(
+    sql_text(
+      f"INSERT INTO {table}(evidence_id, scenario_id, check_id, title, severity, status, details) "
+      f"SELECT evidence_id, scenario_id, check_id, title, severity, 'open', details FROM {_STAGE_TABLE} "
+      + _UPSERT_CLAUSE.format(table=table)
+    )
+  )
+  session.execute(sql_text(f"TRUNCATE {_STAGE_TABLE}"))
+  return True
+
+
+def upsert_findings(session: Session, rows: List[Dict[str, Any]], table: str = "findings") -> None:
+  """Write finding rows in bulk, updating existing ones on (evidence_id, scenario_id, check_id); the caller commits.
+
+  Batches of `AI_FINDINGS_COPY_MIN_ROWS` rows or more are streamed with COPY
+  through a staging table, smaller ones go out as a single multi-row INSERT.
+  """
+  if not rows:
+    return
+  if len(rows) >= Config.FINDINGS_COPY_MIN_ROWS and _copy_findings(session, rows, table):
+    return
+  _insert_values(session, rows, table)
+
+
+def _prune_findings(session: Session, runs: List[Tuple[str, str]], rows: List[Dict[str, Any]]) -> None:
+  """Delete open findings of the re-evaluated pairs whose check no longer triggers."""
+  if not runs:
+    return
+  session.execute(
+    sql_text(
+      """
+        DELETE FROM findings f
+        USING unnest(CAST(:run_evidence AS uuid[]), CAST(:run_scenarios AS uuid[])) AS run(evidence_id, scenario_id)
+        WHERE f.evidence_id = run.evidence_id
+          AND f.scenario_id = run.scenario_id
+          AND f.status = 'open'
+          AND NOT EXISTS (
+            SELECT 1
+            FROM unnest(CAST(:kept_evidence AS uuid[]), CAST(:kept_scenarios AS uuid[]), CAST(:kept_checks AS text[]))
+              AS kept(evidence_id, scenario_id, check_id)
+            WHERE kept.evidence_id = f.evidence_id AND kept.scenario_id = f.scenario_id AND kept.check_id = f.check_id
+          )
+      """
+    ),
+    {
+      "run_evidence": [evidence_id for evidence_id, _ in runs],
+      "run_scenarios": [scenario_id for _, scenario_id in runs],
+      "kept_evidence": [row["evidence_id"] for row in rows],
+      "kept_scenarios": [row["scenario_id"] for row in rows],
+      "kept_checks": [row["check_id"] for row in rows],
+    },
+  )
+
+
+# Part of every recorded compare run: bump it whenever matching or finding
+# details change, so runs recorded by the old engine are redone, not skipped.
+COMPARE_ENGINE_VERSION = "1"
+
+
+def _run_version(scenario: CompiledScenario) -> str:
+  return f"{scenario.version}@engine-{COMPARE_ENGINE_VERSION}"
+
+
+def _completed_runs(session: Session, evidence_ids: List[str], scenario_ids: List[str]) -> Dict[Tuple[str, str], Tuple[str, str]]:
+  rows = session.execute(
+    sql_text(
+      """
+        SELECT evidence_id, scenario_id, extraction_key, rules_hash
+        FROM compare_runs
+        WHERE evidence_id = ANY(CAST(:evidence_ids AS uuid[])) AND scenario_id = ANY(CAST(:scenario_ids AS uuid[]))
+      """
+    ),
+    {"evidence_ids": evidence_ids, "scenario_ids": scenario_ids},
+  ).mappings()
+  return {(str(row["evidence_id"]), str(row["scenario_id"])): (row["extraction_key"], row["rules_hash"]) for row in rows}
+
+
+def _record_runs(session: Session, runs: List[Tuple[str, str, str, str]]) -> None:
+  """Remember which extraction and rules/engine version each `(evidence_id, scenario_id)` was last compared at."""
+  if not runs:
+    return
+  session.execute(
+    sql_text(
+      """
+        INSERT INTO compare_runs(evidence_id, scenario_id, extraction_key, rules_hash)
+        SELECT * FROM unnest(
+          CAST(:evidence_ids AS uuid[]), CAST(:scenario_ids AS uuid[]), CAST(:extraction_keys AS text[]), CAST(:rules_hashes AS text[])
+        )
+        ON CONFLICT (evidence_id, scenario_id) DO UPDATE
+        SET extraction_key = EXCLUDED.extraction_key, rules_hash = EXCLUDED.rules_hash, ran_at = now()
+      """
+    ),
+    {
+      "evidence_ids": [run[0] for run in runs],
+      "scenario_ids": [run[1] for run in runs],
+      "extraction_keys": [run[2] for run in runs],
+      "rules_hashes": [run[3] for run in runs],
+    },
+  )
 
 
 def compare_and_store(session: Session, evidence_id: str, scenario_id: str) -> Dict[str, Any]:
   extraction_row = session.execute(
     sql_text(
-      """
-        SELECT json_payload
+      f"""
+        SELECT {_LATEST_EXTRACTION_COLUMNS}
         FROM evidence_extractions
         WHERE evidence_id = :evidence_id
         ORDER BY extracted_at DESC
@@ -47,70 +394,156 @@ def compare_and_store(session: Session, evidence_id: str, scenario_id: str) -> D
   if extraction_row is None:
     return {"ok": False, "error": "no_extraction"}
 
-  payload_raw = extraction_row["json_payload"]
-  if not isinstance(payload_raw, dict):
+  payload = _payload(extraction_row["json_payload"])
+  if payload is None:
     return {"ok": False, "error": "invalid_payload"}
 
-  payload = cast(Dict[str, Any], payload_raw)
-  text_content = _extract_body(payload)
+  try:
+    loaded = load_scenario(session, scenario_id)
+  except ValueError as exc:
+    return {"ok": False, "error": "invalid_rules", "detail": str(exc)}
+  if loaded is None:
+    return {"ok": False, "error": "scenario_not_found"}
+
+  scenario_name, scenario = loaded
+  original = _duplicate_of(extraction_row)
+  if original is not None:
+    return {"ok": True, "created": 0, "skipped": True, "scenario": scenario_name, "duplicate_of": original}
 
-  scenario_row = session.execute(
-    sql_text("SELECT rules, name FROM comparison_scenarios WHERE id = :scenario_id"),
-    {"scenario_id": scenario_id},
-  ).mappings().first()
+  extraction_key = str(extraction_row["extraction_key"])
+  completed = _completed_runs(session, [evidence_id], [scenario_id])
+  if completed.get((str(evidence_id), str(scenario_id))) == (extraction_key, _run_version(scenario)):
+    return {"ok": True, "created": 0, "skipped": True, "scenario": scenario_name}
 
-  if scenario_row is None:
-    return {"ok": False, "error": "scenario_not_found"}
+  index = scenario.index(_search_text(extraction_row, payload), payload)
+  rows = finding_rows(evidence_id, scenario_id, scenario, payload, index)
+  upsert_findings(session, rows)
+  _prune_findings(session, [(evidence_id, scenario_id)], rows)
+  _record_runs(session, [(evidence_id, scenario_id, extraction_key, _run_version(scenario))])
+  session.commit()
+  return {"ok": True, "created": len(rows), "skipped": False, "scenario": scenario_name}
 
-  rules_data = scenario_row.get("rules")
-  checks: List[Dict[str, Any]] = []
-  if isinstance(rules_data, dict):
-    rules_dict = cast(Dict[str, Any], rules_data)
-    raw_checks = rules_dict.get("checks", [])
-    if isinstance(raw_checks, list):
-      raw_checks_list = cast(List[Any], raw_checks)
-      for item in raw_checks_list:
-        if isinstance(item, dict):
-          checks.append(cast(Dict[str, Any], item))
 
-  created = 0
-  for check in checks:
-    check_id = str(check.get("id", "RULE"))
-    any_keywords = [str(item) for item in check.get("any", []) if isinstance(item, str)]
-    all_keywords = [str(item) for item in check.get("all", []) if isinstance(item, str)]
-    severity = str(check.get("severity", "medium"))
+def _latest_extractions(session: Session, evidence_ids: List[str]) -> Dict[str, Any]:
+  rows = session.execute(
+    sql_text(
+      f"""
+        SELECT DISTINCT ON (evidence_id) evidence_id, {_LATEST_EXTRACTION_COLUMNS}
+        FROM evidence_extractions
+        WHERE evidence_id = ANY(CAST(:ids AS uuid[]))
+        ORDER BY evidence_id, extracted_at DESC
+      """
+    ),
+    {"ids": evidence_ids},
+  ).mappings()
+  return {str(row["evidence_id"]): row for row in rows}
 
-    matched_any = _contains_any(text_content, any_keywords) if any_keywords else []
-    missing_all = _missing_all(text_content, all_keywords) if all_keywords else []
 
-    # Trigger finding if:
-    # 1. We have any_keywords and at least one matched, OR
-    # 2. We have all_keywords and at least one is missing
-    trigger = bool(matched_any) or bool(missing_all)
+def compare_matrix(session: Session, evidence_ids: List[str], scenario_ids: List[str]) -> Dict[str, Any]:
+  """Evaluate every scenario against every evidence file.
 
-    if not trigger:
+  Scenarios are loaded once, their keywords are merged into one automaton so
+  each document is scanned a single time for all of them, extractions are read
+  `_MATRIX_FETCH_SIZE` at a time and findings are upserted per chunk. Pairs
+  already compared at the same extraction, rules and engine version are skipped,
+  as is, with `AI_SKIP_NEAR_DUPLICATE_COMPARES` on, evidence flagged as a
+  near-duplicate of another file.
+  """
+  scenarios: Dict[str, CompiledScenario] = {}
+  names: Dict[str, str] = {}
+  results: Dict[str, Dict[str, Any]] = {}
+  for scenario_id in scenario_ids:
+    try:
+      loaded = load_scenario(session, scenario_id)
+    except ValueError as exc:
+      results[f"*:{scenario_id}"] = {"ok": False, "error": "invalid_rules", "detail": str(exc)}
+      continue
+    if loaded is None:
+      results[f"*:{scenario_id}"] = {"ok": False, "error": "scenario_not_found"}
       continue
+    names[scenario_id], scenarios[scenario_id] = loaded
+  if not scenarios:
+    return {"ok": False, "error": "scenario_not_found", "results": results}
 
-    excerpt = text_content[:600]
-    details = json.dumps({"matched_any": matched_any, "missing_all": missing_all, "excerpt": excerpt})
+  automaton = KeywordAutomaton(
+    keyword for scenario in scenarios.values() for keyword in scenario.automaton.keywords
+  )
+  regexes = {source: rx for scenario in scenarios.values() for source, rx in scenario.regexes.items()}
 
-    session.execute(
-      sql_text(
-        """
-          INSERT INTO findings(evidence_id, scenario_id, check_id, title, severity, status, details)
-          VALUES (:evidence_id, :scenario_id, :check_id, :title, :severity, 'open', CAST(:details AS jsonb))
-        """
-      ),
-      {
-        "evidence_id": evidence_id,
-        "scenario_id": scenario_id,
-        "check_id": check_id,
-        "title": f"{check_id}: Keywords found in document",
-        "severity": severity,
-        "details": details,
-      },
-    )
-    created += 1
+  created = 0
+  for offset in range(0, len(evidence_ids), _MATRIX_FETCH_SIZE):
+    chunk = [str(evidence_id) for evidence_id in evidence_ids[offset:offset + _MATRIX_FETCH_SIZE]]
+    extractions = _latest_extractions(session, chunk)
+    completed = _completed_runs(session, chunk, list(scenarios))
+    pending: List[Dict[str, Any]] = []
+    runs: List[Tuple[str, str, str, str]] = []
+    chunk_results: Dict[str, Dict[str, Any]] = {}
+    for evidence_id in chunk:
+      extraction = extractions.get(evidence_id)
+      if extraction is None:
+        error: Dict[str, Any] = {"ok": False, "error": "no_extraction"}
+        chunk_results.update({f"{evidence_id}:{scenario_id}": error for scenario_id in scenarios})
+        continue
+      payload = _payload(extraction["json_payload"])
+      if payload is None:
+        error = {"ok": False, "error": "invalid_payload"}
+        chunk_results.update({f"{evidence_id}:{scenario_id}": error for scenario_id in scenarios})
+        continue
+      original = _duplicate_of(extraction)
+      if original is not None:
+        for scenario_id in scenarios:
+          chunk_results[f"{evidence_id}:{scenario_id}"] = {
+            "ok": True,
+            "created": 0,
+            "skipped": True,
+            "scenario": names[scenario_id],
+            "duplicate_of": original,
+          }
+        continue
 
-  session.commit()
-  return {"ok": True, "created": created, "scenario": scenario_row.get("name")}
+      extraction_key = str(extraction["extraction_key"])
+      stale = {
+        scenario_id: scenario
+        for scenario_id, scenario in scenarios.items()
+        if completed.get((evidence_id, scenario_id)) != (extraction_key, _run_version(scenario))
+      }
+      for scenario_id in scenarios.keys() - stale.keys():
+        chunk_results[f"{evidence_id}:{scenario_id}"] = {"ok": True, "created": 0, "skipped": True, "scenario": names[scenario_id]}
+      if not stale:
+        continue
+
+      index = HitIndex(_search_text(extraction, payload), automaton, regexes, payload)
+      for scenario_id, scenario in stale.items():
+        rows = finding_rows(evidence_id, scenario_id, scenario, payload, index)
+        pending.extend(rows)
+        runs.append((evidence_id, scenario_id, extraction_key, _run_version(scenario)))
+        chunk_results[f"{evidence_id}:{scenario_id}"] = {
+          "ok": True,
+          "created": len(rows),
+          "skipped": False,
+          "scenario": names[scenario_id],
+        }
+
+    try:
+      upsert_findings(session, pending)
+      _prune_findings(session, [(run[0], run[1]) for run in runs], pending)
+      _record_runs(session, runs)
+      session.commit()
+    except Exception as exc:
+      session.rollback()
+      for key, result in chunk_results.items():
+        if result["ok"] and not result["skipped"]:
+          chunk_results[key] = {"ok": False, "error": "write_failed", "detail": str(exc)}
+    else:
+      created += len(pending)
+    results.update(chunk_results)
+
+  return {
+    "ok": True,
+    "evidence": len(evidence_ids),
+    "scenarios": len(scenarios),
+    "created": created,
+    "skipped": sum(1 for result in results.values() if result.get("skipped")),
+    "failed": sum(1 for result in results.values() if not result["ok"]),
+    "results": results,
+  }
@@ -1,11 +1,28 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-from .compare import compare_and_store
+from .analytics import analyze_engagement
+from .compare import compare_and_store, compare_matrix
 from .db import SessionLocal
+from .retrieval import match_regulation
 
 
 def run_compare(evidence_id: str, scenario_id: str) -> Dict[str, Any]:
   with SessionLocal() as session:
     return compare_and_store(session, evidence_id, scenario_id)
+
+
+def run_compare_matrix(evidence_ids: List[str], scenario_ids: List[str]) -> Dict[str, Any]:
+  with SessionLocal() as session:
+    return compare_matrix(session, evidence_ids, scenario_ids)
+
+
+def run_regulation_match(evidence_id: str, regulation_id: str, top_k: Optional[int] = None) -> Dict[str, Any]:
+  with SessionLocal() as session:
+    return match_regulation(session, evidence_id, regulation_id, top_k)
+
+
+def run_amount_analytics(engagement_id: str) -> Dict[str, Any]:
+  with SessionLocal() as session:
+    return analyze_engagement(session, engagement_id)
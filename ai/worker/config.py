@@ -10,3 +10,56 @@ class Config:
   QUEUE_NAME = os.getenv("AI_QUEUE", "ai-tasks")
   DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+psycopg://audit:auditpw@db:5432/auditdb")
   TMP_DIR = os.getenv("AI_TMP", "/tmp/ai")
+  INMEMORY_MAX_BYTES = int(os.getenv("AI_INMEMORY_MAX_BYTES", str(32 * 1024 * 1024)))
+  # Bump when extraction output changes so cached payloads from older pipelines are not reused.
+  PIPELINE_VERSION = os.getenv("AI_PIPELINE_VERSION", "extract-v4")
+  PDF_WORKERS = int(os.getenv("AI_PDF_WORKERS", str(os.cpu_count() or 1)))
+  PDF_PARALLEL_MIN_PAGES = int(os.getenv("AI_PDF_PARALLEL_MIN_PAGES", "40"))
+  PDF_PAGES_PER_CHUNK = int(os.getenv("AI_PDF_PAGES_PER_CHUNK", "16"))
+  OCR_ENGINE = os.getenv("AI_OCR_ENGINE", "raster")
+  OCR_DPI = int(os.getenv("AI_OCR_DPI", "300"))
+  OCR_LANG = os.getenv("AI_OCR_LANG", "ara+eng")
+  OCR_POOL_SIZE = int(os.getenv("AI_OCR_POOL_SIZE", "2"))
+  OCR_ENGINE_MAX_USES = int(os.getenv("AI_OCR_ENGINE_MAX_USES", "500"))
+  TESSDATA_PATH = os.getenv("AI_TESSDATA_PATH", "")
+  BATCH_EXTRACT_WORKERS = int(os.getenv("AI_BATCH_EXTRACT_WORKERS", "2"))
+  BATCH_QUEUE_SIZE = int(os.getenv("AI_BATCH_QUEUE_SIZE", "8"))
+  BATCH_INSERT_SIZE = int(os.getenv("AI_BATCH_INSERT_SIZE", "50"))
+  SPLIT_MIN_PAGES = int(os.getenv("AI_SPLIT_MIN_PAGES", "300"))
+  SPLIT_PAGES_PER_PART = int(os.getenv("AI_SPLIT_PAGES_PER_PART", "50"))
+  SPLIT_PART_TIMEOUT = int(os.getenv("AI_SPLIT_PART_TIMEOUT", "1800"))
+  SPLIT_MERGE_TIMEOUT = int(os.getenv("AI_SPLIT_MERGE_TIMEOUT", "1800"))
+  SPACY_MODEL = os.getenv("AI_SPACY_MODEL", "ar_core_news_sm")
+  PREFORK = os.getenv("AI_PREFORK", "0") == "1"
+  SIMPLE_WORKER = os.getenv("AI_SIMPLE_WORKER", "0") == "1"
+  NER_CHUNK_CHARS = int(os.getenv("AI_NER_CHUNK_CHARS", "20000"))
+  NER_BATCH_SIZE = int(os.getenv("AI_NER_BATCH_SIZE", "16"))
+  NER_PROCESSES = int(os.getenv("AI_NER_PROCESSES", "1"))
+  SCENARIO_CACHE_SIZE = int(os.getenv("AI_SCENARIO_CACHE_SIZE", "128"))
+  SCENARIO_REFRESH_SECONDS = int(os.getenv("AI_SCENARIO_REFRESH_SECONDS", "60"))
+  FINDINGS_COPY_MIN_ROWS = int(os.getenv("AI_FINDINGS_COPY_MIN_ROWS", "500"))
+  FINDING_CONTEXT_CHARS = int(os.getenv("AI_FINDING_CONTEXT_CHARS", "80"))
+  FINDING_MAX_MATCHES = int(os.getenv("AI_FINDING_MAX_MATCHES", "20"))
+  RETRIEVAL_TOP_K = int(os.getenv("AI_RETRIEVAL_TOP_K", "10"))
+  BM25_K1 = float(os.getenv("AI_BM25_K1", "1.5"))
+  BM25_B = float(os.getenv("AI_BM25_B", "0.75"))
+  MINHASH_PERMUTATIONS = int(os.getenv("AI_MINHASH_PERMUTATIONS", "128"))
+  MINHASH_SHINGLE_CHARS = int(os.getenv("AI_MINHASH_SHINGLE_CHARS", "5"))
+  MINHASH_MIN_SHINGLES = int(os.getenv("AI_MINHASH_MIN_SHINGLES", "50"))
+  # 16 bands of 8 rows: pairs near 0.7 Jaccard start colliding, 0.85+ almost always do.
+  LSH_BANDS = int(os.getenv("AI_LSH_BANDS", "16"))
+  NEAR_DUPLICATE_THRESHOLD = float(os.getenv("AI_NEAR_DUPLICATE_THRESHOLD", "0.85"))
+  # Near-duplicates are only linked by default; skipping their compares is opt-in.
+  SKIP_NEAR_DUPLICATE_COMPARES = os.getenv("AI_SKIP_NEAR_DUPLICATE_COMPARES", "0") == "1"
+  # Findings of the amount analytics job are filed under this built-in scenario (created by migration 0015).
+  ANALYTICS_SCENARIO_ID = os.getenv("AI_ANALYTICS_SCENARIO_ID", "00000000-0000-4000-8000-00000000a001")
+  # A power of ten, so the first-digit distribution of what remains is still comparable with Benford's.
+  ANALYTICS_MIN_AMOUNT = float(os.getenv("AI_ANALYTICS_MIN_AMOUNT", "100"))
+  ANALYTICS_FUZZY_AMOUNT_PCT = float(os.getenv("AI_ANALYTICS_FUZZY_AMOUNT_PCT", "0.001"))
+  ANALYTICS_FUZZY_DAYS = int(os.getenv("AI_ANALYTICS_FUZZY_DAYS", "7"))
+  ANALYTICS_FUZZY_WINDOW = int(os.getenv("AI_ANALYTICS_FUZZY_WINDOW", "50"))
+  ANALYTICS_OUTLIER_Z = float(os.getenv("AI_ANALYTICS_OUTLIER_Z", "3.5"))
+  BENFORD_MIN_AMOUNTS = int(os.getenv("AI_BENFORD_MIN_AMOUNTS", "300"))
+  BENFORD_MIN_FILE_AMOUNTS = int(os.getenv("AI_BENFORD_MIN_FILE_AMOUNTS", "3"))
+  # Nigrini's first-digit MAD cut-off for nonconformity.
+  BENFORD_MAD_THRESHOLD = float(os.getenv("AI_BENFORD_MAD_THRESHOLD", "0.015"))
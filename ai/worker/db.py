@@ -1,3 +1,6 @@
+import json
+from typing import Any, Dict, List, Optional
+
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
@@ -7,14 +10,81 @@ engine = create_engine(Config.DATABASE_URL, pool_pre_ping=True, future=True)
 SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, future=True)
 
 
-def insert_extraction(session, evidence_id: str, payload: dict, source_type: str, confidence: float | None):
+def insert_extraction(
+  session,
+  evidence_id: str,
+  payload: dict,
+  source_type: str,
+  confidence: float | None,
+  content_sha256: str | None = None,
+  pipeline_version: str | None = None,
+  search_text: str | None = None,
+):
   session.execute(
     text(
       """
-        INSERT INTO evidence_extractions(evidence_id, json_payload, source_type, confidence)
-        VALUES (:e, :j::jsonb, :s, :c)
+        INSERT INTO evidence_extractions(
+          evidence_id, json_payload, source_type, confidence, content_sha256, pipeline_version, search_text
+        )
+        VALUES (:e, CAST(:j AS jsonb), :s, :c, :h, :v, :t)
       """
     ),
-    {"e": evidence_id, "j": payload, "s": source_type, "c": confidence},
+    {
+      "e": evidence_id,
+      "j": json.dumps(payload),
+      "s": source_type,
+      "c": confidence,
+      "h": content_sha256,
+      "v": pipeline_version,
+      "t": search_text,
+    },
   )
   session.commit()
+
+
+def insert_extractions(session, rows: List[Dict[str, Any]]) -> None:
+  """Insert many extraction rows in one executemany and flag their evidence ready; the caller commits."""
+  if not rows:
+    return
+  session.execute(
+    text(
+      """
+        INSERT INTO evidence_extractions(
+          evidence_id, json_payload, source_type, confidence, content_sha256, pipeline_version, search_text
+        )
+        VALUES (:e, CAST(:j AS jsonb), :s, :c, :h, :v, :t)
+      """
+    ),
+    [
+      {
+        "e": row["evidence_id"],
+        "j": json.dumps(row["payload"]),
+        "s": row["source_type"],
+        "c": row["confidence"],
+        "h": row["content_sha256"],
+        "v": row["pipeline_version"],
+        "t": row["search_text"],
+      }
+      for row in rows
+    ],
+  )
+  session.execute(
+    text("UPDATE evidence SET status = 'ready' WHERE id = ANY(CAST(:ids AS uuid[]))"),
+    {"ids": [row["evidence_id"] for row in rows]},
+  )
+
+
+def find_cached_extraction(session, content_sha256: str, pipeline_version: str) -> Optional[Dict[str, Any]]:
+  row = session.execute(
+    text(
+      """
+        SELECT json_payload, source_type, confidence, search_text
+        FROM evidence_extractions
+        WHERE content_sha256 = :h AND pipeline_version = :v
+        ORDER BY extracted_at DESC
+        LIMIT 1
+      """
+    ),
+    {"h": content_sha256, "v": pipeline_version},
+  ).mappings().first()
+  return dict(row) if row is not None else None
@@ -0,0 +1,168 @@
+"""Near-duplicate detection for evidence with MinHash signatures and LSH banding.
+
+Each extraction's normalized search text is shingled into character k-grams and
+summarized by a MinHash signature, whose agreement rate estimates the Jaccard
+similarity of two documents. Signatures are split into bands; every band is
+hashed to a bucket in `evidence_lsh_buckets`, keyed by engagement, so finding
+candidates is an index lookup on (engagement, band, bucket) however large the
+engagement grows. Only candidates sharing a bucket have their signatures
+compared, and the closest one above `NEAR_DUPLICATE_THRESHOLD` is recorded in
+`evidence_duplicates` as the original.
+"""
+
+import hashlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import text as sql_text
+
+from .config import Config
+from .metrics import incr
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_LOW_32 = np.uint64(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(1_000_003)
+_BLOCK = 8192
+
+
+def _permutations(count: int) -> tuple:
+  # Fixed seed: signatures are persisted and must agree across workers and restarts.
+  rng = np.random.default_rng(0x5EED)
+  a = rng.integers(1, 1 << 32, size=count, dtype=np.uint64)
+  b = rng.integers(0, 1 << 32, size=count, dtype=np.uint64)
+  return a[:, None], b[:, None]
+
+
+_A, _B = _permutations(Config.MINHASH_PERMUTATIONS)
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+  """Distinct 32-bit hashes of the character k-grams of `text`, whitespace collapsed."""
+  size = Config.MINHASH_SHINGLE_CHARS
+  codes = np.frombuffer(" ".join(text.split()).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+  count = len(codes) - size + 1
+  if count <= 0:
+    return np.empty(0, dtype=np.uint64)
+  hashes = np.zeros(count, dtype=np.uint64)
+  for offset in range(size):
+    # Wraps modulo 2**64, which is deterministic and good enough for shingle identity.
+    hashes = hashes * _SHINGLE_BASE + codes[offset:offset + count]
+  return np.unique((hashes ^ (hashes >> np.uint64(32))) & _LOW_32)
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+  """MinHash signature of `text`, or None when it is too short to compare meaningfully."""
+  shingles = shingle_hashes(text)
+  if len(shingles) < Config.MINHASH_MIN_SHINGLES:
+    return None
+  signature = np.full(len(_A), _LOW_32, dtype=np.uint64)
+  for start in range(0, len(shingles), _BLOCK):
+    block = shingles[None, start:start + _BLOCK]
+    # a, b and the shingles are below 2**32, so a * x + b cannot overflow 64 bits.
+    values = ((_A * block + _B) % _MERSENNE_PRIME) & _LOW_32
+    np.minimum(signature, values.min(axis=1), out=signature)
+  return signature.astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+  """One signed 64-bit bucket per LSH band of `signature`."""
+  rows = len(signature) // Config.LSH_BANDS
+  return [
+    int.from_bytes(
+      hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest(), "big", signed=True
+    )
+    for band in range(Config.LSH_BANDS)
+  ]
+
+
+def similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+  """Estimated Jaccard similarity of `signature` to each row of `others`."""
+  return (others == signature).mean(axis=1)
+
+
+def _candidates(session, evidence_id: str, engagement_id: str, buckets: List[int]) -> List[Dict[str, Any]]:
+  rows = session.execute(
+    sql_text(
+      """
+        SELECT DISTINCT b.evidence_id, s.signature, COALESCE(d.original_id, b.evidence_id) AS original_id
+        FROM unnest(CAST(:bands AS int[]), CAST(:buckets AS bigint[])) AS q(band, bucket)
+        JOIN evidence_lsh_buckets b
+          ON b.engagement_id = :engagement_id AND b.band = q.band AND b.bucket = q.bucket
+        JOIN evidence_signatures s ON s.evidence_id = b.evidence_id
+        LEFT JOIN evidence_duplicates d ON d.evidence_id = b.evidence_id
+        WHERE b.evidence_id <> :evidence_id
+      """
+    ),
+    {
+      "bands": list(range(len(buckets))),
+      "buckets": buckets,
+      "engagement_id": engagement_id,
+      "evidence_id": evidence_id,
+    },
+  ).mappings()
+  return [dict(row) for row in rows if str(row["original_id"]) != str(evidence_id)]
+
+
+def _forget(session, evidence_id: str) -> None:
+  for table in ("evidence_duplicates", "evidence_lsh_buckets", "evidence_signatures"):
+    session.execute(sql_text(f"DELETE FROM {table} WHERE evidence_id = :id"), {"id": evidence_id})
+
+
+def record_signature(session, evidence_id: str, search_text: str) -> Optional[Dict[str, Any]]:
+  """Index the signature of `evidence_id` and link it to its closest near-duplicate; the caller commits.
+
+  Returns `{"duplicate_of", "similarity"}` when a near-duplicate exists in the
+  same engagement, otherwise None.
+  """
+  _forget(session, evidence_id)
+  signature = minhash(search_text or "")
+  if signature is None:
+    return None
+  engagement_id = session.execute(
+    sql_text("SELECT engagement_id FROM evidence WHERE id = :id"), {"id": evidence_id}
+  ).scalar()
+  if engagement_id is None:
+    return None
+
+  buckets = band_buckets(signature)
+  candidates = _candidates(session, evidence_id, engagement_id, buckets)
+  duplicate: Optional[Dict[str, Any]] = None
+  if candidates:
+    scores = similarity(signature, np.stack([np.frombuffer(bytes(row["signature"]), dtype=np.uint32) for row in candidates]))
+    best = int(np.argmax(scores))
+    if scores[best] >= Config.NEAR_DUPLICATE_THRESHOLD:
+      duplicate = {"duplicate_of": str(candidates[best]["original_id"]), "similarity": round(float(scores[best]), 4)}
+
+  session.execute(
+    sql_text(
+      """
+        INSERT INTO evidence_signatures(evidence_id, engagement_id, signature)
+        VALUES (:evidence_id, :engagement_id, :signature)
+      """
+    ),
+    {"evidence_id": evidence_id, "engagement_id": engagement_id, "signature": signature.tobytes()},
+  )
+  session.execute(
+    sql_text(
+      """
+        INSERT INTO evidence_lsh_buckets(engagement_id, band, bucket, evidence_id)
+        VALUES (:engagement_id, :band, :bucket, :evidence_id)
+      """
+    ),
+    [
+      {"engagement_id": engagement_id, "band": band, "bucket": bucket, "evidence_id": evidence_id}
+      for band, bucket in enumerate(buckets)
+    ],
+  )
+  if duplicate is not None:
+    session.execute(
+      sql_text(
+        """
+          INSERT INTO evidence_duplicates(evidence_id, original_id, similarity)
+          VALUES (:evidence_id, :original_id, :similarity)
+        """
+      ),
+      {"evidence_id": evidence_id, "original_id": duplicate["duplicate_of"], "similarity": duplicate["similarity"]},
+    )
+    incr("near_duplicates")
+  return duplicate
@@ -1,16 +1,34 @@
 import importlib
 import re
-from typing import Any, Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Pattern, Sequence, Tuple
 
-_nlp: Optional[Any]
-try:
-  spacy_module = importlib.import_module("spacy")
-  _nlp = getattr(spacy_module, "load")("ar_core_news_sm")
-except Exception:  # pragma: no cover - spaCy model optional at runtime
-  _nlp = None
+from .amounts import AMOUNT_TOKEN_PATTERN, amount_at
+from .automaton import KeywordAutomaton
+from .config import Config
 
-_DATE_RX = re.compile(r"\b(20\d{2}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/20\d{2})\b")
-_AMOUNT_RX = re.compile(r"\b(?:(?:QAR|ر\.ق|ريال\sقطري)\s*)?(\d{1,3}(?:[,\.\s]\d{3})*(?:[\.,]\d{1,2})?)\b", re.IGNORECASE)
+_nlp: Optional[Any] = None
+_nlp_loaded = False
+_nlp_lock = threading.Lock()
+
+
+def get_nlp() -> Optional[Any]:
+  """Load the spaCy pipeline on first use; None when spaCy or the model is unavailable."""
+  global _nlp, _nlp_loaded
+  if not _nlp_loaded:
+    with _nlp_lock:
+      if not _nlp_loaded:
+        try:
+          spacy_module = importlib.import_module("spacy")
+          _nlp = getattr(spacy_module, "load")(Config.SPACY_MODEL)
+        except Exception:  # pragma: no cover - spaCy model optional at runtime
+          _nlp = None
+        _nlp_loaded = True
+  return _nlp
+
+
+_DATE_PATTERN = r"\b(?P<date>20\d{2}-\d{2}-\d{2}|\d{1,2}/\d{1,2}/20\d{2})\b"
 _DEPARTMENTS = [
   "المشتريات",
   "الرواتب",
@@ -25,28 +43,80 @@ _DEPARTMENTS = [
 ]
 
 
-def _extract_dates(text: str) -> List[str]:
-  return list({match.group(1) if match.groups() else match.group(0) for match in _DATE_RX.finditer(text)})
+@lru_cache(maxsize=8)
+def _scanner(gazetteer: Tuple[str, ...]) -> Tuple[Pattern[str], KeywordAutomaton]:
+  automaton = KeywordAutomaton(gazetteer)
+  regex = re.compile(f"{_DATE_PATTERN}|(?P<amount>{AMOUNT_TOKEN_PATTERN})|(?P<name>{automaton.pattern})")
+  return regex, automaton
 
 
-def _extract_amounts(text: str) -> List[Dict[str, Any]]:
+def scan_entities(text: str, gazetteer: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+  """Find dates, amounts and gazetteer names in a single traversal of `text`.
+
+  Dates win over amounts at the same offset, so day/month fragments of a date
+  are no longer reported as amounts. Amounts carry their character offsets.
+  """
+  regex, automaton = _scanner(tuple(_DEPARTMENTS if gazetteer is None else gazetteer))
+  dates: Dict[str, None] = {}
   amounts: List[Dict[str, Any]] = []
-  for match in _AMOUNT_RX.finditer(text):
-    raw = match.group(0)
-    numeric = match.group(1).replace(",", "").replace(" ", "")
-    try:
-      value = float(numeric)
-    except ValueError:
+  names: Dict[str, None] = {}
+
+  search = regex.search
+  match = search(text)
+  while match is not None:
+    name = match.group("name")
+    if name is not None:
+      for keyword in automaton.expand(name):
+        names.setdefault(keyword)
+      # Gazetteer names may overlap each other, so resume just after this one's start.
+      match = search(text, match.start() + 1)
       continue
-    currency = "QAR" if ("QAR" in raw.upper() or "ر" in raw) else None
-    amounts.append({"value": value, "currency": currency})
-  return amounts
+    date = match.group("date")
+    if date is not None:
+      dates.setdefault(date)
+    else:
+      amount = amount_at(text, match.start(), match.end())
+      if amount is not None:
+        amounts.append(amount)
+    match = search(text, match.end())
+
+  return {"dates": list(dates), "amounts": amounts, "departments": list(names)}
 
 
-def _extract_departments(text: str) -> List[str]:
-  found = [dept for dept in _DEPARTMENTS if dept in text]
-  if _nlp:
-    doc = _nlp(text[:200000])
+def _chunk_text(text: str, limit: int) -> List[str]:
+  """Split text into chunks of at most `limit` characters, preferring line boundaries."""
+  chunks: List[str] = []
+  current: List[str] = []
+  size = 0
+  for line in text.splitlines(keepends=True):
+    while len(line) > limit:
+      if current:
+        chunks.append("".join(current))
+        current, size = [], 0
+      chunks.append(line[:limit])
+      line = line[limit:]
+    if size + len(line) > limit and current:
+      chunks.append("".join(current))
+      current, size = [], 0
+    current.append(line)
+    size += len(line)
+  if current:
+    chunks.append("".join(current))
+  return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _ner_entities(nlp: Any, text: str) -> List[str]:
+  """Run NER over the whole text in batched chunks with only the components NER needs."""
+  keep = {"ner", "tok2vec", "transformer"}
+  disable = [name for name in getattr(nlp, "pipe_names", []) if name not in keep]
+  docs = nlp.pipe(
+    _chunk_text(text, Config.NER_CHUNK_CHARS),
+    batch_size=Config.NER_BATCH_SIZE,
+    n_process=Config.NER_PROCESSES,
+    disable=disable,
+  )
+  found: List[str] = []
+  for doc in docs:
     for ent in doc.ents:
       if ent.label_ in {"ORG", "FAC", "GPE"} and ent.text not in found:
         found.append(ent.text)
@@ -54,8 +124,30 @@ def _extract_departments(text: str) -> List[str]:
 
 
 def extract_entities(text: str) -> Dict[str, Any]:
-  return {
-    "dates": _extract_dates(text),
-    "amounts": _extract_amounts(text),
-    "departments": _extract_departments(text),
-  }
+  entities = scan_entities(text)
+  nlp = get_nlp()
+  if nlp:
+    for name in _ner_entities(nlp, text):
+      if name not in entities["departments"]:
+        entities["departments"].append(name)
+  return entities
+
+
+def extract_section_entities(texts: List[str]) -> Dict[str, Any]:
+  """Entities over every section; each amount records the index of the section it was found in.
+
+  The pattern scan runs per section so amount offsets stay section-relative;
+  NER runs once over all sections through the same batched pipe.
+  """
+  dates: Dict[str, None] = {}
+  amounts: List[Dict[str, Any]] = []
+  departments: Dict[str, None] = {}
+  for index, text in enumerate(texts):
+    found = scan_entities(text)
+    dates.update(dict.fromkeys(found["dates"]))
+    amounts.extend({**amount, "section": index} for amount in found["amounts"])
+    departments.update(dict.fromkeys(found["departments"]))
+  nlp = get_nlp()
+  if nlp:
+    departments.update(dict.fromkeys(_ner_entities(nlp, "\n".join(texts))))
+  return {"dates": list(dates), "amounts": amounts, "departments": list(departments)}
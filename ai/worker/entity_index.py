@@ -0,0 +1,137 @@
+"""Typed copies of extracted entities for indexed amount, date and department queries.
+
+`enrich_with_entities` keeps entities inside the extraction payload; this module
+mirrors them into `evidence_amounts`, `evidence_dates` and `evidence_departments`
+with numeric values and ISO dates so the API can answer range queries from
+indexes instead of scanning payloads. Rows always reflect the latest extraction.
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text as sql_text
+
+from .config import Config
+from .db import SessionLocal
+
+# `evidence_amounts.value` is NUMERIC(18, 2): anything at or above 10^16 overflows
+# it. Such values come from comma-joined lists of numbers, not from money.
+_MAX_AMOUNT = 10**16
+
+
+def iso_date(raw: str) -> Optional[str]:
+  """ISO form of a `YYYY-MM-DD` or day-first `D/M/YYYY` date; None when it is not a real date."""
+  try:
+    if "/" in raw:
+      day, month, year = (int(part) for part in raw.split("/"))
+    else:
+      year, month, day = (int(part) for part in raw.split("-"))
+    return date(year, month, day).isoformat()
+  except ValueError:
+    return None
+
+
+def entity_rows(evidence_id: str, payload: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+  """Rows for each entity table from one extraction payload."""
+  entities = payload.get("entities") or {}
+  sections = payload.get("sections") or []
+  amounts = []
+  for amount in entities.get("amounts") or []:
+    if not isinstance(amount, dict) or amount.get("value") is None:
+      continue
+    value = round(float(amount["value"]), 2)
+    if not abs(value) < _MAX_AMOUNT:
+      continue
+    section = int(amount.get("section", 0))
+    page = sections[section].get("page") if section < len(sections) and isinstance(sections[section], dict) else None
+    amounts.append(
+      {
+        "evidence_id": evidence_id,
+        "value": value,
+        "currency": amount.get("currency"),
+        "section": section,
+        "page": page,
+        "start_offset": amount.get("start"),
+      }
+    )
+  dates = {iso_date(str(raw)) for raw in entities.get("dates") or []} - {None}
+  departments = {str(name).strip() for name in entities.get("departments") or []} - {""}
+  return {
+    "amounts": amounts,
+    "dates": [{"evidence_id": evidence_id, "value": value} for value in sorted(dates)],
+    "departments": [{"evidence_id": evidence_id, "name": name} for name in sorted(departments)],
+  }
+
+
+_INSERTS = {
+  "amounts": """
+    INSERT INTO evidence_amounts(evidence_id, engagement_id, value, currency, section, page, start_offset)
+    SELECT :evidence_id, engagement_id, :value, :currency, :section, :page, :start_offset FROM evidence WHERE id = :evidence_id
+  """,
+  "dates": """
+    INSERT INTO evidence_dates(evidence_id, engagement_id, value)
+    SELECT :evidence_id, engagement_id, CAST(:value AS date) FROM evidence WHERE id = :evidence_id
+  """,
+  "departments": """
+    INSERT INTO evidence_departments(evidence_id, engagement_id, name)
+    SELECT :evidence_id, engagement_id, :name FROM evidence WHERE id = :evidence_id
+  """,
+}
+
+
+def index_entities(session, extractions: Sequence[Tuple[str, Dict[str, Any]]]) -> int:
+  """Replace the entity rows of each (evidence_id, payload); the caller commits. Returns rows written."""
+  if not extractions:
+    return 0
+  evidence_ids = [str(evidence_id) for evidence_id, _ in extractions]
+  for table in _INSERTS:
+    session.execute(
+      sql_text(f"DELETE FROM evidence_{table} WHERE evidence_id = ANY(CAST(:ids AS uuid[]))"), {"ids": evidence_ids}
+    )
+  rows: Dict[str, List[Dict[str, Any]]] = {table: [] for table in _INSERTS}
+  for evidence_id, payload in extractions:
+    for table, table_rows in entity_rows(str(evidence_id), payload).items():
+      rows[table].extend(table_rows)
+  for table, statement in _INSERTS.items():
+    if rows[table]:
+      session.execute(sql_text(statement), rows[table])
+  return sum(len(table_rows) for table_rows in rows.values())
+
+
+def reindex_entities(engagement_id: Optional[str] = None) -> Dict[str, Any]:
+  """Rebuild entity rows from the latest extraction of every evidence file, or of one engagement.
+
+  Evidence is walked in id order `AI_BATCH_INSERT_SIZE` files at a time, and each
+  page is committed on its own, so only one page of payloads is ever in memory.
+  """
+  scope = "AND engagement_id = :engagement_id" if engagement_id else ""
+  indexed = written = 0
+  after = "00000000-0000-0000-0000-000000000000"
+  with SessionLocal() as session:
+    while True:
+      evidence_ids = [
+        str(row["id"])
+        for row in session.execute(
+          sql_text(f"SELECT id FROM evidence WHERE id > CAST(:after AS uuid) {scope} ORDER BY id LIMIT :limit"),
+          {"after": after, "engagement_id": engagement_id, "limit": max(1, Config.BATCH_INSERT_SIZE)},
+        ).mappings()
+      ]
+      if not evidence_ids:
+        break
+      after = evidence_ids[-1]
+      rows = session.execute(
+        sql_text(
+          """
+            SELECT DISTINCT ON (evidence_id) evidence_id, json_payload
+            FROM evidence_extractions
+            WHERE evidence_id = ANY(CAST(:ids AS uuid[]))
+            ORDER BY evidence_id, extracted_at DESC
+          """
+        ),
+        {"ids": evidence_ids},
+      ).mappings()
+      batch = [(str(row["evidence_id"]), row["json_payload"]) for row in rows if isinstance(row["json_payload"], dict)]
+      written += index_entities(session, batch)
+      indexed += len(batch)
+      session.commit()
+  return {"ok": True, "evidence": indexed, "rows": written}
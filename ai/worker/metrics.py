@@ -0,0 +1,20 @@
+"""Worker counters kept in a Redis hash so savings can be read from the API."""
+
+import redis
+
+from .config import Config
+
+METRICS_KEY = "ai:metrics"
+
+_client: redis.Redis | None = None
+
+
+def incr(name: str, amount: int = 1) -> None:
+  """Best-effort counter increment; metrics never fail a job."""
+  global _client
+  try:
+    if _client is None:
+      _client = redis.from_url(Config.REDIS_URL)
+    _client.hincrby(METRICS_KEY, name, amount)
+  except redis.RedisError:
+    pass
@@ -1,27 +1,97 @@
+import re
 from datetime import datetime, timezone
-from typing import Any, Dict, cast
+from typing import Any, Dict, List, Optional, cast
 
-from .entities import extract_entities
+from .entities import extract_section_entities
 
+# Sections are joined with a form feed in the search text; form feeds inside a
+# section are folded to newlines so the split stays unambiguous.
+SECTION_BREAK = "\f"
 
-def to_uniform_json(evidence_id: str, text: str, source_type: str) -> Dict[str, Any]:
+_SEARCH_TABLE: Dict[int, Any] = {
+  **{code: None for code in range(0x064B, 0x0653)},  # tashkeel: fathatan .. sukun, maddah
+  0x0670: None,  # superscript alef
+  0x0640: None,  # tatweel
+  **{ord(alef): "ا" for alef in "أإآٱ"},
+  ord("ى"): "ي",
+  ord("ی"): "ي",
+  ord("ک"): "ك",
+  ord("ة"): "ه",
+  **{0x0660 + digit: str(digit) for digit in range(10)},
+  **{0x06F0 + digit: str(digit) for digit in range(10)},
+  ord("٬"): ",",
+  ord("٫"): ".",
+  ord(SECTION_BREAK): "\n",
+}
+_DELETED_RX = re.compile("[" + "".join(re.escape(chr(code)) for code, value in _SEARCH_TABLE.items() if value is None) + "]")
+
+
+def normalize_search_text(text: str) -> str:
+  """Fold spelling variants away for matching.
+
+  Strips tashkeel and tatweel, unifies alef forms, maps alef maksura to yeh
+  and ta marbuta to heh, converts Arabic-Indic digits and separators to ASCII
+  and casefolds Latin. Keywords and documents must go through the same
+  function.
+  """
+  return text.translate(_SEARCH_TABLE).casefold()
+
+
+def search_offsets(text: str) -> Optional[List[int]]:
+  """Map every offset of `normalize_search_text(text)` (plus its end) back to an offset in `text`.
+
+  Returns None when normalization left every character in place, which is the
+  usual case for text without diacritics or tatweel.
+  """
+  if len(normalize_search_text(text)) == len(text) and _DELETED_RX.search(text) is None:
+    return None
+  mapping: List[int] = []
+  for position, char in enumerate(text):
+    mapping.extend([position] * len(normalize_search_text(char)))
+  mapping.append(len(text))
+  return mapping
+
+
+def _uniform_payload(evidence_id: str, source_type: str, sections: List[Dict[str, Any]]) -> Dict[str, Any]:
   return {
     "evidence_id": evidence_id,
     "source_type": source_type,
     "extracted_at": datetime.now(timezone.utc).isoformat(),
-    "sections": [{"title": "Full Text", "text": text, "refs": []}],
+    "sections": sections,
     "entities": {"dates": [], "amounts": [], "departments": []},
   }
 
 
-def enrich_with_entities(payload: Dict[str, Any]) -> Dict[str, Any]:
+def to_uniform_json(evidence_id: str, text: str, source_type: str) -> Dict[str, Any]:
+  return _uniform_payload(evidence_id, source_type, [{"title": "Full Text", "text": text, "refs": []}])
+
+
+def to_paged_json(evidence_id: str, pages: List[str], source_type: str) -> Dict[str, Any]:
+  """Uniform payload with one section per page, each carrying its 1-based page number."""
+  sections = [
+    {"title": f"Page {number}", "page": number, "text": page_text, "refs": []}
+    for number, page_text in enumerate(pages, start=1)
+  ]
+  return _uniform_payload(evidence_id, source_type, sections)
+
+
+def section_texts(payload: Dict[str, Any]) -> List[str]:
   sections = payload.get("sections", [])
-  text = ""
-  if isinstance(sections, list) and sections:
-    first = sections[0]
-    if isinstance(first, dict):
-      first_dict = cast(Dict[str, Any], first)
-      raw_text = first_dict.get("text", "")
-      text = raw_text if isinstance(raw_text, str) else str(raw_text)
-  payload["entities"] = extract_entities(text)
+  if not isinstance(sections, list):
+    return []
+  texts: List[str] = []
+  for section in cast(List[Any], sections):
+    if isinstance(section, dict):
+      raw_text = cast(Dict[str, Any], section).get("text", "")
+      texts.append(raw_text if isinstance(raw_text, str) else str(raw_text))
+  return texts
+
+
+def search_text(payload: Dict[str, Any]) -> str:
+  """Normalized text of every section, joined by `SECTION_BREAK`, computed once per extraction."""
+  return SECTION_BREAK.join(normalize_search_text(text) for text in section_texts(payload))
+
+
+def enrich_with_entities(payload: Dict[str, Any]) -> Dict[str, Any]:
+  payload["entities"] = extract_section_entities(section_texts(payload))
   return payload
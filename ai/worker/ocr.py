@@ -1,40 +1,274 @@
 import io
 import json
 import os
+import shutil
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from subprocess import PIPE, CalledProcessError, run
+from typing import BinaryIO, Union
 
 import fitz
 import pdfplumber
 import pytesseract
 from PIL import Image
 
+from .config import Config
+from .tesseract_pool import engine_pool
+
+# A filesystem path, an in-memory PDF buffer, or a seekable binary stream.
+PdfSource = Union[str, bytes, bytearray, BinaryIO]
+
+
+def _open_pdfplumber(source: PdfSource):
+  if isinstance(source, str):
+    return pdfplumber.open(source)
+  if isinstance(source, (bytes, bytearray)):
+    return pdfplumber.open(io.BytesIO(source))
+  source.seek(0)
+  return pdfplumber.open(source)
 
-def is_scanned_pdf(pdf_path: str) -> bool:
-  try:
-    with pdfplumber.open(pdf_path) as pdf:
-      for page in pdf.pages[:2]:
-        if (page.extract_text() or "").strip():
-          return False
-    return True
-  except Exception:
-    return True
 
+def _open_fitz(source: PdfSource):
+  if isinstance(source, str):
+    return fitz.open(source)
+  if isinstance(source, (bytes, bytearray)):
+    return fitz.open(stream=source, filetype="pdf")
+  source.seek(0)
+  return fitz.open(stream=source.read(), filetype="pdf")
 
-def extract_pdf_text(pdf_path: str) -> str:
+
+def _as_path(source: PdfSource, tmp_dir: str) -> str:
+  """Return a filesystem path for tools that need one, writing buffers out only when required."""
+  if isinstance(source, str):
+    return source
+  path = os.path.join(tmp_dir, "source.pdf")
+  with open(path, "wb") as handle:
+    if isinstance(source, (bytes, bytearray)):
+      handle.write(source)
+    else:
+      source.seek(0)
+      shutil.copyfileobj(source, handle)
+  return path
+
+
+def extract_pdf_text(source: PdfSource) -> str:
   out: list[str] = []
   try:
-    with pdfplumber.open(pdf_path) as pdf:
+    with _open_pdfplumber(source) as pdf:
       for page in pdf.pages:
         out.append(page.extract_text() or "")
   except Exception:
-    doc = fitz.open(pdf_path)
-    for page in doc:
-      out.append(page.get_text("text"))
+    with _open_fitz(source) as doc:
+      for page in doc:
+        out.append(page.get_text("text"))
   return "\n".join(out)
 
 
-def ocr_pdf_to_text(pdf_path: str) -> tuple[str, float]:
+def pdf_page_count(source: PdfSource) -> int:
+  try:
+    with _open_fitz(source) as doc:
+      return doc.page_count
+  except Exception:
+    return 0
+
+
+def _extract_page_range(source: PdfSource, start: int = 0, stop: int | None = None) -> list[str]:
+  out: list[str] = []
+  try:
+    with _open_pdfplumber(source) as pdf:
+      for page in pdf.pages[start:stop]:
+        out.append(page.extract_text() or "")
+  except Exception:
+    out = []
+    with _open_fitz(source) as doc:
+      last = doc.page_count if stop is None else min(stop, doc.page_count)
+      for page_no in range(start, last):
+        out.append(doc[page_no].get_text("text"))
+  return out
+
+
+def extract_pdf_pages(source: PdfSource, workers: int | None = None, pages_per_chunk: int | None = None) -> list[str]:
+  """Return the text layer of every page, fanning page ranges out over a process pool."""
+  workers = max(1, workers or Config.PDF_WORKERS)
+  pages_per_chunk = max(1, pages_per_chunk or Config.PDF_PAGES_PER_CHUNK)
+  page_count = pdf_page_count(source)
+  if workers == 1 or page_count <= pages_per_chunk:
+    return _extract_page_range(source)
+  if not isinstance(source, str):
+    # Pool workers reopen the document by path, so in-memory objects are spooled once.
+    os.makedirs(Config.TMP_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=Config.TMP_DIR) as tmp_dir:
+      return _extract_pages_parallel(_as_path(source, tmp_dir), page_count, workers, pages_per_chunk)
+  return _extract_pages_parallel(source, page_count, workers, pages_per_chunk)
+
+
+def _extract_pages_parallel(path: str, page_count: int, workers: int, pages_per_chunk: int) -> list[str]:
+  starts = list(range(0, page_count, pages_per_chunk))
+  stops = [min(start + pages_per_chunk, page_count) for start in starts]
+  with ProcessPoolExecutor(max_workers=min(workers, len(starts))) as pool:
+    # map() yields in submission order, so pages come back in document order.
+    parts = list(pool.map(_extract_page_range, repeat(path), starts, stops))
+  return [page for part in parts for page in part]
+
+
+def extract_pdf_text_parallel(source: PdfSource, workers: int | None = None, pages_per_chunk: int | None = None) -> str:
+  """Extract text like `extract_pdf_text`, fanning page ranges out over a process pool."""
+  return "\n".join(extract_pdf_pages(source, workers, pages_per_chunk))
+
+
+def _page_spec(page_numbers: list[int]) -> str:
+  """Render zero-based page numbers as an ocrmypdf `--pages` spec, e.g. `1-3,7`."""
+  ranges: list[str] = []
+  numbers = sorted(set(page_numbers))
+  start = prev = numbers[0]
+  for number in numbers[1:] + [None]:
+    if number is not None and number == prev + 1:
+      prev = number
+      continue
+    ranges.append(f"{start + 1}" if start == prev else f"{start + 1}-{prev + 1}")
+    if number is not None:
+      start = prev = number
+  return ",".join(ranges)
+
+
+def _ocrmypdf_pages(source: PdfSource, page_numbers: list[int]) -> dict[int, tuple[str, float]]:
+  with tempfile.TemporaryDirectory() as tmp_dir:
+    out_pdf = os.path.join(tmp_dir, "ocr.pdf")
+    try:
+      run(
+        [
+          "ocrmypdf",
+          "--force-ocr",
+          "--pages",
+          _page_spec(page_numbers),
+          "--language",
+          Config.OCR_LANG,
+          "--optimize",
+          "1",
+          _as_path(source, tmp_dir),
+          out_pdf,
+        ],
+        stdout=PIPE,
+        stderr=PIPE,
+        check=True,
+        text=True,
+      )
+    except CalledProcessError:
+      return {number: ("", 0.50) for number in page_numbers}
+    with pdfplumber.open(out_pdf) as pdf:
+      return {number: (pdf.pages[number].extract_text() or "", 0.90) for number in page_numbers}
+
+
+def _tesseract_image(img: Image.Image) -> tuple[str, float]:
+  """OCR one image and return its text with the mean word confidence (0-1).
+
+  Uses a pooled, pre-loaded engine when available; otherwise, or when that
+  engine fails, runs tesseract once and rebuilds the text from its TSV output.
+  If tesseract fails too the page comes back empty with confidence 0, like the
+  ocrmypdf path, instead of failing the job.
+  """
+  pool = engine_pool()
+  if pool is not None:
+    try:
+      with pool.acquire() as api:
+        api.SetImage(img)
+        text = api.GetUTF8Text().strip()
+        confidences = [float(conf) for conf in api.AllWordConfidences()]
+    except RuntimeError:
+      # The pool has already discarded the engine; retry this image through the CLI.
+      pass
+    else:
+      confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+      return text, round(confidence, 2)
+
+  try:
+    data = pytesseract.image_to_data(img, lang=Config.OCR_LANG, output_type=pytesseract.Output.DICT)
+  except (pytesseract.TesseractError, OSError):
+    return "", 0.0
+  lines: dict[tuple[int, int, int], list[str]] = {}
+  confidences = []
+  for index, word in enumerate(data["text"]):
+    conf = float(data["conf"][index])
+    if conf < 0 or not str(word).strip():
+      continue
+    key = (data["block_num"][index], data["par_num"][index], data["line_num"][index])
+    lines.setdefault(key, []).append(str(word))
+    confidences.append(conf)
+  text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+  confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+  return text, round(confidence, 2)
+
+
+def _raster_pdf_pages(source: PdfSource, page_numbers: list[int], dpi: int) -> dict[int, tuple[str, float]]:
+  results: dict[int, tuple[str, float]] = {}
+  with _open_fitz(source) as doc:
+    for number in page_numbers:
+      pix = doc[number].get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+      img = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+      results[number] = _tesseract_image(img)
+  return results
+
+
+def ocr_pdf_pages(source: PdfSource, page_numbers: list[int], dpi: int | None = None) -> dict[int, tuple[str, float]]:
+  """OCR the given zero-based pages and return `(text, confidence)` keyed by page number.
+
+  Pages are rasterized with PyMuPDF and fed straight to tesseract; set
+  `AI_OCR_ENGINE=ocrmypdf` to fall back to the ocrmypdf round trip.
+  """
+  if not page_numbers:
+    return {}
+  if Config.OCR_ENGINE == "ocrmypdf":
+    return _ocrmypdf_pages(source, page_numbers)
+  return _raster_pdf_pages(source, page_numbers, dpi or Config.OCR_DPI)
+
+
+def analyze_pdf_range(source: PdfSource, start: int = 0, stop: int | None = None) -> tuple[list[str], list[float]]:
+  """Return per-page text and confidence for pages `[start, stop)`, OCR'ing only image-only pages.
+
+  Pages with a text layer are scored 0.75 as before; OCR'd pages carry their
+  OCR confidence.
+  """
+  if start == 0 and stop is None and pdf_page_count(source) >= Config.PDF_PARALLEL_MIN_PAGES:
+    pages = extract_pdf_pages(source)
+  else:
+    pages = _extract_page_range(source, start, stop)
+
+  confidences = [0.75] * len(pages)
+  scanned = [start + offset for offset, page_text in enumerate(pages) if not page_text.strip()]
+  for number, (page_text, page_confidence) in ocr_pdf_pages(source, scanned).items():
+    pages[number - start] = page_text
+    confidences[number - start] = page_confidence
+  return pages, confidences
+
+
+def analyze_pdf_pages(source: PdfSource) -> tuple[list[str], float]:
+  """Classify each page in one pass and OCR only the image-only pages; returns pages in order.
+
+  The document confidence is the per-page mean.
+  """
+  pages, confidences = analyze_pdf_range(source)
+  if not pages:
+    text, confidence = ocr_pdf_to_text(source)
+    return [text], confidence
+  return pages, round(sum(confidences) / len(confidences), 2)
+
+
+def analyze_pdf(source: PdfSource) -> tuple[str, float]:
+  """Like `analyze_pdf_pages`, with the pages merged into one text."""
+  pages, confidence = analyze_pdf_pages(source)
+  return "\n".join(pages), confidence
+
+
+def ocr_pdf_to_text(source: PdfSource) -> tuple[str, float]:
+  if Config.OCR_ENGINE != "ocrmypdf":
+    page_count = pdf_page_count(source)
+    if not page_count:
+      return "", 0.0
+    results = ocr_pdf_pages(source, list(range(page_count)))
+    text = "\n".join(results[number][0] for number in range(page_count))
+    return text, round(sum(conf for _, conf in results.values()) / page_count, 2)
+
   with tempfile.TemporaryDirectory() as tmp_dir:
     out_pdf = os.path.join(tmp_dir, "ocr.pdf")
     try:
@@ -42,12 +276,11 @@ def ocr_pdf_to_text(pdf_path: str) -> tuple[str, float]:
         [
           "ocrmypdf",
           "--force-ocr",
-          "--skip-text",
           "--language",
-          "ara+eng",
+          Config.OCR_LANG,
           "--optimize",
           "1",
-          pdf_path,
+          _as_path(source, tmp_dir),
           out_pdf,
         ],
         stdout=PIPE,
@@ -56,12 +289,10 @@ def ocr_pdf_to_text(pdf_path: str) -> tuple[str, float]:
         text=True,
       )
     except CalledProcessError:
-      return extract_pdf_text(pdf_path), 0.50
+      return extract_pdf_text(source), 0.50
     return extract_pdf_text(out_pdf), 0.90
 
 
-def ocr_image_to_text(img_bytes: bytes) -> tuple[str, float]:
-  img = Image.open(io.BytesIO(img_bytes))
-  txt = pytesseract.image_to_string(img, lang="ara+eng")
-  confidence = 0.80 if len(txt) > 20 else 0.40
-  return txt, confidence
+def ocr_image_to_text(image: Union[bytes, bytearray, BinaryIO]) -> tuple[str, float]:
+  img = Image.open(io.BytesIO(image) if isinstance(image, (bytes, bytearray)) else image)
+  return _tesseract_image(img)
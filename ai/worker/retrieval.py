@@ -0,0 +1,301 @@
+"""BM25 retrieval of regulation chunks for an evidence extraction.
+
+Each regulation gets an inverted index over its `regulation_chunks`, built from
+Arabic-normalized tokens and held as a sparse chunk x term matrix of term
+frequencies. Scoring an extraction turns every section (page) into a binary
+query row and multiplies the query matrix by the precomputed BM25 weight
+matrix, so all pages are scored against all chunks in one sparse product.
+
+Indexes are cached per worker process and persisted in `regulation_indexes`
+so other workers and restarts reuse them. Chunks carry a `seq` watermark: an
+index only tokenizes chunks added since it was built and is rebuilt from
+scratch when chunks disappeared or arrived out of order.
+"""
+
+import io
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import text as sql_text
+
+from .config import Config
+from .normalize import normalize_search_text, section_texts
+
+_TOKEN_RX = re.compile(r"[^\W_]{2,}")
+_ARTICLE_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+_STOPWORDS = frozenset(
+  normalize_search_text(word)
+  for word in (
+    "في من على إلى الى عن مع أن ان إن التي الذي الذين هذا هذه ذلك تلك كما أو او ثم قد لا ما لم لن كل أي بين "
+    "وفق حسب عند غير بعد قبل حتى هو هي هم تم يتم"
+  ).split()
+) | frozenset("the of and or to in on for by with a an is are be as at from that this".split())
+
+
+def tokenize(text: str) -> List[str]:
+  """Normalized tokens with stopwords dropped and the Arabic definite article stripped."""
+  tokens: List[str] = []
+  for token in _TOKEN_RX.findall(normalize_search_text(text)):
+    if token in _STOPWORDS:
+      continue
+    for prefix in _ARTICLE_PREFIXES:
+      if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+        token = token[len(prefix):]
+        break
+    tokens.append(token)
+  return tokens
+
+
+class RegulationIndex:
+  """Term-frequency matrix of one regulation's chunks plus what BM25 needs to score against it."""
+
+  def __init__(
+    self,
+    vocabulary: Dict[str, int],
+    term_counts: sparse.csr_matrix,
+    chunk_ids: List[str],
+    section_refs: List[Optional[str]],
+    max_seq: int,
+  ) -> None:
+    self.vocabulary = vocabulary
+    self.term_counts = term_counts
+    self.chunk_ids = chunk_ids
+    self.section_refs = section_refs
+    self.max_seq = max_seq
+    self._weights: Optional[sparse.csr_matrix] = None
+
+  @classmethod
+  def empty(cls) -> "RegulationIndex":
+    return cls({}, sparse.csr_matrix((0, 0), dtype=np.float32), [], [], 0)
+
+  def add_chunks(self, chunks: List[Dict[str, Any]]) -> None:
+    """Append chunks (dicts with id, section_ref, text, seq) to the index."""
+    if not chunks:
+      return
+    rows: List[int] = []
+    cols: List[int] = []
+    for row, chunk in enumerate(chunks):
+      for token in tokenize(chunk["text"]):
+        rows.append(row)
+        cols.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+    # Duplicate (row, col) pairs are summed into term frequencies on conversion.
+    added = sparse.csr_matrix(
+      (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+      shape=(len(chunks), len(self.vocabulary)),
+    )
+    existing = self.term_counts
+    existing.resize((existing.shape[0], len(self.vocabulary)))
+    self.term_counts = sparse.vstack([existing, added], format="csr")
+    self.chunk_ids.extend(str(chunk["id"]) for chunk in chunks)
+    self.section_refs.extend(chunk.get("section_ref") for chunk in chunks)
+    self.max_seq = max(self.max_seq, *(int(chunk["seq"]) for chunk in chunks))
+    self._weights = None
+
+  def weights(self) -> sparse.csr_matrix:
+    """BM25 term weights per chunk: idf(t) * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avglen))."""
+    if self._weights is None:
+      k1, b = Config.BM25_K1, Config.BM25_B
+      counts = self.term_counts.tocsr()
+      chunk_count = counts.shape[0]
+      lengths = np.asarray(counts.sum(axis=1)).ravel()
+      average = lengths.mean() if chunk_count and lengths.mean() > 0 else 1.0
+      document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+      idf = np.log1p((chunk_count - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+      norms = (k1 * (1 - b + b * lengths / average)).astype(np.float32)
+      tf = counts.data
+      row_of_entry = np.repeat(np.arange(chunk_count), np.diff(counts.indptr))
+      data = idf[counts.indices] * tf * (k1 + 1) / (tf + norms[row_of_entry])
+      self._weights = sparse.csr_matrix((data, counts.indices, counts.indptr), shape=counts.shape)
+    return self._weights
+
+  def query_matrix(self, texts: List[str]) -> sparse.csr_matrix:
+    """One binary row per text over the index vocabulary; unknown terms are dropped."""
+    rows: List[int] = []
+    cols: List[int] = []
+    for row, text in enumerate(texts):
+      for term in {self.vocabulary.get(token) for token in tokenize(text)} - {None}:
+        rows.append(row)
+        cols.append(term)
+    return sparse.csr_matrix(
+      (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+      shape=(len(texts), len(self.vocabulary)),
+    )
+
+  def top_chunks(self, texts: List[str], top_k: int) -> List[Dict[str, Any]]:
+    """Score every chunk against every text and keep the `top_k` chunks by their best-matching text."""
+    if not self.chunk_ids or not texts:
+      return []
+    scores = (self.query_matrix(texts) @ self.weights().T).toarray()
+    best = scores.max(axis=0)
+    best_text = scores.argmax(axis=0)
+    count = min(top_k, int(np.count_nonzero(best)))
+    if count <= 0:
+      return []
+    top = np.argpartition(-best, count - 1)[:count]
+    top = top[np.argsort(-best[top], kind="stable")]
+    return [
+      {
+        "chunk_id": self.chunk_ids[chunk],
+        "section_ref": self.section_refs[chunk],
+        "section": int(best_text[chunk]),
+        "score": round(float(best[chunk]), 4),
+      }
+      for chunk in top
+    ]
+
+  def to_bytes(self) -> bytes:
+    counts = self.term_counts.tocsr()
+    buffer = io.BytesIO()
+    np.savez_compressed(
+      buffer,
+      indptr=counts.indptr,
+      indices=counts.indices,
+      data=counts.data,
+      shape=np.array(counts.shape),
+      meta=np.frombuffer(
+        json.dumps(
+          {
+            "vocabulary": self.vocabulary,
+            "chunk_ids": self.chunk_ids,
+            "section_refs": self.section_refs,
+            "max_seq": self.max_seq,
+          }
+        ).encode(),
+        dtype=np.uint8,
+      ),
+    )
+    return buffer.getvalue()
+
+  @classmethod
+  def from_bytes(cls, blob: bytes) -> "RegulationIndex":
+    with np.load(io.BytesIO(blob), allow_pickle=False) as arrays:
+      counts = sparse.csr_matrix(
+        (arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(int(size) for size in arrays["shape"])
+      )
+      meta = json.loads(arrays["meta"].tobytes().decode())
+    return cls(meta["vocabulary"], counts, meta["chunk_ids"], meta["section_refs"], int(meta["max_seq"]))
+
+
+_indexes: Dict[str, RegulationIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _load_chunks(session, regulation_id: str, after_seq: int) -> List[Dict[str, Any]]:
+  rows = session.execute(
+    sql_text(
+      """
+        SELECT id, section_ref, text, seq
+        FROM regulation_chunks
+        WHERE regulation_id = :regulation_id AND seq > :after_seq
+        ORDER BY seq
+      """
+    ),
+    {"regulation_id": regulation_id, "after_seq": after_seq},
+  ).mappings()
+  return [dict(row) for row in rows]
+
+
+def _persist(session, regulation_id: str, index: RegulationIndex) -> None:
+  session.execute(
+    sql_text(
+      """
+        INSERT INTO regulation_indexes(regulation_id, max_seq, chunk_count, data)
+        VALUES (:regulation_id, :max_seq, :chunk_count, :data)
+        ON CONFLICT (regulation_id) DO UPDATE
+        SET max_seq = EXCLUDED.max_seq, chunk_count = EXCLUDED.chunk_count, data = EXCLUDED.data, updated_at = now()
+      """
+    ),
+    {
+      "regulation_id": regulation_id,
+      "max_seq": index.max_seq,
+      "chunk_count": len(index.chunk_ids),
+      "data": index.to_bytes(),
+    },
+  )
+
+
+def load_index(session, regulation_id: str) -> RegulationIndex:
+  """Return an up-to-date index for `regulation_id`, building or extending it only as needed."""
+  state = session.execute(
+    sql_text("SELECT count(*) AS chunk_count, COALESCE(max(seq), 0) AS max_seq FROM regulation_chunks WHERE regulation_id = :id"),
+    {"id": regulation_id},
+  ).mappings().one()
+  chunk_count, max_seq = int(state["chunk_count"]), int(state["max_seq"])
+
+  with _indexes_lock:
+    index = _indexes.get(regulation_id)
+  if index is None:
+    stored = session.execute(
+      sql_text("SELECT data FROM regulation_indexes WHERE regulation_id = :id"), {"id": regulation_id}
+    ).scalar()
+    index = RegulationIndex.from_bytes(bytes(stored)) if stored is not None else RegulationIndex.empty()
+
+  if (len(index.chunk_ids), index.max_seq) != (chunk_count, max_seq):
+    added = _load_chunks(session, regulation_id, index.max_seq)
+    if len(index.chunk_ids) + len(added) != chunk_count:
+      # Chunks were removed or committed below the watermark: start over.
+      index = RegulationIndex.empty()
+      added = _load_chunks(session, regulation_id, 0)
+    index.add_chunks(added)
+    _persist(session, regulation_id, index)
+    session.commit()
+
+  with _indexes_lock:
+    _indexes[regulation_id] = index
+  return index
+
+
+def match_regulation(session, evidence_id: str, regulation_id: str, top_k: Optional[int] = None) -> Dict[str, Any]:
+  """Score the latest extraction of `evidence_id` against `regulation_id` and store the top-k chunks."""
+  extraction = session.execute(
+    sql_text(
+      """
+        SELECT json_payload
+        FROM evidence_extractions
+        WHERE evidence_id = :evidence_id
+        ORDER BY extracted_at DESC
+        LIMIT 1
+      """
+    ),
+    {"evidence_id": evidence_id},
+  ).mappings().first()
+  if extraction is None or not isinstance(extraction["json_payload"], dict):
+    return {"ok": False, "error": "no_extraction"}
+
+  payload = extraction["json_payload"]
+  index = load_index(session, regulation_id)
+  sections = payload.get("sections", [])
+  pages = [section.get("page") if isinstance(section, dict) else None for section in sections]
+  matches = index.top_chunks(section_texts(payload), top_k or Config.RETRIEVAL_TOP_K)
+
+  session.execute(
+    sql_text("DELETE FROM evidence_regulation_matches WHERE evidence_id = :evidence_id AND regulation_id = :regulation_id"),
+    {"evidence_id": evidence_id, "regulation_id": regulation_id},
+  )
+  if matches:
+    session.execute(
+      sql_text(
+        """
+          INSERT INTO evidence_regulation_matches(evidence_id, regulation_id, chunk_id, rank, score, section, page)
+          VALUES (:evidence_id, :regulation_id, :chunk_id, :rank, :score, :section, :page)
+        """
+      ),
+      [
+        {
+          "evidence_id": evidence_id,
+          "regulation_id": regulation_id,
+          "chunk_id": match["chunk_id"],
+          "rank": rank,
+          "score": match["score"],
+          "section": match["section"],
+          "page": pages[match["section"]] if match["section"] < len(pages) else None,
+        }
+        for rank, match in enumerate(matches, start=1)
+      ],
+    )
+  session.commit()
+  return {"ok": True, "chunks": len(index.chunk_ids), "matches": matches}
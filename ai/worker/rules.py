@@ -0,0 +1,350 @@
+"""Scenario rule language, compiled once and evaluated against a shared hit index.
+
+A check in `rules.checks` may combine any of these conditions:
+
+    {
+      "id": "PO-01",
+      "severity": "high",
+      "any": ["موافقة", "approval"],            # fires when one keyword is present
+      "all": ["أمر شراء", "فاتورة"],             # fires when one keyword is missing
+      "regex": ["po[- ]?\\d{6}"],                # fires when a pattern matches
+      "near": [{"terms": ["موافقة", "المدير"], "within": 5}],  # all terms within N words
+      "amount": {"min": 50000, "max": null, "currency": "QAR"},  # on entities.amounts
+      "section": "Full Text",                    # only look at sections with exactly this title
+      "page": [1, 2],                            # only look at these pages of a paged document
+      "match": "any"                             # "any" condition (default) or "all" of them
+    }
+
+Extraction titles its sections "Full Text" or "Page N", and paged sections
+carry their page number. A check whose scope selects no section of a document
+raises no finding there. Keywords, proximity terms and section titles are
+compared in their `normalize_search_text` form. Regexes run case-insensitively over the same
+normalized text, so they see ASCII digits and casefolded Latin.
+
+Every keyword and proximity term of a scenario goes into one automaton, so a
+document is scanned once for all of them; each distinct regex scans it once
+more and is shared by every check that uses it. Word positions for proximity
+rules are only computed when a scenario has such a rule.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Pattern, Set, Tuple, cast
+
+from .automaton import KeywordAutomaton
+from .config import Config
+from .normalize import SECTION_BREAK, normalize_search_text, search_offsets, section_texts
+
+_WORD_RX = re.compile(r"\w+")
+
+Span = Tuple[int, int]
+
+
+def _strings(value: Any) -> List[str]:
+  if isinstance(value, str):
+    return [value]
+  if isinstance(value, list):
+    return [item for item in cast(List[Any], value) if isinstance(item, str)]
+  return []
+
+
+def _number(value: Any) -> Optional[float]:
+  if isinstance(value, bool) or not isinstance(value, (int, float)):
+    return None
+  return float(value)
+
+
+class HitIndex:
+  """Everything checks ask about one document, gathered in a single scan.
+
+  `positions` maps each normalized keyword to its sorted offsets in the search
+  text, `regex_hits` maps each regex source to its match offsets, and sections
+  are `[start, end)` spans of the search text. `locate` turns a search-text
+  span back into a position and context window in the original section text.
+  """
+
+  def __init__(
+    self,
+    search_text: str,
+    automaton: KeywordAutomaton,
+    regexes: Dict[str, Pattern[str]],
+    payload: Optional[Dict[str, Any]] = None,
+  ) -> None:
+    self.text = search_text
+    self.positions: Dict[str, List[int]] = {}
+    for offset, keyword in automaton.finditer(search_text):
+      self.positions.setdefault(keyword, []).append(offset)
+    self.regex_hits: Dict[str, List[int]] = {}
+    self.regex_ends: Dict[Tuple[str, int], int] = {}
+    for source, rx in regexes.items():
+      starts = self.regex_hits[source] = []
+      for match in rx.finditer(search_text):
+        starts.append(match.start())
+        self.regex_ends[(source, match.start())] = match.end()
+
+    payload = payload or {}
+    self.spans: List[Span] = []
+    start = 0
+    for part in search_text.split(SECTION_BREAK):
+      self.spans.append((start, start + len(part)))
+      start += len(part) + len(SECTION_BREAK)
+    self._starts = [span[0] for span in self.spans]
+    sections = payload.get("sections", [])
+    titles = [section.get("title", "") for section in sections if isinstance(section, dict)] if isinstance(sections, list) else []
+    self.titles = [normalize_search_text(str(title)) for title in titles]
+    self.pages = [section.get("page") for section in sections if isinstance(section, dict)] if isinstance(sections, list) else []
+    self.texts = section_texts(payload)
+    self._offset_maps: Dict[int, Optional[List[int]]] = {}
+    entities = payload.get("entities", {})
+    amounts = entities.get("amounts", []) if isinstance(entities, dict) else []
+    self.amounts: List[Dict[str, Any]] = [amount for amount in amounts if isinstance(amount, dict)]
+    self._word_starts: Optional[List[int]] = None
+
+  def scope(self, section: Optional[str], pages: Optional[Set[int]] = None) -> Optional[List[int]]:
+    """Indexes of the sections titled `section` and on one of `pages`; None means the whole document."""
+    if not section and not pages:
+      return None
+    return [
+      number
+      for number, title in enumerate(self.titles)
+      if (not section or title == section)
+      and (not pages or (number < len(self.pages) and self.pages[number] in pages))
+    ]
+
+  def offsets(self, offsets: List[int], sections: Optional[List[int]]) -> List[int]:
+    """The subset of sorted `offsets` that falls inside `sections`."""
+    if sections is None:
+      return offsets
+    found: List[int] = []
+    for number in sections:
+      if number < len(self.spans):
+        start, end = self.spans[number]
+        found.extend(offsets[bisect_left(offsets, start):bisect_left(offsets, end)])
+    return found
+
+  def section_at(self, offset: int) -> int:
+    return bisect_right(self._starts, offset) - 1
+
+  def word_at(self, offset: int) -> int:
+    if self._word_starts is None:
+      self._word_starts = [match.start() for match in _WORD_RX.finditer(self.text)]
+    return bisect_right(self._word_starts, offset) - 1
+
+  def context(self, section: int, start: int, end: int, label: str) -> Dict[str, Any]:
+    """A match at `[start, end)` of the original text of `section`, with a context window around it."""
+    text = self.texts[section] if section < len(self.texts) else ""
+    radius = Config.FINDING_CONTEXT_CHARS
+    return {
+      "match": label,
+      "section": section,
+      "page": self.pages[section] if section < len(self.pages) else None,
+      "start": start,
+      "end": end,
+      "context": text[max(0, start - radius):end + radius],
+    }
+
+  def locate(self, start: int, end: int, label: str) -> Dict[str, Any]:
+    """Map a `[start, end)` span of the search text back onto the original section text."""
+    section = self.section_at(start)
+    base = self.spans[section][0]
+    start, end = start - base, end - base
+    if section < len(self.texts):
+      if section not in self._offset_maps:
+        self._offset_maps[section] = search_offsets(self.texts[section])
+      mapping = self._offset_maps[section]
+      if mapping is not None:
+        start, end = mapping[min(start, len(mapping) - 1)], mapping[min(end, len(mapping) - 1)]
+    return self.context(section, start, end, label)
+
+
+def _window_within(events: List[Tuple[int, str, int]], needed: int, within: int) -> Optional[Span]:
+  """Search-text span of a window of at most `within` words holding all `needed` distinct terms, if any.
+
+  `events` are `(word, term, offset)` hits sorted by word position.
+  """
+  counts: Dict[str, int] = {}
+  left = 0
+  for word, term, offset in events:
+    counts[term] = counts.get(term, 0) + 1
+    while len(counts) == needed:
+      if word - events[left][0] <= within:
+        return events[left][2], offset + len(term)
+      left_term = events[left][1]
+      counts[left_term] -= 1
+      if not counts[left_term]:
+        del counts[left_term]
+      left += 1
+  return None
+
+
+class CompiledCheck:
+  def __init__(self, check: Dict[str, Any], number: int = 1) -> None:
+    # Findings are keyed by check id, so a check without one is named after its position.
+    self.check_id = str(check.get("id") or f"RULE-{number}")
+    self.any_keywords = [str(item) for item in check.get("any", []) if isinstance(item, str)]
+    self.all_keywords = [str(item) for item in check.get("all", []) if isinstance(item, str)]
+    self.severity = str(check.get("severity", "medium"))
+    self.search_keys = {
+      keyword: normalize_search_text(keyword) for keyword in (*self.any_keywords, *self.all_keywords)
+    }
+
+    self.regexes: Dict[str, Pattern[str]] = {}
+    for source in _strings(check.get("regex")):
+      try:
+        self.regexes[source] = re.compile(source, re.IGNORECASE)
+      except re.error as exc:
+        raise ValueError(f"{self.check_id}: invalid regex {source!r}: {exc}") from exc
+
+    self.near: List[Tuple[List[str], List[str], int]] = []
+    raw_near = check.get("near", [])
+    for rule in cast(List[Any], raw_near if isinstance(raw_near, list) else [raw_near]):
+      if not isinstance(rule, dict):
+        continue
+      terms = _strings(rule.get("terms"))
+      within = rule.get("within", 10)
+      if len(terms) < 2 or not isinstance(within, int) or within < 0:
+        raise ValueError(f"{self.check_id}: near needs at least two terms and a non-negative 'within'")
+      self.near.append((terms, [normalize_search_text(term) for term in terms], within))
+
+    raw_amount = check.get("amount")
+    self.amount: Optional[Dict[str, Any]] = None
+    if isinstance(raw_amount, dict):
+      amount_rule = cast(Dict[str, Any], raw_amount)
+      self.amount = {
+        "min": _number(amount_rule.get("min")),
+        "max": _number(amount_rule.get("max")),
+        "currency": amount_rule.get("currency"),
+      }
+
+    section = check.get("section")
+    self.section = normalize_search_text(section) if isinstance(section, str) and section else None
+    raw_pages = check.get("page")
+    pages = cast(List[Any], raw_pages if isinstance(raw_pages, list) else [] if raw_pages is None else [raw_pages])
+    if any(isinstance(page, bool) or not isinstance(page, int) for page in pages):
+      raise ValueError(f"{self.check_id}: page must be a page number or a list of them")
+    self.pages: Set[int] = set(pages)
+    self.match_all = check.get("match") == "all"
+
+  @property
+  def keywords(self) -> Set[str]:
+    return {*self.search_keys.values(), *(key for _, keys, _ in self.near for key in keys)}
+
+  def _near_matches(self, index: HitIndex, sections: Optional[List[int]]) -> List[Tuple[List[str], Span]]:
+    matched: List[Tuple[List[str], Span]] = []
+    for terms, keys, within in self.near:
+      events = sorted(
+        (index.word_at(offset), key, offset)
+        for key in set(keys)
+        for offset in index.offsets(index.positions.get(key, []), sections)
+      )
+      window = _window_within(events, len(set(keys)), within)
+      if window is not None:
+        matched.append((terms, window))
+    return matched
+
+  def _amounts(self, index: HitIndex, sections: Optional[List[int]]) -> List[Dict[str, Any]]:
+    if self.amount is None:
+      return []
+    low, high, currency = self.amount["min"], self.amount["max"], self.amount["currency"]
+    found: List[Dict[str, Any]] = []
+    for amount in index.amounts:
+      value = _number(amount.get("value"))
+      if value is None or (currency and amount.get("currency") != currency):
+        continue
+      if sections is not None and amount.get("section", 0) not in sections:
+        continue
+      if (low is None or value >= low) and (high is None or value <= high):
+        found.append(amount)
+    return found
+
+  def evaluate(self, index: HitIndex) -> Dict[str, Any]:
+    """Decide the check from a document's hit index.
+
+    `triggered` says whether it raises a finding, `sections` lists the indexes
+    of the sections holding the hits that made it fire and, for triggered
+    checks, `matches` gives up to `AI_FINDING_MAX_MATCHES` of those hits with
+    their offsets and a context window from the original text.
+    """
+    sections = index.scope(self.section, self.pages)
+    if sections == []:
+      # Out of scope: an `all` check would otherwise report every keyword missing.
+      return {"triggered": False, "sections": []}
+    scoped = {key: index.offsets(offsets, sections) for key, offsets in index.positions.items()}
+    present = {key for key, offsets in scoped.items() if offsets}
+    hits: List[Tuple[int, int, str]] = []
+    amount_hits: List[Dict[str, Any]] = []
+
+    outcome: Dict[str, Any] = {
+      "matched_any": [keyword for keyword in self.any_keywords if self.search_keys[keyword] in present],
+      "missing_all": [keyword for keyword in self.all_keywords if self.search_keys[keyword] not in present],
+    }
+    for keyword in outcome["matched_any"]:
+      key = self.search_keys[keyword]
+      hits.extend((offset, offset + len(key), keyword) for offset in scoped[key])
+    fired = [bool(outcome["matched_any"]) if self.any_keywords else None]
+    fired.append(bool(outcome["missing_all"]) if self.all_keywords else None)
+    if self.regexes:
+      outcome["matched_regex"] = []
+      for source in self.regexes:
+        offsets = index.offsets(index.regex_hits.get(source, []), sections)
+        if offsets:
+          outcome["matched_regex"].append(source)
+          hits.extend((offset, index.regex_ends[(source, offset)], source) for offset in offsets)
+      fired.append(bool(outcome["matched_regex"]))
+    if self.near:
+      near = self._near_matches(index, sections)
+      outcome["matched_near"] = [terms for terms, _ in near]
+      hits.extend((start, end, " ~ ".join(terms)) for terms, (start, end) in near)
+      fired.append(bool(near))
+    if self.amount is not None:
+      amount_hits = self._amounts(index, sections)
+      outcome["amounts"] = [amount["value"] for amount in amount_hits]
+      fired.append(bool(amount_hits))
+
+    conditions = [result for result in fired if result is not None]
+    outcome["triggered"] = bool(conditions) and (all(conditions) if self.match_all else any(conditions))
+    outcome["sections"] = sorted(
+      {index.section_at(start) for start, _, _ in hits} | {int(amount.get("section", 0)) for amount in amount_hits}
+    )
+    if outcome["triggered"]:
+      limit = Config.FINDING_MAX_MATCHES
+      matches = [index.locate(start, end, label) for start, end, label in sorted(hits)[:limit]]
+      matches += [
+        index.context(int(amount.get("section", 0)), int(amount.get("start", 0)), int(amount.get("end", 0)), str(amount["value"]))
+        for amount in amount_hits[:limit]
+      ]
+      matches.sort(key=lambda match: (match["section"], match["start"]))
+      outcome["matches"] = matches[:limit]
+      outcome["match_count"] = len(hits) + len(amount_hits)
+    return outcome
+
+
+class CompiledScenario:
+  """All checks of a scenario compiled into one automaton and a set of shared regexes.
+
+  Keywords and documents are compared in their `normalize_search_text` form, so
+  one spelling of a keyword covers its hamza, diacritic and case variants. The
+  search text is scanned once; every check is then decided from the resulting
+  hit index instead of rescanning the text per keyword.
+  """
+
+  def __init__(self, checks: List[Dict[str, Any]], version: str = "") -> None:
+    self.version = version
+    self.checks = [CompiledCheck(check, number) for number, check in enumerate(checks, start=1)]
+    # Findings are keyed by check id, so repeats saved before ids were validated
+    # are told apart by their order: the second `C1` becomes `C1#2`.
+    seen: Dict[str, int] = {}
+    for check in self.checks:
+      base = check.check_id
+      while check.check_id in seen:
+        seen[base] += 1
+        check.check_id = f"{base}#{seen[base]}"
+      seen[check.check_id] = 1
+    self.automaton = KeywordAutomaton(keyword for check in self.checks for keyword in check.keywords)
+    self.regexes: Dict[str, Pattern[str]] = {
+      source: rx for check in self.checks for source, rx in check.regexes.items()
+    }
+
+  def index(self, search_text: str, payload: Optional[Dict[str, Any]] = None) -> HitIndex:
+    return HitIndex(search_text, self.automaton, self.regexes, payload)
+
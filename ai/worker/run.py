@@ -1,14 +1,69 @@
+import gc
+import time
+from typing import Optional
+
 import redis
-from rq import Connection, Queue, Worker
+from rq import Connection, Queue, SimpleWorker, Worker
+from sqlalchemy.exc import SQLAlchemyError
 
+from .compare import warm_scenarios
 from .config import Config
+from .db import SessionLocal, engine
+from .entities import get_nlp
+from .tesseract_pool import engine_pool
+
+
+def preload_models() -> None:
+  """Load models in the parent so the job processes RQ forks share them copy-on-write."""
+  get_nlp()
+  # Keep the collector from walking (and so dirtying) the shared pages in every child.
+  gc.freeze()
+
+
+def preload_scenarios() -> None:
+  """Compile comparison scenarios in the parent so forked jobs start with a warm scenario cache."""
+  try:
+    with SessionLocal() as session:
+      warm_scenarios(session)
+  except SQLAlchemyError:
+    # The database may not be up yet; jobs then compile scenarios on first use.
+    pass
+  finally:
+    # Forked jobs must not share the parent's pooled connection.
+    engine.dispose()
+
+
+class ScenarioWarmWorker(Worker):
+  """Forking worker that picks up new and edited scenarios in the parent, so jobs inherit them compiled.
+
+  Without this, a scenario saved after startup would be compiled again by every
+  job, since a job's cache entries die with its process.
+  """
+
+  _scenarios_warmed_at: Optional[float] = None
+
+  def execute_job(self, job, queue):
+    warmed_at = self._scenarios_warmed_at
+    if warmed_at is None or time.monotonic() - warmed_at >= Config.SCENARIO_REFRESH_SECONDS:
+      preload_scenarios()
+      self._scenarios_warmed_at = time.monotonic()
+    return super().execute_job(job, queue)
 
 
 def main() -> None:
+  pool = engine_pool()
+  if pool is not None:
+    # Load traineddata once in the parent; forked job processes inherit the engines.
+    pool.warm()
+  preload_scenarios()
+  if Config.PREFORK:
+    preload_models()
   redis_connection = redis.from_url(Config.REDIS_URL)
   with Connection(redis_connection):
     queue = Queue(Config.QUEUE_NAME, connection=redis_connection)
-    Worker([queue]).work(with_scheduler=False)
+    # AI_SIMPLE_WORKER runs jobs in this process, so caches filled by one job serve the next.
+    worker_class = SimpleWorker if Config.SIMPLE_WORKER else ScenarioWarmWorker
+    worker_class([queue]).work(with_scheduler=False)
 
 
 if __name__ == "__main__":
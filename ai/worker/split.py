@@ -0,0 +1,147 @@
+"""Page-range subjobs for very large PDFs.
+
+`extract_evidence` hands documents of `AI_SPLIT_MIN_PAGES` pages or more to
+`enqueue_parts`, which queues one `extract_part` job per `AI_SPLIT_PAGES_PER_PART`
+pages on the shared queue plus a `merge_parts` job that runs once every part
+has finished. Progress lives in a Redis hash so the API can report it; a failed
+part or merge flags the evidence `failed`.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import redis
+from rq import Callback, Queue
+from rq.job import Dependency, Job, JobStatus
+from sqlalchemy import text as sql_text
+
+from .config import Config
+from .db import SessionLocal
+from .ocr import analyze_pdf_range
+from .storage import s3_client
+from .tasks import EVIDENCE_COLUMNS, build_row, open_evidence, store_row
+
+PROGRESS_TTL_SECONDS = 24 * 3600
+
+_redis: Optional[redis.Redis] = None
+
+
+def _connection() -> redis.Redis:
+  global _redis
+  if _redis is None:
+    _redis = redis.from_url(Config.REDIS_URL)
+  return _redis
+
+
+def progress_key(evidence_id: str) -> str:
+  return f"ai:extract-progress:{evidence_id}"
+
+
+def _load_record(session, evidence_id: str) -> Optional[Dict[str, Any]]:
+  row = session.execute(
+    sql_text(f"SELECT {EVIDENCE_COLUMNS} FROM evidence WHERE id = :id"),
+    {"id": evidence_id},
+  ).mappings().first()
+  return dict(row) if row is not None else None
+
+
+def _mark_failed(evidence_id: str) -> None:
+  _connection().hset(progress_key(evidence_id), "status", "failed")
+  with SessionLocal() as session:
+    session.execute(sql_text("UPDATE evidence SET status = 'failed' WHERE id = :id"), {"id": evidence_id})
+    session.commit()
+
+
+def _merge_failed(job: Job, connection, exc_type, exc_value, traceback) -> None:
+  """RQ failure callback: a merge that crashed or timed out leaves the evidence `failed`, not `processing`."""
+  _mark_failed(job.args[0])
+
+
+def enqueue_parts(evidence_id: str, page_count: int, content_hash: str, version: str) -> Dict[str, Any]:
+  connection = _connection()
+  queue = Queue(Config.QUEUE_NAME, connection=connection)
+  per_part = max(1, Config.SPLIT_PAGES_PER_PART)
+  ranges = [(start, min(start + per_part, page_count)) for start in range(0, page_count, per_part)]
+
+  key = progress_key(evidence_id)
+  connection.delete(key)
+  connection.hset(key, mapping={"parts_total": len(ranges), "parts_done": 0, "pages_total": page_count, "status": "processing"})
+  connection.expire(key, PROGRESS_TTL_SECONDS)
+
+  # RQ drops a finished job's result after 500 s by default, long before the last
+  # part of a big scan is done; keep part results as long as the progress hash.
+  part_jobs = [
+    queue.enqueue(
+      "worker.split.extract_part",
+      evidence_id,
+      start,
+      stop,
+      job_timeout=Config.SPLIT_PART_TIMEOUT,
+      result_ttl=PROGRESS_TTL_SECONDS,
+      failure_ttl=PROGRESS_TTL_SECONDS,
+    )
+    for start, stop in ranges
+  ]
+  merge_job = queue.enqueue(
+    "worker.split.merge_parts",
+    evidence_id,
+    [job.id for job in part_jobs],
+    content_hash,
+    version,
+    depends_on=Dependency(jobs=part_jobs, allow_failure=True),
+    job_timeout=Config.SPLIT_MERGE_TIMEOUT,
+    on_failure=Callback(_merge_failed),
+  )
+  return {"ok": True, "split": True, "parts": len(ranges), "merge_job_id": merge_job.id}
+
+
+def extract_part(evidence_id: str, start: int, stop: int) -> Dict[str, Any]:
+  """Extract pages `[start, stop)` of one evidence PDF."""
+  with SessionLocal() as session:
+    record = _load_record(session, evidence_id)
+  if record is None:
+    return {"ok": False, "error": "evidence_not_found"}
+
+  with open_evidence(s3_client(), record) as evidence_object:
+    pages, confidences = analyze_pdf_range(evidence_object.source, start, stop)
+
+  connection = _connection()
+  connection.hincrby(progress_key(evidence_id), "parts_done", 1)
+  connection.hincrby(progress_key(evidence_id), "pages_done", len(pages))
+  return {"ok": True, "start": start, "pages": pages, "confidences": confidences}
+
+
+def merge_parts(evidence_id: str, part_job_ids: List[str], content_hash: str, version: str) -> Dict[str, Any]:
+  """Assemble part results in page order, store the uniform JSON and flip the evidence to ready."""
+  connection = _connection()
+  parts: List[Dict[str, Any]] = []
+  for job_id, job in zip(part_job_ids, Job.fetch_many(part_job_ids, connection=connection)):
+    if job is None:
+      # The part's job key expired, taking its pages with it.
+      _mark_failed(evidence_id)
+      return {"ok": False, "error": "part_expired", "job_id": job_id}
+    result = job.return_value() if job.get_status() == JobStatus.FINISHED else None
+    if not isinstance(result, dict) or not result.get("ok"):
+      _mark_failed(evidence_id)
+      return {"ok": False, "error": "part_failed", "job_id": job.id}
+    parts.append(result)
+
+  parts.sort(key=lambda part: part["start"])
+  pages = [page for part in parts for page in part["pages"]]
+  confidences = [confidence for part in parts for confidence in part["confidences"]]
+  confidence = round(sum(confidences) / len(confidences), 2) if confidences else 0.0
+
+  with SessionLocal() as session:
+    record = _load_record(session, evidence_id)
+    if record is None:
+      return {"ok": False, "error": "evidence_not_found"}
+    row = build_row(record, pages, "pdf", confidence, content_hash, version)
+    duplicate = store_row(session, row)
+
+  connection.hset(progress_key(evidence_id), "status", "ready")
+  return {
+    "ok": True,
+    "confidence": confidence,
+    "chars": row["chars"],
+    "parts": len(parts),
+    "duplicate_of": duplicate["duplicate_of"] if duplicate else None,
+  }
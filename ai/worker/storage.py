@@ -1,3 +1,9 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from typing import Any, Optional, Union
+
 import boto3
 from botocore.client import Config as BotoConfig
 
@@ -13,3 +19,68 @@ def s3_client():
     config=BotoConfig(signature_version="s3v4"),
     region_name="us-east-1",
   )
+
+
+class EvidenceObject:
+  """A downloaded evidence object, held in memory or in a memory-mapped spool file.
+
+  `buffer` is always readable without another copy (bytes or a read-only mmap);
+  `source` is what the extraction functions should receive: the spool path for
+  spooled objects, so process pools and external tools can reopen it, otherwise
+  the in-memory bytes.
+  """
+
+  def __init__(self, buffer: Union[bytes, mmap.mmap], path: Optional[str] = None) -> None:
+    self.buffer = buffer
+    self.path = path
+
+  @property
+  def size(self) -> int:
+    return len(self.buffer)
+
+  @property
+  def source(self) -> Union[str, bytes]:
+    if self.path is not None:
+      return self.path
+    assert isinstance(self.buffer, bytes)
+    return self.buffer
+
+  def sha256(self) -> str:
+    return hashlib.sha256(self.buffer).hexdigest()
+
+  def close(self) -> None:
+    if isinstance(self.buffer, mmap.mmap):
+      self.buffer.close()
+    if self.path is not None:
+      try:
+        os.unlink(self.path)
+      except FileNotFoundError:
+        pass
+
+  def __enter__(self) -> "EvidenceObject":
+    return self
+
+  def __exit__(self, *exc_info: Any) -> None:
+    self.close()
+
+
+def read_object(s3, bucket: str, key: str, size: Optional[int] = None, spoolable: bool = False) -> EvidenceObject:
+  """Fetch an object, streaming small ones into memory and spooling large PDFs to an mmap'd file."""
+  if spoolable and size is None:
+    size = int(s3.head_object(Bucket=bucket, Key=key)["ContentLength"])
+  if not spoolable or (size or 0) <= Config.INMEMORY_MAX_BYTES:
+    return EvidenceObject(s3.get_object(Bucket=bucket, Key=key)["Body"].read())
+
+  os.makedirs(Config.TMP_DIR, exist_ok=True)
+  fd, path = tempfile.mkstemp(dir=Config.TMP_DIR, suffix=".pdf")
+  try:
+    with os.fdopen(fd, "w+b") as spool:
+      s3.download_fileobj(bucket, key, spool)
+      spool.flush()
+      if spool.tell() == 0:
+        return EvidenceObject(b"", path)
+      mapped = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+  except BaseException:
+    os.unlink(path)
+    raise
+  return EvidenceObject(mapped, path)
@@ -1,53 +1,164 @@
 import mimetypes
-import os
-import tempfile
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional
 
 from sqlalchemy import text as sql_text
 
-from .db import SessionLocal, insert_extraction
-from .normalize import enrich_with_entities, to_uniform_json
-from .ocr import extract_pdf_text, is_scanned_pdf, ocr_image_to_text, ocr_pdf_to_text
-from .storage import s3_client
+from .config import Config
+from .db import SessionLocal, find_cached_extraction, insert_extraction
+from .duplicates import record_signature
+from .entity_index import index_entities
+from .metrics import incr
+from .normalize import enrich_with_entities, search_text, to_paged_json, to_uniform_json
+from .ocr import analyze_pdf_pages, ocr_image_to_text, pdf_page_count
+from .storage import EvidenceObject, read_object, s3_client
+
+EVIDENCE_COLUMNS = "id, bucket, object_key, filename, mime_type, size_bytes"
+
+
+def pipeline_version() -> str:
+  """Identify the extraction pipeline so cached payloads are only reused by an identical one."""
+  return f"{Config.PIPELINE_VERSION}/{Config.OCR_ENGINE}@{Config.OCR_DPI}dpi/{Config.OCR_LANG}"
+
+
+def source_type_for(record: Mapping[str, Any]) -> str:
+  mime = record["mime_type"] or (mimetypes.guess_type(record["filename"])[0] or "")
+  return "pdf" if "pdf" in mime or record["filename"].lower().endswith(".pdf") else "image"
+
+
+def open_evidence(s3, record: Mapping[str, Any]) -> EvidenceObject:
+  return read_object(
+    s3,
+    record["bucket"],
+    record["object_key"],
+    record["size_bytes"],
+    spoolable=source_type_for(record) == "pdf",
+  )
+
+
+def cached_row(session, record: Mapping[str, Any], content_hash: str, version: str) -> Optional[Dict[str, Any]]:
+  """Return an extraction row copied from an earlier extraction of identical content, if any."""
+  cached = find_cached_extraction(session, content_hash, version)
+  if cached is None:
+    incr("extract_cache_misses")
+    return None
+  incr("extract_cache_hits")
+  payload = dict(cached["json_payload"])
+  payload["evidence_id"] = str(record["id"])
+  payload["extracted_at"] = datetime.now(timezone.utc).isoformat()
+  return {
+    "evidence_id": str(record["id"]),
+    "content_sha256": content_hash,
+    "pipeline_version": version,
+    "payload": payload,
+    "search_text": cached["search_text"] if cached["search_text"] is not None else search_text(payload),
+    "source_type": cached["source_type"],
+    "confidence": float(cached["confidence"]) if cached["confidence"] is not None else None,
+    "chars": sum(len(str(section.get("text", ""))) for section in payload.get("sections", [])),
+    "cached": True,
+  }
+
+
+def build_row(
+  record: Mapping[str, Any], pages: List[str], source_type: str, confidence: float, content_hash: str, version: str
+) -> Dict[str, Any]:
+  """Build an extraction row; PDFs get one section per page, images a single full-text section."""
+  evidence_id = str(record["id"])
+  if source_type == "pdf":
+    payload = to_paged_json(evidence_id, pages, source_type)
+  else:
+    payload = to_uniform_json(evidence_id, "\n".join(pages), source_type)
+  enrich_with_entities(payload)
+  return {
+    "evidence_id": evidence_id,
+    "content_sha256": content_hash,
+    "pipeline_version": version,
+    "payload": payload,
+    "search_text": search_text(payload),
+    "source_type": source_type,
+    "confidence": confidence,
+    "chars": sum(len(page) for page in pages),
+    "cached": False,
+  }
+
+
+def copy_row(row: Dict[str, Any], record: Mapping[str, Any]) -> Dict[str, Any]:
+  """Return an extraction row re-keyed to another evidence file with identical content."""
+  incr("extract_cache_hits")
+  payload = dict(row["payload"])
+  payload["evidence_id"] = str(record["id"])
+  payload["extracted_at"] = datetime.now(timezone.utc).isoformat()
+  return {**row, "evidence_id": str(record["id"]), "payload": payload, "cached": True}
+
+
+def extract_object(
+  session, record: Mapping[str, Any], evidence_object: EvidenceObject, content_hash: Optional[str] = None
+) -> Dict[str, Any]:
+  """Build the extraction row for a downloaded object, reusing a cached payload for identical content."""
+  content_hash = content_hash or evidence_object.sha256()
+  version = pipeline_version()
+  row = cached_row(session, record, content_hash, version)
+  if row is not None:
+    return row
+
+  source_type = source_type_for(record)
+  if source_type == "pdf":
+    pages, confidence = analyze_pdf_pages(evidence_object.source)
+  else:
+    text, confidence = ocr_image_to_text(evidence_object.source)
+    pages = [text]
+  return build_row(record, pages, source_type, confidence, content_hash, version)
+
+
+def store_row(session, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+  """Insert the extraction, index its entities and near-duplicate signature, and flip the evidence to ready."""
+  insert_extraction(
+    session,
+    row["evidence_id"],
+    row["payload"],
+    row["source_type"],
+    row["confidence"],
+    row["content_sha256"],
+    row["pipeline_version"],
+    row["search_text"],
+  )
+  index_entities(session, [(row["evidence_id"], row["payload"])])
+  duplicate = record_signature(session, row["evidence_id"], row["search_text"])
+  session.execute(sql_text("UPDATE evidence SET status = 'ready' WHERE id = :id"), {"id": row["evidence_id"]})
+  session.commit()
+  return duplicate
 
 
 def extract_evidence(evidence_id: str) -> dict[str, object]:
   s3 = s3_client()
   with SessionLocal() as session:
     record = session.execute(
-      sql_text(
-        """
-          SELECT id, bucket, object_key, filename, mime_type
-          FROM evidence
-          WHERE id = :id
-        """
-      ),
+      sql_text(f"SELECT {EVIDENCE_COLUMNS} FROM evidence WHERE id = :id"),
       {"id": evidence_id},
     ).mappings().first()
 
     if record is None:
       return {"ok": False, "error": "evidence_not_found"}
 
-    with tempfile.TemporaryDirectory() as tmp_dir:
-      local_path = os.path.join(tmp_dir, record["filename"])
-      with open(local_path, "wb") as downloaded:
-        s3.download_fileobj(record["bucket"], record["object_key"], downloaded)
+    with open_evidence(s3, record) as evidence_object:
+      page_count = pdf_page_count(evidence_object.source) if source_type_for(record) == "pdf" else 0
+      if Config.SPLIT_MIN_PAGES > 0 and page_count >= Config.SPLIT_MIN_PAGES:
+        content_hash = evidence_object.sha256()
+        version = pipeline_version()
+        row = cached_row(session, record, content_hash, version)
+        if row is None:
+          # Imported here because split enqueues jobs that call back into this module.
+          from .split import enqueue_parts
 
-      mime = record["mime_type"] or (mimetypes.guess_type(record["filename"])[0] or "")
-      source_type = "pdf" if "pdf" in mime or local_path.lower().endswith(".pdf") else "image"
-
-      if source_type == "pdf":
-        if is_scanned_pdf(local_path):
-          text, confidence = ocr_pdf_to_text(local_path)
-        else:
-          text, confidence = extract_pdf_text(local_path), 0.75
+          return enqueue_parts(evidence_id, page_count, content_hash, version)
       else:
-        with open(local_path, "rb") as handle:
-          blob = handle.read()
-        text, confidence = ocr_image_to_text(blob)
-
-      payload = enrich_with_entities(to_uniform_json(str(record["id"]), text, source_type))
-      insert_extraction(session, evidence_id, payload, source_type, confidence)
-      session.execute(sql_text("UPDATE evidence SET status = 'ready' WHERE id = :id"), {"id": evidence_id})
-      session.commit()
+        row = extract_object(session, record, evidence_object)
 
-      return {"ok": True, "confidence": confidence, "chars": len(text)}
+    duplicate = store_row(session, row)
+    return {
+      "ok": True,
+      "confidence": row["confidence"],
+      "chars": row["chars"],
+      "cached": row["cached"],
+      "duplicate_of": duplicate["duplicate_of"] if duplicate else None,
+    }
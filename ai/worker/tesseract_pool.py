@@ -0,0 +1,138 @@
+"""Long-lived tesseract engines shared by OCR calls in a worker process.
+
+Spawning the tesseract CLI (pytesseract, ocrmypdf) reloads the traineddata on
+every call. When `tesserocr` is installed the worker keeps a bounded pool of
+`PyTessBaseAPI` instances with the languages already loaded and hands them out
+per image; otherwise `engine_pool()` returns None and callers fall back to
+pytesseract.
+"""
+
+import importlib
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+from .config import Config
+
+_tesserocr: Optional[Any]
+try:
+  _tesserocr = importlib.import_module("tesserocr")
+except Exception:  # pragma: no cover - tesserocr optional at runtime
+  _tesserocr = None
+
+
+class _Engine:
+  def __init__(self, api: Any) -> None:
+    self.api = api
+    self.uses = 0
+
+
+class TesseractPool:
+  """Bounded pool of pre-loaded OCR engines with recycle-on-wear and health checks.
+
+  Engines are created lazily up to `size`; `acquire()` blocks while all of them
+  are checked out. An engine is closed and replaced after `max_uses` images, when
+  it fails its health check, or when a caller raises while holding it.
+  """
+
+  def __init__(self, factory: Callable[[], Any], size: int, max_uses: int, lang: str) -> None:
+    self._factory = factory
+    self._size = max(1, size)
+    self._max_uses = max(1, max_uses)
+    self._lang = lang
+    self._idle: List[_Engine] = []
+    self._created = 0
+    self._cond = threading.Condition()
+
+  @property
+  def created(self) -> int:
+    return self._created
+
+  def warm(self, count: Optional[int] = None) -> None:
+    """Pre-load engines so the first jobs do not pay the traineddata load."""
+    with self._cond:
+      target = min(self._size, count or self._size)
+      while self._created < target:
+        self._idle.append(_Engine(self._factory()))
+        self._created += 1
+
+  def _healthy(self, engine: _Engine) -> bool:
+    if engine.uses >= self._max_uses:
+      return False
+    try:
+      return self._lang in str(engine.api.GetInitLanguagesAsString())
+    except Exception:
+      return False
+
+  def _discard(self, engine: _Engine) -> None:
+    try:
+      engine.api.End()
+    except Exception:
+      pass
+    self._created -= 1
+
+  def _checkout(self) -> _Engine:
+    with self._cond:
+      while True:
+        while self._idle:
+          engine = self._idle.pop()
+          if self._healthy(engine):
+            return engine
+          self._discard(engine)
+        if self._created < self._size:
+          self._created += 1
+          break
+        self._cond.wait()
+    try:
+      return _Engine(self._factory())
+    except Exception:
+      with self._cond:
+        self._created -= 1
+        self._cond.notify()
+      raise
+
+  @contextmanager
+  def acquire(self) -> Iterator[Any]:
+    engine = self._checkout()
+    healthy = True
+    try:
+      yield engine.api
+    except Exception:
+      healthy = False
+      raise
+    finally:
+      engine.uses += 1
+      with self._cond:
+        if healthy:
+          self._idle.append(engine)
+        else:
+          self._discard(engine)
+        self._cond.notify()
+
+  def close(self) -> None:
+    with self._cond:
+      while self._idle:
+        self._discard(self._idle.pop())
+
+
+_pool: Optional[TesseractPool] = None
+_pool_lock = threading.Lock()
+
+
+def _new_api() -> Any:
+  assert _tesserocr is not None
+  kwargs = {"lang": Config.OCR_LANG}
+  if Config.TESSDATA_PATH:
+    kwargs["path"] = Config.TESSDATA_PATH
+  return _tesserocr.PyTessBaseAPI(**kwargs)
+
+
+def engine_pool() -> Optional[TesseractPool]:
+  """Return the process-wide engine pool, or None when tesserocr is unavailable or disabled."""
+  global _pool
+  if _tesserocr is None or Config.OCR_POOL_SIZE <= 0:
+    return None
+  with _pool_lock:
+    if _pool is None:
+      _pool = TesseractPool(_new_api, Config.OCR_POOL_SIZE, Config.OCR_ENGINE_MAX_USES, Config.OCR_LANG)
+  return _pool
@@ -0,0 +1,33 @@
+"""content hash and pipeline version on evidence extractions
+
+Revision ID: 0009_extraction_cache
+Revises: 0008_notifications
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_extraction_cache"
+down_revision: str = "0008_notifications"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+  op.add_column("evidence_extractions", sa.Column("content_sha256", sa.Text(), nullable=True))
+  op.add_column("evidence_extractions", sa.Column("pipeline_version", sa.Text(), nullable=True))
+  op.create_index(
+    "ix_evidence_extractions_content",
+    "evidence_extractions",
+    ["content_sha256", "pipeline_version", "extracted_at"],
+  )
+
+
+def downgrade() -> None:
+  op.drop_index("ix_evidence_extractions_content", table_name="evidence_extractions")
+  op.drop_column("evidence_extractions", "pipeline_version")
+  op.drop_column("evidence_extractions", "content_sha256")
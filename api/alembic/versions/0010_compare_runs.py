@@ -0,0 +1,86 @@
+"""idempotent compare runs and unique findings per check
+
+Revision ID: 0010_compare_runs
+Revises: 0009_extraction_cache
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_compare_runs"
+down_revision: str = "0009_extraction_cache"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+  # Earlier compare runs appended a full set of findings each time; keep the newest per check,
+  # carrying over the latest reviewer status so triaged findings do not reopen.
+  op.execute(
+    """
+      UPDATE findings survivor
+      SET status = triaged.status
+      FROM (
+        SELECT DISTINCT ON (evidence_id, scenario_id, check_id) evidence_id, scenario_id, check_id, status
+        FROM findings
+        WHERE status <> 'open'
+        ORDER BY evidence_id, scenario_id, check_id, created_at DESC, id DESC
+      ) triaged
+      WHERE triaged.evidence_id = survivor.evidence_id
+        AND triaged.scenario_id = survivor.scenario_id
+        AND triaged.check_id = survivor.check_id
+        AND survivor.status = 'open'
+        AND NOT EXISTS (
+          SELECT 1 FROM findings newer
+          WHERE newer.evidence_id = survivor.evidence_id
+            AND newer.scenario_id = survivor.scenario_id
+            AND newer.check_id = survivor.check_id
+            AND (newer.created_at, newer.id) > (survivor.created_at, survivor.id)
+        )
+    """
+  )
+  op.execute(
+    """
+      DELETE FROM findings f
+      USING findings newer
+      WHERE newer.evidence_id = f.evidence_id
+        AND newer.scenario_id = f.scenario_id
+        AND newer.check_id = f.check_id
+        AND (newer.created_at, newer.id) > (f.created_at, f.id)
+    """
+  )
+  op.add_column(
+    "findings",
+    sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+  )
+  op.drop_index("ix_findings_evidence_scenario", table_name="findings")
+  op.create_index(
+    "ux_findings_evidence_scenario_check",
+    "findings",
+    ["evidence_id", "scenario_id", "check_id"],
+    unique=True,
+  )
+
+  op.create_table(
+    "compare_runs",
+    sa.Column("evidence_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("scenario_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("extraction_key", sa.Text(), nullable=False),
+    sa.Column("rules_hash", sa.Text(), nullable=False),
+    sa.Column("ran_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+    sa.PrimaryKeyConstraint("evidence_id", "scenario_id"),
+    sa.ForeignKeyConstraint(["evidence_id"], ["evidence.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["scenario_id"], ["comparison_scenarios.id"], ondelete="CASCADE"),
+  )
+
+
+def downgrade() -> None:
+  op.drop_table("compare_runs")
+  op.drop_index("ux_findings_evidence_scenario_check", table_name="findings")
+  op.create_index("ix_findings_evidence_scenario", "findings", ["evidence_id", "scenario_id"], unique=False)
+  op.drop_column("findings", "updated_at")
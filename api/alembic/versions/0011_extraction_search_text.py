@@ -0,0 +1,26 @@
+"""normalized search text on evidence extractions
+
+Revision ID: 0011_extraction_search_text
+Revises: 0010_compare_runs
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_extraction_search_text"
+down_revision: str = "0010_compare_runs"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+  # Filled by the worker; rows extracted before this revision stay NULL and are normalized on read.
+  op.add_column("evidence_extractions", sa.Column("search_text", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+  op.drop_column("evidence_extractions", "search_text")
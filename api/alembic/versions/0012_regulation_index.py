@@ -0,0 +1,57 @@
+"""persisted regulation indexes and evidence-to-regulation matches
+
+Revision ID: 0012_regulation_index
+Revises: 0011_extraction_search_text
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_regulation_index"
+down_revision: str = "0011_extraction_search_text"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+  # Insertion order watermark for incremental index updates; existing rows are numbered on add.
+  op.execute("ALTER TABLE regulation_chunks ADD COLUMN seq bigserial NOT NULL")
+  op.create_index("ix_regulation_chunks_regulation_seq", "regulation_chunks", ["regulation_id", "seq"], unique=False)
+
+  op.create_table(
+    "regulation_indexes",
+    sa.Column("regulation_id", postgresql.UUID(as_uuid=True), primary_key=True),
+    sa.Column("max_seq", sa.BigInteger(), nullable=False),
+    sa.Column("chunk_count", sa.Integer(), nullable=False),
+    sa.Column("data", sa.LargeBinary(), nullable=False),
+    sa.Column("updated_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+    sa.ForeignKeyConstraint(["regulation_id"], ["regulations.id"], ondelete="CASCADE"),
+  )
+
+  op.create_table(
+    "evidence_regulation_matches",
+    sa.Column("evidence_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("regulation_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("rank", sa.Integer(), nullable=False),
+    sa.Column("chunk_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("score", sa.Float(), nullable=False),
+    sa.Column("section", sa.Integer(), nullable=False),
+    sa.Column("page", sa.Integer(), nullable=True),
+    sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+    sa.PrimaryKeyConstraint("evidence_id", "regulation_id", "rank"),
+    sa.ForeignKeyConstraint(["evidence_id"], ["evidence.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["regulation_id"], ["regulations.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["chunk_id"], ["regulation_chunks.id"], ondelete="CASCADE"),
+  )
+
+
+def downgrade() -> None:
+  op.drop_table("evidence_regulation_matches")
+  op.drop_table("regulation_indexes")
+  op.drop_index("ix_regulation_chunks_regulation_seq", table_name="regulation_chunks")
+  op.drop_column("regulation_chunks", "seq")
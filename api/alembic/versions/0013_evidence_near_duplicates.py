@@ -0,0 +1,62 @@
+"""minhash signatures, lsh buckets and near-duplicate links for evidence
+
+Revision ID: 0013_evidence_near_duplicates
+Revises: 0012_regulation_index
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0013_evidence_near_duplicates"
+down_revision: str = "0012_regulation_index"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+  op.create_table(
+    "evidence_signatures",
+    sa.Column("evidence_id", postgresql.UUID(as_uuid=True), primary_key=True),
+    sa.Column("engagement_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("signature", sa.LargeBinary(), nullable=False),
+    sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+    sa.ForeignKeyConstraint(["evidence_id"], ["evidence.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["engagement_id"], ["engagements.id"], ondelete="CASCADE"),
+  )
+
+  # The primary key doubles as the LSH lookup index: (engagement, band, bucket) -> evidence.
+  op.create_table(
+    "evidence_lsh_buckets",
+    sa.Column("engagement_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("band", sa.SmallInteger(), nullable=False),
+    sa.Column("bucket", sa.BigInteger(), nullable=False),
+    sa.Column("evidence_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.PrimaryKeyConstraint("engagement_id", "band", "bucket", "evidence_id"),
+    sa.ForeignKeyConstraint(["engagement_id"], ["engagements.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["evidence_id"], ["evidence.id"], ondelete="CASCADE"),
+  )
+  op.create_index("ix_evidence_lsh_buckets_evidence", "evidence_lsh_buckets", ["evidence_id"], unique=False)
+
+  op.create_table(
+    "evidence_duplicates",
+    sa.Column("evidence_id", postgresql.UUID(as_uuid=True), primary_key=True),
+    sa.Column("original_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("similarity", sa.Float(), nullable=False),
+    sa.Column("created_at", sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.text("now()")),
+    sa.ForeignKeyConstraint(["evidence_id"], ["evidence.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["original_id"], ["evidence.id"], ondelete="CASCADE"),
+  )
+  op.create_index("ix_evidence_duplicates_original", "evidence_duplicates", ["original_id"], unique=False)
+
+
+def downgrade() -> None:
+  op.drop_index("ix_evidence_duplicates_original", table_name="evidence_duplicates")
+  op.drop_table("evidence_duplicates")
+  op.drop_index("ix_evidence_lsh_buckets_evidence", table_name="evidence_lsh_buckets")
+  op.drop_table("evidence_lsh_buckets")
+  op.drop_table("evidence_signatures")
@@ -0,0 +1,69 @@
+"""typed entity tables for amount, date and department queries
+
+Revision ID: 0014_evidence_entities
+Revises: 0013_evidence_near_duplicates
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0014_evidence_entities"
+down_revision: str = "0013_evidence_near_duplicates"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+
+def upgrade() -> None:
+  # Filled by the worker on extraction; run POST /ai/entities/reindex once to backfill existing evidence.
+  op.create_table(
+    "evidence_amounts",
+    sa.Column("id", sa.BigInteger(), sa.Identity(), primary_key=True),
+    sa.Column("evidence_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("engagement_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("value", sa.Numeric(18, 2), nullable=False),
+    sa.Column("currency", sa.Text(), nullable=True),
+    sa.Column("section", sa.Integer(), nullable=False),
+    sa.Column("page", sa.Integer(), nullable=True),
+    sa.Column("start_offset", sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(["evidence_id"], ["evidence.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["engagement_id"], ["engagements.id"], ondelete="CASCADE"),
+  )
+  op.create_index("ix_evidence_amounts_engagement_value", "evidence_amounts", ["engagement_id", "value"], unique=False)
+  op.create_index("ix_evidence_amounts_evidence", "evidence_amounts", ["evidence_id"], unique=False)
+
+  op.create_table(
+    "evidence_dates",
+    sa.Column("evidence_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("engagement_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("value", sa.Date(), nullable=False),
+    sa.PrimaryKeyConstraint("evidence_id", "value"),
+    sa.ForeignKeyConstraint(["evidence_id"], ["evidence.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["engagement_id"], ["engagements.id"], ondelete="CASCADE"),
+  )
+  op.create_index("ix_evidence_dates_engagement_value", "evidence_dates", ["engagement_id", "value"], unique=False)
+
+  op.create_table(
+    "evidence_departments",
+    sa.Column("evidence_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("engagement_id", postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column("name", sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint("evidence_id", "name"),
+    sa.ForeignKeyConstraint(["evidence_id"], ["evidence.id"], ondelete="CASCADE"),
+    sa.ForeignKeyConstraint(["engagement_id"], ["engagements.id"], ondelete="CASCADE"),
+  )
+  op.create_index("ix_evidence_departments_engagement_name", "evidence_departments", ["engagement_id", "name"], unique=False)
+
+
+def downgrade() -> None:
+  op.drop_index("ix_evidence_departments_engagement_name", table_name="evidence_departments")
+  op.drop_table("evidence_departments")
+  op.drop_index("ix_evidence_dates_engagement_value", table_name="evidence_dates")
+  op.drop_table("evidence_dates")
+  op.drop_index("ix_evidence_amounts_evidence", table_name="evidence_amounts")
+  op.drop_index("ix_evidence_amounts_engagement_value", table_name="evidence_amounts")
+  op.drop_table("evidence_amounts")
@@ -0,0 +1,39 @@
+"""built-in scenario for amount analytics findings
+
+Revision ID: 0015_amount_analytics
+Revises: 0014_evidence_entities
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0015_amount_analytics"
+down_revision: str = "0014_evidence_entities"
+branch_labels: Sequence[str] | None = None
+depends_on: Sequence[str] | None = None
+
+# Must match AI_ANALYTICS_SCENARIO_ID in the worker.
+_SCENARIO_ID = "00000000-0000-4000-8000-00000000a001"
+
+
+def upgrade() -> None:
+  # findings.scenario_id is required, so analytics findings hang off a fixed rule-less scenario.
+  op.execute(
+    f"""
+      INSERT INTO comparison_scenarios(id, name, description, rules)
+      VALUES (
+        '{_SCENARIO_ID}',
+        'Amount analytics',
+        'Duplicate payments, Benford first-digit test and outliers across an engagement (built in).',
+        '{{"checks": []}}'::jsonb
+      )
+      ON CONFLICT (id) DO NOTHING
+    """
+  )
+
+
+def downgrade() -> None:
+  op.execute(f"DELETE FROM comparison_scenarios WHERE id = '{_SCENARIO_ID}'")
@@ -1,4 +1,5 @@
-from .ai_compare import FindingOut, RegulationChunkIn, RegulationIn, ScenarioIn
+from .ai_compare import CompareMatrixIn, FindingOut, RegulationChunkIn, RegulationIn, ScenarioIn
+from .ai_extract import ExtractBatchIn
 from .auth import LoginIn, TokenOut
 from .checklists import (
 	ChecklistCreate,
@@ -42,7 +43,9 @@ __all__ = [
 	"RegulationIn",
 	"RegulationChunkIn",
 	"ScenarioIn",
+	"CompareMatrixIn",
 	"FindingOut",
+	"ExtractBatchIn",
 	"ReportCreateIn",
 	"ReportUpdateIn",
 	"ReportOut",
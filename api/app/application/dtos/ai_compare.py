@@ -1,6 +1,7 @@
-from typing import Any, Dict, Optional
+import re
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class RegulationIn(BaseModel):
@@ -14,11 +15,90 @@ class RegulationChunkIn(BaseModel):
   text: str
 
 
+def _is_number(value: Any) -> bool:
+  return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_problems(check: Any, number: int) -> List[str]:
+  """What the AI worker's rule compiler would reject in one check of `rules.checks`."""
+  if not isinstance(check, dict):
+    return [f"check {number}: must be an object"]
+  check_id = str(check.get("id") or f"RULE-{number}")
+  problems: List[str] = []
+
+  regexes = check.get("regex", [])
+  for source in [regexes] if isinstance(regexes, str) else regexes if isinstance(regexes, list) else [None]:
+    if not isinstance(source, str):
+      problems.append(f"{check_id}: regex must be a string or a list of strings")
+      continue
+    try:
+      re.compile(source, re.IGNORECASE)
+    except re.error as exc:
+      problems.append(f"{check_id}: invalid regex {source!r}: {exc}")
+
+  near = check.get("near", [])
+  for rule in near if isinstance(near, list) else [near]:
+    terms = rule.get("terms") if isinstance(rule, dict) else None
+    within = rule.get("within", 10) if isinstance(rule, dict) else None
+    if (
+      not isinstance(terms, list)
+      or len(terms) < 2
+      or not all(isinstance(term, str) for term in terms)
+      or isinstance(within, bool)
+      or not isinstance(within, int)
+      or within < 0
+    ):
+      problems.append(f"{check_id}: near needs at least two terms and a non-negative 'within'")
+
+  amount = check.get("amount")
+  if amount is not None:
+    if not isinstance(amount, dict):
+      problems.append(f"{check_id}: amount must be an object")
+    elif any(amount.get(bound) is not None and not _is_number(amount.get(bound)) for bound in ("min", "max")):
+      problems.append(f"{check_id}: amount min and max must be numbers")
+    elif amount.get("currency") is not None and not isinstance(amount.get("currency"), str):
+      problems.append(f"{check_id}: amount currency must be a string")
+
+  pages = check.get("page")
+  if pages is not None and not all(
+    isinstance(page, int) and not isinstance(page, bool) for page in (pages if isinstance(pages, list) else [pages])
+  ):
+    problems.append(f"{check_id}: page must be a page number or a list of them")
+  if check.get("match", "any") not in ("any", "all"):
+    problems.append(f"{check_id}: match must be 'any' or 'all'")
+  return problems
+
+
 class ScenarioIn(BaseModel):
   name: str = Field(min_length=2, max_length=200)
   description: Optional[str] = None
   rules: Dict[str, Any]
 
+  @field_validator("rules")
+  @classmethod
+  def _validate_checks(cls, rules: Dict[str, Any]) -> Dict[str, Any]:
+    """Reject rules the AI worker could not compile, so a bad scenario fails with 422 when saved."""
+    checks = rules.get("checks", [])
+    if not isinstance(checks, list):
+      raise ValueError("checks must be a list")
+    problems: List[str] = []
+    seen: Dict[str, int] = {}
+    for number, check in enumerate(checks, start=1):
+      problems.extend(_check_problems(check, number))
+      if isinstance(check, dict):
+        check_id = str(check.get("id") or f"RULE-{number}")
+        if check_id in seen:
+          problems.append(f"{check_id}: duplicate check id (checks {seen[check_id]} and {number})")
+        seen.setdefault(check_id, number)
+    if problems:
+      raise ValueError("; ".join(problems))
+    return rules
+
+
+class CompareMatrixIn(BaseModel):
+  evidence_ids: List[str] = Field(min_length=1, max_length=5000)
+  scenario_ids: List[str] = Field(min_length=1, max_length=100)
+
 
 class FindingOut(BaseModel):
   id: str
@@ -0,0 +1,8 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ExtractBatchIn(BaseModel):
+  engagement_id: Optional[str] = None
+  evidence_ids: Optional[List[str]] = Field(default=None, max_length=5000)
@@ -1,11 +1,13 @@
-from typing import Generator
+from datetime import date
+from typing import Any, Generator
 
 import redis
-from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from rq import Queue
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from ...application.dtos.ai_extract import ExtractBatchIn
 from ...infrastructure.db.session import SessionLocal
 from ...infrastructure.security.jwt import try_get_user_id
 from ...infrastructure.security.rbac import enforce
@@ -52,6 +54,68 @@ def trigger_extract(
   return {"queued": True, "job_id": job.id}
 
 
+@router.get("/extract/{evidence_id}/progress")
+def get_extract_progress(
+  evidence_id: str,
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> dict[str, object]:
+  enforce(db, user_id, "evidence", "read")
+
+  status = db.execute(text("SELECT status FROM evidence WHERE id = :id"), {"id": evidence_id}).scalar()
+  if status is None:
+    raise HTTPException(status_code=404, detail="Evidence not found")
+
+  redis_conn = redis.from_url(_REDIS_URL)
+  progress = redis_conn.hgetall(f"ai:extract-progress:{evidence_id}")
+  parts = {key.decode(): value.decode() for key, value in progress.items()}
+  return {
+    "evidence_id": evidence_id,
+    "status": status,
+    "split": bool(parts),
+    "parts_total": int(parts.get("parts_total", 0)),
+    "parts_done": int(parts.get("parts_done", 0)),
+    "pages_total": int(parts.get("pages_total", 0)),
+    "pages_done": int(parts.get("pages_done", 0)),
+  }
+
+
+@router.post("/extract-batch")
+def trigger_extract_batch(
+  payload: ExtractBatchIn,
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> dict[str, object]:
+  enforce(db, user_id, "evidence", "read")
+
+  if payload.evidence_ids:
+    rows = db.execute(
+      text("SELECT id::text FROM evidence WHERE id = ANY(CAST(:ids AS uuid[]))"),
+      {"ids": payload.evidence_ids},
+    ).scalars().all()
+  elif payload.engagement_id:
+    rows = db.execute(
+      text("SELECT id::text FROM evidence WHERE engagement_id = :engagement_id"),
+      {"engagement_id": payload.engagement_id},
+    ).scalars().all()
+  else:
+    raise HTTPException(status_code=422, detail="engagement_id_or_evidence_ids_required")
+  if not rows:
+    raise HTTPException(status_code=404, detail="Evidence not found")
+
+  redis_conn = redis.from_url(_REDIS_URL)
+  queue = Queue(_QUEUE_NAME, connection=redis_conn)
+  job = queue.enqueue("worker.batch.extract_batch", list(rows), job_timeout=-1)
+
+  db.execute(
+    text("UPDATE evidence SET status = 'processing' WHERE id = ANY(CAST(:ids AS uuid[]))"),
+    {"ids": list(rows)},
+  )
+  db.commit()
+
+  return {"queued": True, "job_id": job.id, "count": len(rows)}
+
+
 @router.get("/extractions")
 def get_extractions(
   evidence_id: str | None = None,
@@ -95,3 +159,107 @@ def get_extractions(
 
   items = [dict(row) for row in rows]
   return {"items": items}
+
+
+@router.get("/entities/search")
+def search_entities(
+  engagement_id: str,
+  min_amount: float | None = None,
+  max_amount: float | None = None,
+  currency: str | None = None,
+  date_from: date | None = None,
+  date_to: date | None = None,
+  department: str | None = None,
+  limit: int = Query(100, ge=1, le=1000),
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> dict[str, object]:
+  enforce(db, user_id, "evidence", "read")
+
+  params: dict[str, Any] = {"engagement_id": engagement_id, "limit": limit}
+  amount_conditions = ["a.evidence_id = e.id", "a.engagement_id = :engagement_id"]
+  if min_amount is not None:
+    amount_conditions.append("a.value >= :min_amount")
+    params["min_amount"] = min_amount
+  if max_amount is not None:
+    amount_conditions.append("a.value <= :max_amount")
+    params["max_amount"] = max_amount
+  if currency:
+    # Amounts without a currency marker are kept: most documents only mark some of them.
+    amount_conditions.append("(a.currency = :currency OR a.currency IS NULL)")
+    params["currency"] = currency.upper()
+  date_conditions = ["d.evidence_id = e.id", "d.engagement_id = :engagement_id"]
+  if date_from is not None:
+    date_conditions.append("d.value >= :date_from")
+    params["date_from"] = date_from
+  if date_to is not None:
+    date_conditions.append("d.value <= :date_to")
+    params["date_to"] = date_to
+  amount_where = " AND ".join(amount_conditions)
+  date_where = " AND ".join(date_conditions)
+
+  filters = ["e.engagement_id = :engagement_id"]
+  if len(amount_conditions) > 2:
+    filters.append(f"EXISTS (SELECT 1 FROM evidence_amounts a WHERE {amount_where})")
+  if len(date_conditions) > 2:
+    filters.append(f"EXISTS (SELECT 1 FROM evidence_dates d WHERE {date_where})")
+  if department:
+    filters.append(
+      "EXISTS (SELECT 1 FROM evidence_departments p "
+      "WHERE p.evidence_id = e.id AND p.engagement_id = :engagement_id AND p.name = :department)"
+    )
+    params["department"] = department
+  where = " AND ".join(filters)
+
+  rows = db.execute(
+    text(
+      f"""
+        SELECT e.id::text AS id,
+               e.filename,
+               ARRAY(SELECT a.value FROM evidence_amounts a WHERE {amount_where} ORDER BY a.value DESC) AS amounts,
+               ARRAY(SELECT d.value FROM evidence_dates d WHERE {date_where} ORDER BY d.value) AS dates
+        FROM evidence e
+        WHERE {where}
+        ORDER BY e.created_at DESC
+        LIMIT :limit
+      """
+    ),
+    params,
+  ).mappings()
+
+  items = [
+    {
+      "id": row["id"],
+      "filename": row["filename"],
+      "amounts": [float(value) for value in row["amounts"]],
+      "dates": [value.isoformat() for value in row["dates"]],
+    }
+    for row in rows
+  ]
+  return {"items": items}
+
+
+@router.post("/entities/reindex")
+def trigger_entity_reindex(
+  engagement_id: str | None = None,
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> dict[str, object]:
+  enforce(db, user_id, "evidence", "read")
+
+  redis_conn = redis.from_url(_REDIS_URL)
+  queue = Queue(_QUEUE_NAME, connection=redis_conn)
+  job = queue.enqueue("worker.entity_index.reindex_entities", engagement_id, job_timeout=-1)
+  return {"queued": True, "job_id": job.id}
+
+
+@router.get("/metrics")
+def get_worker_metrics(
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> dict[str, object]:
+  enforce(db, user_id, "evidence", "read")
+
+  redis_conn = redis.from_url(_REDIS_URL)
+  counters = redis_conn.hgetall("ai:metrics")
+  return {"counters": {key.decode(): int(value) for key, value in counters.items()}}
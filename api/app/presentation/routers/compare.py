@@ -7,6 +7,7 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from ...application.dtos.ai_compare import (
+  CompareMatrixIn,
   FindingOut,
   RegulationChunkIn,
   RegulationIn,
@@ -96,6 +97,68 @@ def list_regulations(
   return [{"id": str(row["id"]), "name": row["name"], "version": row["version"]} for row in rows]
 
 
+@router.post("/regulations/{regulation_id}/match", response_model=Dict[str, Any])
+def enqueue_regulation_match(
+  regulation_id: str,
+  evidence_id: str = Query(..., min_length=1),
+  top_k: int = Query(10, ge=1, le=100),
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> Dict[str, Any]:
+  enforce(db, user_id, "evidence", "read")
+  enforce(db, user_id, "regulations", "read")
+
+  evidence_exists = db.execute(text("SELECT 1 FROM evidence WHERE id = :id"), {"id": evidence_id}).scalar()
+  regulation_exists = db.execute(text("SELECT 1 FROM regulations WHERE id = :id"), {"id": regulation_id}).scalar()
+  if not evidence_exists or not regulation_exists:
+    raise HTTPException(status_code=404, detail="not_found")
+
+  redis_conn = redis.from_url(_REDIS_URL)  # type: ignore[misc]
+  queue = Queue(_QUEUE_NAME, connection=redis_conn)  # type: ignore[misc]
+  job = queue.enqueue("worker.compare_task.run_regulation_match", evidence_id, regulation_id, top_k)  # type: ignore[misc]
+  return {"queued": True, "job_id": job.id}
+
+
+@router.get("/regulations/matches", response_model=Dict[str, List[Dict[str, Any]]])
+def list_regulation_matches(
+  evidence_id: str,
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> Dict[str, List[Dict[str, Any]]]:
+  enforce(db, user_id, "regulations", "read")
+  rows = (
+    db.execute(
+      text(
+        """
+          SELECT m.regulation_id, m.rank, m.chunk_id, m.score, m.section, m.page, c.section_ref, c.text
+          FROM evidence_regulation_matches m
+          JOIN regulation_chunks c ON c.id = m.chunk_id
+          WHERE m.evidence_id = :evidence_id
+          ORDER BY m.regulation_id, m.rank
+        """
+      ),
+      {"evidence_id": evidence_id},
+    )
+    .mappings()
+    .all()
+  )
+  return {
+    "items": [
+      {
+        "regulation_id": str(row["regulation_id"]),
+        "rank": row["rank"],
+        "chunk_id": str(row["chunk_id"]),
+        "score": row["score"],
+        "section": row["section"],
+        "page": row["page"],
+        "section_ref": row["section_ref"],
+        "text": row["text"],
+      }
+      for row in rows
+    ]
+  }
+
+
 @router.post("/scenarios", response_model=Dict[str, str])
 def create_scenario(
   payload: ScenarioIn,
@@ -166,6 +229,56 @@ def enqueue_compare(
   return {"queued": True, "job_id": job.id}
 
 
+@router.post("/compare-matrix", response_model=Dict[str, Any])
+def enqueue_compare_matrix(
+  payload: CompareMatrixIn,
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> Dict[str, Any]:
+  enforce(db, user_id, "evidence", "read")
+  enforce(db, user_id, "scenarios", "read")
+
+  evidence_ids = db.execute(
+    text("SELECT id::text FROM evidence WHERE id = ANY(CAST(:ids AS uuid[]))"),
+    {"ids": payload.evidence_ids},
+  ).scalars().all()
+  scenario_ids = db.execute(
+    text("SELECT id::text FROM comparison_scenarios WHERE id = ANY(CAST(:ids AS uuid[]))"),
+    {"ids": payload.scenario_ids},
+  ).scalars().all()
+  if not evidence_ids or not scenario_ids:
+    raise HTTPException(status_code=404, detail="not_found")
+
+  redis_conn = redis.from_url(_REDIS_URL)  # type: ignore[misc]
+  queue = Queue(_QUEUE_NAME, connection=redis_conn)  # type: ignore[misc]
+  job = queue.enqueue(  # type: ignore[misc]
+    "worker.compare_task.run_compare_matrix",
+    list(evidence_ids),
+    list(scenario_ids),
+    job_timeout=-1,
+  )
+  return {"queued": True, "job_id": job.id, "evidence": len(evidence_ids), "scenarios": len(scenario_ids)}
+
+
+@router.post("/analytics/amounts", response_model=Dict[str, Any])
+def enqueue_amount_analytics(
+  engagement_id: str = Query(..., min_length=1),
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> Dict[str, Any]:
+  enforce(db, user_id, "evidence", "read")
+  enforce(db, user_id, "findings", "read")
+
+  exists = db.execute(text("SELECT 1 FROM engagements WHERE id = :id"), {"id": engagement_id}).scalar()
+  if not exists:
+    raise HTTPException(status_code=404, detail="not_found")
+
+  redis_conn = redis.from_url(_REDIS_URL)  # type: ignore[misc]
+  queue = Queue(_QUEUE_NAME, connection=redis_conn)  # type: ignore[misc]
+  job = queue.enqueue("worker.compare_task.run_amount_analytics", engagement_id, job_timeout=-1)  # type: ignore[misc]
+  return {"queued": True, "job_id": job.id}
+
+
 @router.get("/findings", response_model=Dict[str, List[FindingOut]])
 def list_findings(
   evidence_id: str,
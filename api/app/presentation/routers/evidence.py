@@ -194,6 +194,42 @@ def confirm_upload(
   return EvidenceOut(**dict(row))
 
 
+@router.get("/{evidence_id}/duplicates")
+def get_duplicates(
+  evidence_id: str,
+  db: Session = Depends(get_db),
+  user_id: str = Depends(current_user_id),
+) -> dict[str, object]:
+  enforce(db, user_id, "evidence", "read")
+
+  rows = db.execute(
+    text(
+      """
+        SELECT d.evidence_id::text AS evidence_id, d.original_id::text AS original_id, d.similarity, e.filename
+        FROM evidence_duplicates d
+        JOIN evidence e ON e.id = CASE WHEN d.evidence_id = :id THEN d.original_id ELSE d.evidence_id END
+        WHERE d.evidence_id = :id OR d.original_id = :id
+        ORDER BY d.similarity DESC
+      """
+    ),
+    {"id": evidence_id},
+  ).mappings().all()
+
+  original = next((row for row in rows if row["evidence_id"] == evidence_id), None)
+  return {
+    "duplicate_of": (
+      {"id": original["original_id"], "filename": original["filename"], "similarity": original["similarity"]}
+      if original is not None
+      else None
+    ),
+    "copies": [
+      {"id": row["evidence_id"], "filename": row["filename"], "similarity": row["similarity"]}
+      for row in rows
+      if row["evidence_id"] != evidence_id
+    ],
+  }
+
+
 @router.get("/{evidence_id}/download")
 def get_download_url(
   evidence_id: str,
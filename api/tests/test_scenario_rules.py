@@ -0,0 +1,33 @@
+import pytest
+from pydantic import ValidationError
+
+from app.application.dtos.ai_compare import ScenarioIn
+
+
+def _scenario(*checks):
+    return ScenarioIn(name="Procurement", rules={"checks": list(checks)})
+
+
+def test_valid_rules_are_accepted():
+    scenario = _scenario(
+        {"id": "PO-01", "any": ["approval"], "regex": [r"po[- ]?\d{6}"], "section": "Full Text"},
+        {"near": [{"terms": ["موافقة", "المدير"], "within": 5}], "amount": {"min": 50000, "max": None}, "page": [1, 2]},
+    )
+    assert len(scenario.rules["checks"]) == 2
+
+
+@pytest.mark.parametrize(
+    "checks, problem",
+    [
+        ([{"id": "R", "regex": ["(unclosed"]}], "invalid regex"),
+        ([{"id": "N", "near": [{"terms": ["one"]}]}], "near needs at least two terms"),
+        ([{"id": "N", "near": {"terms": ["a", "b"], "within": -1}}], "near needs at least two terms"),
+        ([{"id": "A", "amount": {"min": "50k"}}], "amount min and max"),
+        ([{"id": "P", "page": "one"}], "page must be"),
+        ([{"id": "C1", "any": ["PO"]}, {"id": "C1", "any": ["invoice"]}], "C1: duplicate check id"),
+        ([{"any": ["PO"]}, {"id": "RULE-1", "any": ["invoice"]}], "RULE-1: duplicate check id"),
+    ],
+)
+def test_invalid_rules_are_rejected(checks, problem):
+    with pytest.raises(ValidationError, match=problem):
+        _scenario(*checks)
@@ -26,13 +26,16 @@ type NormalizedPayload = {
   sections?: Array<{ text?: string }>;
 };
 
-const extractPrimaryText = (payload: unknown): string | null => {
+// PDFs are stored with one section per page, so the preview joins every section.
+const extractFullText = (payload: unknown): string | null => {
   if (!payload || typeof payload !== "object") {
     return null;
   }
   const normalized = payload as NormalizedPayload;
-  const text = normalized.sections?.[0]?.text;
-  return typeof text === "string" ? text : null;
+  const texts = (normalized.sections ?? [])
+    .map((section) => section?.text)
+    .filter((text): text is string => typeof text === "string");
+  return texts.length ? texts.join("\n\n") : null;
 };
 
 export default function EvidencePage() {
@@ -250,7 +253,7 @@ export default function EvidencePage() {
                 <pre className="whitespace-pre-wrap text-xs">
                   {(() => {
                     try {
-                      const text = extractPrimaryText(latestExtraction.json_payload) ?? "";
+                      const text = extractFullText(latestExtraction.json_payload) ?? "";
                       return text.length > 2000 ? `${text.slice(0, 2000)}…(truncated)` : text;
                     } catch {
                       return JSON.stringify(latestExtraction.json_payload, null, 2);